@@ -0,0 +1,61 @@
+"""Throughput of run_batch across worker counts, pool kinds and vectorization.
+
+    python benchmarks/batch.py --sets 20000 --workers 1 2 4 8
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from microtone.batch import run_batch  # noqa: E402
+
+SCENARIOS = {
+    'numeric': """
+growth = rate * 12 + 1 rest
+total = principal * growth - fee rest
+return total / principal rest
+""",
+    'procedural': """
+define function compound(p, r, n) rest
+    value = p rest
+    for each i in 1 to 12 rest
+        value = value + value * r rest
+    end rest
+    return value - n rest
+end rest
+return compound(principal, rate, fee) rest
+""",
+}
+
+
+def measure(code, param_sets, **options):
+    start = time.perf_counter()
+    count = sum(1 for result in run_batch(code, param_sets, **options) if result['ok'])
+    elapsed = time.perf_counter() - start
+    return {'completed': count, 'seconds': elapsed, 'sets_per_second': count / elapsed}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark MicrotonE batch execution.')
+    parser.add_argument('--sets', type=int, default=10000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, os.cpu_count() or 1])
+    args = parser.parse_args(argv)
+
+    param_sets = [{'principal': 1000.0 + i, 'rate': 0.01 + i % 7 / 1000, 'fee': 5.0} for i in range(args.sets)]
+    results = {}
+    for name, code in SCENARIOS.items():
+        measure(code, param_sets[:10])  # warm up: imports NumPy and the stdlib once
+        results[f'{name}/vectorized'] = measure(code, param_sets)
+        for workers in sorted(set(args.workers)):
+            for mode in ('process', 'thread'):
+                results[f'{name}/{mode}/{workers}'] = measure(code, param_sets, workers=workers, mode=mode, vectorize=False)
+    print(json.dumps({'cpu_count': os.cpu_count(), 'sets': args.sets, 'results': results}, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,205 @@
+"""Benchmark harness for the MicrotonE lexer, parsers, interpreters and pipeline.
+
+    python benchmarks/bench.py --save baseline.json
+    python benchmarks/bench.py --compare baseline.json
+"""
+import argparse
+import contextlib
+import importlib
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import workloads  # noqa: E402
+
+ENGINE_MODULES = {
+    'lexer': 'microtone.lexer',
+    'app': 'microtone.app',
+    'grammar': 'microtone.grammar',
+    'executor': 'microtone.processor',
+}
+
+
+def load_engines():
+    engines = {}
+    unavailable = {}
+    for name, module_name in ENGINE_MODULES.items():
+        try:
+            engines[name] = vars(importlib.import_module(module_name))
+        except Exception as e:
+            unavailable[name] = f'{type(e).__name__}: {e}'
+    return engines, unavailable
+
+
+def build_stages(engines):
+    # Each stage maps source code to a zero-argument callable; only the
+    # callable is timed, so per-sample setup stays out of the measurement.
+    stages = {}
+
+    if 'lexer' in engines:
+        lexer_class = engines['lexer']['MicrotonELexer']
+
+        def tokenize(src):
+            lexer = lexer_class()
+            return lambda: lexer.tokenize(src)
+        stages['lexer.tokenize'] = tokenize
+
+    if 'app' in engines:
+        app_lexer_class = engines['app']['MicrotonELexer']
+        app_class = engines['app']['MicrotoneInterpreter']
+
+        def app_tokenize(src):
+            lexer = app_lexer_class()
+            return lambda: lexer.tokenize(src)
+
+        def app_parse(src):
+            interpreter = app_class()
+            return lambda: interpreter.parse_program(src)
+
+        def app_execute(src):
+            interpreter = app_class()
+            statements = interpreter.parse_program(src)
+
+            def run():
+                for stmt in statements:
+                    interpreter.execute_statement(stmt)
+            return run
+        stages['app.tokenize'] = app_tokenize
+        stages['app.parse_program'] = app_parse
+        stages['app.execute'] = app_execute
+
+    if 'grammar' in engines:
+        grammar_class = engines['grammar']['Interpreter']
+
+        def grammar_parse(src):
+            interpreter = grammar_class()
+            return lambda: interpreter.parse_program(src)
+
+        def grammar_execute(src):
+            interpreter = grammar_class()
+            statements = interpreter.parse_program(src)
+            return lambda: interpreter.execute(statements)
+        stages['grammar.parse_program'] = grammar_parse
+        stages['grammar.execute'] = grammar_execute
+
+    if 'executor' in engines:
+        executor_class = engines['executor']['MicrotonEExecutor']
+        interpreter_class = engines['executor']['MicrotonEInterpreter']
+
+        def pipeline(src):
+            executor = executor_class(interpreter_class())
+            return lambda: executor.execute_code(src)
+        stages['executor.pipeline'] = pipeline
+
+    return stages
+
+
+def summarize(samples):
+    return {
+        'samples': samples,
+        'min': min(samples),
+        'mean': statistics.mean(samples),
+        'median': statistics.median(samples),
+        'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        'variance': statistics.variance(samples) if len(samples) > 1 else 0.0,
+    }
+
+
+def measure(setup, src, repeat, warmup):
+    samples = []
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for i in range(warmup + repeat):
+            func = setup(src)
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            if i >= warmup:
+                samples.append(elapsed)
+    return summarize(samples)
+
+
+def run(repeat=5, warmup=1, scale=1.0, only=None):
+    engines, unavailable = load_engines()
+    stages = build_stages(engines)
+    results = {}
+    for workload_name, src in workloads.build(scale).items():
+        for stage_name, setup in stages.items():
+            key = f'{stage_name}/{workload_name}'
+            if only and only not in key:
+                continue
+            try:
+                results[key] = measure(setup, src, repeat, warmup)
+            except RecursionError:
+                results[key] = {'error': 'RecursionError'}
+            except Exception as e:
+                results[key] = {'error': f'{type(e).__name__}: {e}'}
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'repeat': repeat,
+            'warmup': warmup,
+            'scale': scale,
+        },
+        'unavailable': unavailable,
+        'results': results,
+    }
+
+
+def compare(report, baseline, threshold):
+    regressions = []
+    for key, current in report['results'].items():
+        previous = baseline.get('results', {}).get(key)
+        if not previous or 'median' not in previous or 'median' not in current:
+            continue
+        ratio = current['median'] / previous['median'] if previous['median'] else 1.0
+        current['baseline_median'] = previous['median']
+        current['ratio'] = ratio
+        if ratio > 1.0 + threshold:
+            regressions.append((key, previous['median'], current['median'], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the MicrotonE toolchain.')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--scale', type=float, default=1.0, help='multiplier for generated workload sizes')
+    parser.add_argument('--only', help='run only benchmarks whose key contains this text')
+    parser.add_argument('--save', help='write the JSON report to this file')
+    parser.add_argument('--compare', help='baseline JSON report to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10, help='allowed slowdown before flagging a regression')
+    args = parser.parse_args(argv)
+
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 20000))
+    report = run(args.repeat, args.warmup, args.scale, args.only)
+
+    regressions = []
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        report['regressions'] = [key for key, _, _, _ in regressions]
+
+    output = json.dumps(report, indent=2)
+    if args.save:
+        with open(args.save, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+    for key, before, after, ratio in regressions:
+        print(f'REGRESSION {key}: {before * 1000:.3f}ms -> {after * 1000:.3f}ms ({ratio:.2f}x)', file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
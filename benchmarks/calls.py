@@ -0,0 +1,67 @@
+"""Microbenchmark for call-site lookups.
+
+Runs deep call chains with and without the interpreter's per-site inline
+caches. Both sides run with the JIT off, since compiled functions would
+bypass the call sites being measured.
+
+    python benchmarks/calls.py --depth 50 --calls 500
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import workloads  # noqa: E402
+from microtone.grammar import Interpreter  # noqa: E402
+
+
+class UncachedInterpreter(Interpreter):
+    def call_function(self, func_name, args, cache=None):
+        return super().call_function(func_name, args)
+
+
+def measure(interpreter_class, code, repeat):
+    samples = []
+    for _ in range(repeat):
+        interpreter = interpreter_class(jit_threshold=None)
+        statements = interpreter.parse_program(code)
+        start = time.perf_counter()
+        interpreter.execute(statements)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark MicrotonE call-site lookups.')
+    parser.add_argument('--depth', type=int, default=50)
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=9)
+    args = parser.parse_args(argv)
+
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 20000))
+    cases = {
+        'call_chain': (workloads.call_chain(args.depth, args.calls), args.depth * args.calls),
+    }
+    results = {}
+    for name, (code, operations) in cases.items():
+        cached = measure(Interpreter, code, args.repeat)
+        uncached = measure(UncachedInterpreter, code, args.repeat)
+        results[name] = {
+            'cached_seconds': cached,
+            'uncached_seconds': uncached,
+            'cached_ns_per_operation': cached / operations * 1e9,
+            'uncached_ns_per_operation': uncached / operations * 1e9,
+            'speedup': uncached / cached,
+        }
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
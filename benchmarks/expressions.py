@@ -0,0 +1,122 @@
+"""Microbenchmark for expression parsing.
+
+Parses generated expressions of increasing length with the Pratt parser and
+with the regex splitter it replaced. The splitter only handles flat
+arithmetic and gets both precedence and associativity wrong on some of it,
+so it is timed on the flat case alone.
+
+    python benchmarks/expressions.py --terms 100 1000 10000
+"""
+import argparse
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from microtone.grammar import LITERALS, OPERATORS, InlineCache, Interpreter  # noqa: E402
+
+
+class RegexInterpreter(Interpreter):
+    # The expression parser as it was before the Pratt parser: split at the
+    # first operator and recurse on both sides.
+    def parse_expression(self, expr):
+        expr = expr.strip()
+        if re.match(r"^\d+$", expr):
+            return self.literal(int(expr))
+        elif re.match(r"^\d+\.\d+$", expr):
+            return self.literal(float(expr))
+        elif re.match(r'^".*"$', expr):
+            return self.literal(expr.strip('"'))
+        elif re.match(r"^\w+\(.*\)$", expr):
+            func_name, args = re.match(r"(\w+)\((.*)\)", expr).groups()
+            args = [self.parse_expression(arg.strip()) for arg in args.split(",")] if args else []
+            return ('call', func_name, args, InlineCache())
+        elif re.match(r"^\[.*\]$", expr):
+            return ('list', [self.parse_expression(element.strip()) for element in expr[1:-1].split(",")])
+        elif re.match(r"^\w+$", expr):
+            if expr in self.constants:
+                return self.constants[expr]
+            return ('identifier', expr)
+        match = re.match(r"(.*?)([+\-*/><=!]+)(.*)", expr)
+        if not match:
+            raise SyntaxError(f"Invalid expression: {expr}")
+        left, operator, right = match.groups()
+        node = ('operation', self.parse_expression(left.strip()), operator.strip(), self.parse_expression(right.strip()))
+        if node[1][0] in LITERALS and node[3][0] in LITERALS and node[2] in OPERATORS:
+            return self.fold(node)
+        return node
+
+
+def term(rng, nested):
+    if not nested:
+        return rng.choice((f'x{rng.randrange(100)}', str(rng.randrange(1, 1000))))
+    return rng.choice((
+        f'x{rng.randrange(100)}',
+        str(rng.randrange(1, 1000)),
+        f'f(x{rng.randrange(100)}, {rng.randrange(10)})',
+        f'(x{rng.randrange(100)} - {rng.randrange(10)})',
+        f'[{rng.randrange(10)}, x{rng.randrange(100)}]',
+        f'-x{rng.randrange(100)}',
+    ))
+
+
+def generate(terms, nested=False, seed=0):
+    rng = random.Random(seed)
+    parts = [term(rng, nested)]
+    for _ in range(terms - 1):
+        parts.append(rng.choice('+-*/'))
+        parts.append(term(rng, nested))
+    return ' '.join(parts)
+
+
+def measure(interpreter_class, text, repeat):
+    samples = []
+    for _ in range(repeat):
+        interpreter = interpreter_class()
+        start = time.perf_counter()
+        try:
+            interpreter.parse_expression(text)
+        except (RecursionError, SyntaxError) as e:
+            return None, f'{type(e).__name__}: {str(e)[:60]}'
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark MicrotonE expression parsing.')
+    parser.add_argument('--terms', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--repeat', type=int, default=7)
+    args = parser.parse_args(argv)
+
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 20000))
+    results = {}
+    for terms in args.terms:
+        flat = generate(terms)
+        nested = generate(terms, nested=True)
+        pratt, _ = measure(Interpreter, flat, args.repeat)
+        regex, error = measure(RegexInterpreter, flat, args.repeat)
+        pratt_nested, _ = measure(Interpreter, nested, args.repeat)
+        result = {
+            'characters': len(flat),
+            'pratt_seconds': pratt,
+            'pratt_ns_per_term': pratt / terms * 1e9,
+            'pratt_nested_seconds': pratt_nested,
+            'pratt_nested_ns_per_term': pratt_nested / terms * 1e9,
+        }
+        if error is None:
+            result.update(regex_seconds=regex, regex_ns_per_term=regex / terms * 1e9, speedup=regex / pratt)
+        else:
+            result['regex_error'] = error
+        results[f'terms_{terms}'] = result
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,164 @@
+"""Per-worker memory for a large library shared across forked workers.
+
+Each worker runs a short script against the same generated library, which is
+held one of four ways:
+
+    parse   every worker parses the library itself
+    tree    the parent parses it and workers inherit the tree across fork
+    frozen  the parent freezes it and workers inherit the buffer across fork
+    mmap    the library is frozen to a file and every worker maps it
+
+and reports its private memory, the pages no other process shares, less
+that of a worker that loads no library at all. An
+inherited tree is shared at first, but reference counting and the garbage
+collector write to every object they touch, so its pages are copied into the
+worker one by one. Needs Linux for fork and /proc.
+
+    python benchmarks/frozen.py --lines 100000 --workers 4
+"""
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from microtone import frozen  # noqa: E402
+from microtone.grammar import Interpreter  # noqa: E402
+
+SCRIPT = 'total = 0 rest\nfor each i in 1 to 200 rest\n    total = total + helper0(i) + helper1(i) rest\nend rest\n'
+
+
+def library(lines):
+    # Functions of ten lines each, every one with a branch and a loop.
+    body = []
+    for i in range(lines // 10):
+        body += [
+            f'define function helper{i}(n) rest',
+            f'    acc = n * {i % 97 + 1} rest',
+            '    if acc > 100 rest',
+            f'        acc = acc - {i % 13} rest',
+            '    else rest',
+            f'        acc = acc + {i % 7} rest',
+            '    end rest',
+            '    for each k in 1 to 3 rest',
+            '        acc = acc + k * 2 rest',
+            '    end rest',
+            '    return acc rest',
+            'end rest',
+        ]
+    return '\n'.join(body)
+
+
+def private_kb():
+    with open('/proc/self/smaps_rollup') as f:
+        fields = dict(line.split(':', 1) for line in f if ':' in line)
+    return sum(int(fields[name].split()[0]) for name in ('Private_Clean', 'Private_Dirty'))
+
+
+def worker(mode, shared, code):
+    if mode == 'baseline':
+        Interpreter(jit_threshold=None).run('total = 0 rest\n')
+    elif mode == 'parse':
+        interpreter = Interpreter(jit_threshold=None)
+        interpreter.parse_program(code)
+        interpreter.run(SCRIPT)
+    elif mode == 'tree':
+        interpreter = Interpreter(jit_threshold=None)
+        interpreter.functions = shared
+        interpreter.run(SCRIPT)
+    elif mode == 'frozen':
+        interpreter = frozen.FrozenInterpreter(shared)
+        interpreter.run(SCRIPT)
+    else:
+        interpreter = frozen.FrozenInterpreter(frozen.FrozenProgram.open(shared))
+        interpreter.run(SCRIPT)
+    gc.collect()
+    return private_kb()
+
+
+def measure(mode, shared, code, workers):
+    children = []
+    for _ in range(workers):
+        read, write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read)
+            try:
+                result = worker(mode, shared, code)
+            except BaseException as e:
+                result = f'{type(e).__name__}: {e}'
+            os.write(write, json.dumps(result).encode())
+            os._exit(0)
+        os.close(write)
+        children.append((pid, read))
+    results = []
+    for pid, read in children:
+        with os.fdopen(read) as f:
+            results.append(json.loads(f.read()))
+        os.waitpid(pid, 0)
+    errors = [result for result in results if isinstance(result, str)]
+    if errors:
+        return {'error': errors[0]}
+    return {'private_mb_per_worker': statistics.median(results) / 1024}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark per-worker memory for shared MicrotonE libraries.')
+    parser.add_argument('--lines', type=int, default=100000)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args(argv)
+    if not hasattr(os, 'fork') or not os.path.exists('/proc/self/smaps_rollup'):
+        print('This benchmark needs fork and /proc/self/smaps_rollup.', file=sys.stderr)
+        return 1
+
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 20000))
+    code = library(args.lines)
+    start = time.perf_counter()
+    interpreter = Interpreter(jit_threshold=None)
+    statements = interpreter.parse_program(code)
+    parse_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    buffer = frozen.freeze(statements, interpreter.program_functions())
+    freeze_seconds = time.perf_counter() - start
+    path = os.path.join(tempfile.mkdtemp(), 'library.mtf')
+    with open(path, 'wb') as f:
+        f.write(buffer)
+    start = time.perf_counter()
+    frozen.FrozenProgram.open(path).function('helper0')
+    open_seconds = time.perf_counter() - start
+
+    results = {
+        'lines': args.lines,
+        'parse_seconds': parse_seconds,
+        'freeze_seconds': freeze_seconds,
+        'open_seconds': open_seconds,
+        'frozen_mb': len(buffer) / 2 ** 20,
+    }
+    # The frozen modes run while the parent holds no tree, as a parent that
+    # only ever loaded the frozen library would.
+    del interpreter, statements
+    gc.collect()
+    program = frozen.FrozenProgram(buffer)
+    shared = {'baseline': None, 'frozen': program, 'mmap': path, 'parse': None}
+    for mode in ('baseline', 'frozen', 'mmap', 'parse'):
+        results[mode] = measure(mode, shared[mode], code, args.workers)
+    interpreter = Interpreter(jit_threshold=None)
+    interpreter.parse_program(code)
+    results['tree'] = measure('tree', interpreter.functions, code, args.workers)
+    os.remove(path)
+    baseline = results['baseline'].get('private_mb_per_worker', 0)
+    for mode in ('frozen', 'mmap', 'parse', 'tree'):
+        if 'private_mb_per_worker' in results[mode]:
+            results[mode]['library_mb_per_worker'] = results[mode]['private_mb_per_worker'] - baseline
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""Tree-walker speed on numeric kernels with and without type inference.
+
+The JIT is disabled so that every statement goes through the interpreter.
+
+    python benchmarks/inference.py --size 5000
+"""
+import argparse
+import io
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import workloads  # noqa: E402
+from microtone.grammar import Interpreter  # noqa: E402
+from microtone.output import OutputSink  # noqa: E402
+
+
+def decay_kernel(steps):
+    return '\n'.join([
+        'define function decay(n) rest',
+        '    x = 1000.0 rest',
+        '    v = 0.0 rest',
+        '    step = 0 rest',
+        f'    while step < {steps} rest',
+        '        v = v - x * 0.01 rest',
+        '        x = x + v * 0.1 rest',
+        '        step = step + 1 rest',
+        '    end rest',
+        '    return x + n rest',
+        'end rest',
+        'total = 0.0 rest',
+        'for each j in 1 to 10 rest',
+        '    total = total + decay(j) rest',
+        'end rest',
+    ])
+
+
+def measure(code, infer, repeat):
+    samples = []
+    for _ in range(repeat):
+        interpreter = Interpreter(output=OutputSink(io.StringIO()), jit_threshold=None)
+        interpreter.infer_types = infer
+        statements = interpreter.parse_program(code)
+        start = time.perf_counter()
+        interpreter.execute(statements)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark MicrotonE type inference.')
+    parser.add_argument('--size', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    kernels = {
+        'arithmetic_loop': workloads.arithmetic_loop(args.size),
+        'hot_globals': workloads.hot_globals(args.size),
+        'decay': decay_kernel(args.size // 10),
+    }
+    results = {}
+    for name, code in kernels.items():
+        dynamic = measure(code, False, args.repeat)
+        inferred = measure(code, True, args.repeat)
+        results[name] = {'dynamic_seconds': dynamic, 'inferred_seconds': inferred, 'speedup': dynamic / inferred}
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
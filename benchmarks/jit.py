@@ -0,0 +1,120 @@
+"""Interpreted vs. compiled hot functions on numeric kernels.
+
+Each kernel is run with the JIT disabled, with the default threshold, compiled
+from the first call, and as the equivalent hand-written Python for reference.
+
+    python benchmarks/jit.py --calls 300
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from microtone.grammar import JIT_THRESHOLD, Interpreter  # noqa: E402
+
+KERNELS = {
+    'sum_of_squares': ("""
+define function kernel(n) rest
+    total = 0 rest
+    for each i in 1 to 500 rest
+        total = total + i * i rest
+    end rest
+    return total + n rest
+end rest
+""", """
+def kernel(n):
+    total = 0
+    for i in range(1, 501):
+        total = total + i * i
+    return total + n
+"""),
+    'euler_decay': ("""
+define function kernel(n) rest
+    x = 1000.0 rest
+    step = 0 rest
+    while step < 500 rest
+        x = x - x * 0.01 rest
+        step = step + 1 rest
+    end rest
+    return x + n rest
+end rest
+""", """
+def kernel(n):
+    x = 1000.0
+    step = 0
+    while step < 500:
+        x = x - x * 0.01
+        step = step + 1
+    return x + n
+"""),
+}
+
+
+def driver(calls):
+    return '\n'.join([
+        'acc = 0 rest',
+        f'for each j in 1 to {calls} rest',
+        '    acc = acc + kernel(j) rest',
+        'end rest',
+    ])
+
+
+def run_microtone(code, threshold, repeat):
+    samples = []
+    for _ in range(repeat):
+        interpreter = Interpreter(jit_threshold=threshold)
+        statements = interpreter.parse_program(code)
+        start = time.perf_counter()
+        interpreter.execute(statements)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def run_python(source, calls, repeat):
+    namespace = {}
+    exec(source, namespace)
+    kernel = namespace['kernel']
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        acc = 0
+        for j in range(1, calls + 1):
+            acc = acc + kernel(j)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark MicrotonE hot-function compilation.')
+    parser.add_argument('--calls', type=int, default=300)
+    parser.add_argument('--threshold', type=int, default=JIT_THRESHOLD)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, (microtone_source, python_source) in KERNELS.items():
+        code = microtone_source + driver(args.calls)
+        interpreted = run_microtone(code, None, args.repeat)
+        tiered = run_microtone(code, args.threshold, args.repeat)
+        compiled = run_microtone(code, 1, args.repeat)
+        python = run_python(python_source, args.calls, args.repeat)
+        results[name] = {
+            'interpreted_seconds': interpreted,
+            'jit_seconds': tiered,
+            'compiled_seconds': compiled,
+            'python_seconds': python,
+            'speedup': interpreted / tiered,
+            'compiled_speedup': interpreted / compiled,
+            'slowdown_vs_python': compiled / python,
+        }
+    print(json.dumps({'calls': args.calls, 'threshold': args.threshold, 'results': results}, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
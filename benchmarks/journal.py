@@ -0,0 +1,76 @@
+"""Overhead of recording an execution journal for time-travel debugging.
+
+Recorded runs are never compiled, so both sides run with the JIT off.
+
+    python benchmarks/journal.py --iterations 20000
+"""
+import argparse
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import workloads  # noqa: E402
+from microtone.grammar import Interpreter  # noqa: E402
+from microtone.journal import Replayer  # noqa: E402
+from microtone.output import OutputSink  # noqa: E402
+
+
+def measure(code, path, repeat):
+    samples = []
+    for _ in range(repeat):
+        interpreter = Interpreter(output=OutputSink(io.StringIO()), jit_threshold=None)
+        statements = interpreter.parse_program(code)
+        start = time.perf_counter()
+        if path is None:
+            interpreter.execute(statements)
+        else:
+            with interpreter.record(path):
+                interpreter.execute(statements)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark MicrotonE execution journals.')
+    parser.add_argument('--iterations', type=int, default=10000)
+    parser.add_argument('--depth', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 20000))
+    cases = {
+        'arithmetic_loop': workloads.arithmetic_loop(args.iterations),
+        'hot_globals': workloads.hot_globals(args.iterations),
+        'call_chain': workloads.call_chain(args.depth, args.iterations // args.depth),
+    }
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'run.mtj')
+        for name, code in cases.items():
+            plain = measure(code, None, args.repeat)
+            recorded = measure(code, path, args.repeat)
+            start = time.perf_counter()
+            replayer = Replayer(path)
+            replayer.seek(replayer.end // 2)
+            seek = time.perf_counter() - start
+            results[name] = {
+                'plain_seconds': plain,
+                'recorded_seconds': recorded,
+                'overhead': recorded / plain - 1,
+                'journal_bytes': os.path.getsize(path),
+                'open_and_seek_seconds': seek,
+            }
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
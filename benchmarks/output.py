@@ -0,0 +1,82 @@
+"""Output throughput: per-line print versus the buffered output sinks.
+
+    python benchmarks/output.py --lines 200000
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from microtone.grammar import Interpreter  # noqa: E402
+from microtone.output import OutputSink, PrintSink, RingBufferSink  # noqa: E402
+
+
+def trace_program(lines):
+    return '\n'.join([
+        f'for each i in 1 to {lines} rest',
+        '    print i * 3 rest',
+        'end rest',
+    ])
+
+
+def devnull_text(line_buffered):
+    return io.TextIOWrapper(open(os.devnull, 'wb'), line_buffering=line_buffered)
+
+
+def sinks():
+    # Each entry builds (sink, stdout replacement or None, cleanup).
+    yield 'print_line_buffered', lambda: (PrintSink(), devnull_text(True))
+    yield 'print_block_buffered', lambda: (PrintSink(), devnull_text(False))
+    for format in ('text', 'jsonl', 'csv'):
+        yield f'sink_{format}', lambda format=format: (OutputSink(devnull_text(False), format), None)
+    yield 'sink_binary', lambda: (OutputSink(open(os.devnull, 'wb'), 'binary'), None)
+    yield 'ring_buffer', lambda: (RingBufferSink(10000), None)
+
+
+def measure(make, statements, functions, lines, direct):
+    sink, stdout = make()
+    redirect = contextlib.redirect_stdout(stdout) if stdout is not None else contextlib.nullcontext()
+    with redirect:
+        start = time.perf_counter()
+        if direct:
+            for i in range(lines):
+                sink.write(i * 3)
+        else:
+            interpreter = Interpreter(output=sink)
+            interpreter.functions = dict(functions)
+            interpreter.execute(statements)
+        sink.flush()
+        elapsed = time.perf_counter() - start
+    if stdout is not None:
+        stdout.close()
+    return {'seconds': elapsed, 'lines_per_second': lines / elapsed}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark MicrotonE output sinks.')
+    parser.add_argument('--lines', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    parser_interpreter = Interpreter()
+    statements = parser_interpreter.parse_program(trace_program(args.lines))
+    results = {}
+    for name, make in sinks():
+        for mode, direct in (('sink_only', True), ('interpreted', False)):
+            runs = [measure(make, statements, parser_interpreter.program_functions(), args.lines, direct) for _ in range(args.repeat)]
+            results[f'{name}/{mode}'] = min(runs, key=lambda run: run['seconds'])
+    for key, result in results.items():
+        mode = key.split('/')[1]
+        result['speedup_vs_print'] = results[f'print_line_buffered/{mode}']['seconds'] / result['seconds']
+    print(json.dumps({'lines': args.lines, 'results': results}, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""Quantum simulator benchmark: time per gate and peak memory by register width.
+
+    python benchmarks/quantum.py --min-qubits 10 --max-qubits 24
+    python benchmarks/quantum.py --min-qubits 26 --max-qubits 28 --backends chunked sparse
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from microtone.quantum import QuantumRegister  # noqa: E402
+
+
+def layered_circuit(register, layers):
+    # Hadamard on every qubit, then a CNOT ladder; a controlled gate on each
+    # qubit forces the fused single-qubit gates to be applied.
+    gates = 0
+    for _ in range(layers):
+        for qubit in range(register.count):
+            register.h(qubit)
+            gates += 1
+        for qubit in range(register.count - 1):
+            register.cnot(qubit, qubit + 1)
+            gates += 1
+    register.flush()
+    return gates
+
+
+def ghz_circuit(register, layers):
+    gates = 0
+    for _ in range(layers):
+        register.h(0)
+        gates += 1
+        for qubit in range(register.count - 1):
+            register.cnot(qubit, qubit + 1)
+            gates += 1
+    register.flush()
+    return gates
+
+
+def run(count, backend, layers, workers):
+    circuit = ghz_circuit if backend == 'sparse' else layered_circuit
+    tracemalloc.start()
+    start = time.perf_counter()
+    with QuantumRegister(count, backend, workers=workers) as register:
+        setup = time.perf_counter() - start
+        start = time.perf_counter()
+        gates = circuit(register, layers)
+        elapsed = time.perf_counter() - start
+        resolved = register.backend
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'qubits': count,
+        'backend': resolved,
+        'gates': gates,
+        'setup_seconds': setup,
+        'seconds': elapsed,
+        'seconds_per_gate': elapsed / gates,
+        'peak_heap_bytes': peak,
+        'state_bytes': 16 << count if resolved != 'sparse' else None,
+        'max_rss_bytes': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the MicrotonE quantum simulator.')
+    parser.add_argument('--min-qubits', type=int, default=10)
+    parser.add_argument('--max-qubits', type=int, default=22)
+    parser.add_argument('--step', type=int, default=2)
+    parser.add_argument('--layers', type=int, default=1)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--backends', nargs='+', default=['dense', 'chunked', 'sparse'])
+    args = parser.parse_args(argv)
+
+    results = []
+    for count in range(args.min_qubits, args.max_qubits + 1, args.step):
+        for backend in args.backends:
+            results.append(run(count, backend, args.layers, args.workers))
+            print(json.dumps(results[-1]), file=sys.stderr)
+    print(json.dumps({'results': results}, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""Dead-function elimination on a large bundle of mostly unused helpers.
+
+Compares parsing, the size of the compiled program as the batch runner and
+execution server cache it, and the size of its frozen form, with and without
+dropping the functions nothing calls.
+
+    python benchmarks/reachability.py --helpers 5000 --used 50
+"""
+import argparse
+import json
+import os
+import pickle
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from microtone import frozen  # noqa: E402
+from microtone.grammar import Interpreter  # noqa: E402
+
+
+def bundle(helpers, used):
+    # `used` of the helpers are called from the top level, each through a
+    # chain of two more; the rest are never called.
+    lines = []
+    for i in range(helpers):
+        callee = f'helper{i + 1}(n) + ' if i % 3 != 2 and i + 1 < helpers else ''
+        lines += [
+            f'define function helper{i}(n) rest',
+            f'    total = {callee}n * {i % 17 + 1} rest',
+            '    for each k in 1 to 3 rest',
+            '        total = total + k rest',
+            '    end rest',
+            '    return total rest',
+            'end rest',
+        ]
+    lines.append('result = 0 rest')
+    for i in range(0, used * 3, 3):
+        lines.append(f'result = result + helper{i}(2) rest')
+    lines.append('print result rest')
+    return '\n'.join(lines)
+
+
+def measure(code, eliminate, repeat):
+    samples = []
+    for _ in range(repeat):
+        interpreter = Interpreter()
+        interpreter.eliminate_dead_functions = eliminate
+        start = time.perf_counter()
+        statements = interpreter.parse_program(code)
+        samples.append(time.perf_counter() - start)
+    functions = interpreter.program_functions()
+    return {
+        'parse_seconds': statistics.median(samples),
+        'functions': len(functions),
+        'eliminated': len(interpreter.eliminated_functions),
+        'cached_bytes': len(pickle.dumps((statements, functions), pickle.HIGHEST_PROTOCOL)),
+        'frozen_bytes': len(frozen.freeze(statements, functions)),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark MicrotonE dead-function elimination.')
+    parser.add_argument('--helpers', type=int, default=5000)
+    parser.add_argument('--used', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 20000))
+    code = bundle(args.helpers, args.used)
+    kept = measure(code, False, args.repeat)
+    shaken = measure(code, True, args.repeat)
+    results = {
+        'kept': kept,
+        'eliminated': shaken,
+        'parse_speedup': kept['parse_seconds'] / shaken['parse_seconds'],
+        'cache_size_ratio': shaken['cached_bytes'] / kept['cached_bytes'],
+    }
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""Local load generator for microtone.server.
+
+    python benchmarks/server_load.py --requests 2000 --concurrency 16 --workers 1 4 8
+"""
+import argparse
+import http.client
+import json
+import math
+import os
+import statistics
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import workloads  # noqa: E402
+from microtone.server import HTTPServer, WorkerPool  # noqa: E402
+
+
+def percentile(ordered, fraction):
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def client(port, code, count, latencies, errors):
+    conn = http.client.HTTPConnection('127.0.0.1', port)
+    body = json.dumps({'code': code})
+    for _ in range(count):
+        start = time.perf_counter()
+        conn.request('POST', '/run', body, {'Content-Type': 'application/json'})
+        response = json.loads(conn.getresponse().read())
+        latencies.append(time.perf_counter() - start)
+        if not response['ok']:
+            errors.append(response['error'])
+    conn.close()
+
+
+def run_load(workers, requests, concurrency, code):
+    with WorkerPool(workers) as pool:
+        server = HTTPServer(('127.0.0.1', 0), pool)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        port = server.server_address[1]
+        latencies, errors = [], []
+        per_client = max(1, requests // concurrency)
+        clients = [threading.Thread(target=client, args=(port, code, per_client, latencies, errors)) for _ in range(concurrency)]
+        start = time.perf_counter()
+        for t in clients:
+            t.start()
+        for t in clients:
+            t.join()
+        elapsed = time.perf_counter() - start
+        server_stats = pool.stats.snapshot()
+        server.shutdown()
+        server.server_close()
+    ordered = sorted(latencies)
+    return {
+        'workers': workers,
+        'requests': len(latencies),
+        'errors': len(errors),
+        'scripts_per_second': len(latencies) / elapsed,
+        'p50_latency': statistics.median(ordered),
+        'p99_latency': percentile(ordered, 0.99),
+        'server': server_stats,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load-test the MicrotonE execution server.')
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, os.cpu_count() or 1])
+    parser.add_argument('--iterations', type=int, default=2000, help='size of the arithmetic loop each request runs')
+    args = parser.parse_args(argv)
+
+    code = workloads.arithmetic_loop(args.iterations)
+    results = [run_load(workers, args.requests, args.concurrency, code) for workers in args.workers]
+    print(json.dumps({'concurrency': args.concurrency, 'results': results}, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""Startup-time benchmark for `import microtone` and the `microtone` CLI.
+
+    python benchmarks/startup.py --repeat 20 --budget-ms 50
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COMMANDS = {
+    'python': [sys.executable, '-c', 'pass'],
+    'import_microtone': [sys.executable, '-c', 'import microtone'],
+    'import_interpreter': [sys.executable, '-c', 'from microtone import Interpreter'],
+    'cli_version': [sys.executable, '-m', 'microtone', '--version'],
+    'cli_run': [sys.executable, '-m', 'microtone', '-c', 'x = 1 rest'],
+}
+
+
+def time_command(command, repeat):
+    env = dict(os.environ, PYTHONPATH=ROOT, PYTHONDONTWRITEBYTECODE='')
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=ROOT, env=env, check=True, stdout=subprocess.DEVNULL)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure MicrotonE startup time.')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--budget-ms', type=float, default=50.0, help='fail if a CLI command exceeds this median')
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, command in COMMANDS.items():
+        samples = time_command(command, args.repeat)
+        results[name] = {
+            'min_ms': min(samples) * 1000,
+            'median_ms': statistics.median(samples) * 1000,
+            'stdev_ms': statistics.stdev(samples) * 1000 if len(samples) > 1 else 0.0,
+        }
+    python_median = results['python']['median_ms']
+    for name, result in results.items():
+        result['overhead_ms'] = result['median_ms'] - python_median
+
+    over_budget = [name for name in results if name.startswith('cli_') and results[name]['median_ms'] > args.budget_ms]
+    print(json.dumps({'budget_ms': args.budget_ms, 'over_budget': over_budget, 'results': results}, indent=2))
+    return 1 if over_budget else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
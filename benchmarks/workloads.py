@@ -0,0 +1,111 @@
+import os
+
+WORKLOAD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'workloads')
+
+
+def deep_recursion(depth):
+    return '\n'.join([
+        'define function down(n) rest',
+        '    if n > 0 rest',
+        '        return down(n - 1) rest',
+        '    end rest',
+        '    return 0 rest',
+        'end rest',
+        '',
+        f'print down({depth}) rest',
+    ])
+
+
+def arithmetic_loop(iterations):
+    return '\n'.join([
+        'total = 0 rest',
+        f'for each i in 1 to {iterations} rest',
+        '    total = total + i * 2 rest',
+        'end rest',
+        'count = 0 rest',
+        f'while count < {iterations} rest',
+        '    count = count + 1 rest',
+        'end rest',
+        'print total rest',
+    ])
+
+
+def large_literals(size):
+    items = ', '.join(str(i) for i in range(size))
+    pairs = ', '.join(f'"k{i}": {i}' for i in range(size))
+    return '\n'.join([
+        f'data = [{items}] rest',
+        f'table = {{{pairs}}} rest',
+    ])
+
+
+def many_functions(count):
+    lines = []
+    for i in range(count):
+        lines.append(f'define function f{i}(a) rest')
+        lines.append(f'    return a + {i} rest')
+        lines.append('end rest')
+    for i in range(count):
+        lines.append(f'r{i} = f{i}({i}) rest')
+    return '\n'.join(lines)
+
+
+def call_chain(depth, calls=200):
+    # Each call walks a chain of `depth` functions, so most of the time goes
+    # into resolving call targets.
+    lines = ['define function link0(n) rest', '    return n + 1 rest', 'end rest']
+    for i in range(1, depth):
+        lines += [f'define function link{i}(n) rest', f'    return link{i - 1}(n) + 1 rest', 'end rest']
+    lines += ['total = 0 rest', f'for each i in 1 to {calls} rest', f'    total = total + link{depth - 1}(i) rest', 'end rest']
+    return '\n'.join(lines)
+
+
+def hot_globals(iterations):
+    return '\n'.join([
+        'rate = 3 rest',
+        'offset = 7 rest',
+        'scale = 2 rest',
+        'total = 0 rest',
+        f'for each i in 1 to {iterations} rest',
+        '    total = total + rate * scale + offset rest',
+        'end rest',
+    ])
+
+
+def flat_file(lines):
+    body = []
+    for i in range(lines):
+        if i % 10 == 0:
+            body.append(f'start section {i}')
+        elif i % 10 == 9:
+            body.append(f'print v{i - 1} rest')
+        else:
+            body.append(f'v{i} = {i} + {i % 7} rest')
+    return '\n'.join(body)
+
+
+GENERATED = {
+    'deep_recursion': (deep_recursion, 150),
+    'arithmetic_loop': (arithmetic_loop, 2000),
+    'large_literals': (large_literals, 2000),
+    'many_functions': (many_functions, 300),
+    'flat_file': (flat_file, 5000),
+    'call_chain': (call_chain, 50),
+    'hot_globals': (hot_globals, 5000),
+}
+
+
+def canned():
+    workloads = {}
+    for name in sorted(os.listdir(WORKLOAD_DIR)):
+        if name.endswith('.mton'):
+            with open(os.path.join(WORKLOAD_DIR, name)) as f:
+                workloads[name[:-len('.mton')]] = f.read()
+    return workloads
+
+
+def build(scale=1.0):
+    workloads = canned()
+    for name, (generator, size) in GENERATED.items():
+        workloads[name] = generator(max(1, int(size * scale)))
+    return workloads
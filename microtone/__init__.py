@@ -0,0 +1,51 @@
+import importlib
+
+__version__ = '1.0.0'
+
+# Public names are resolved on first access so that `import microtone` stays
+# cheap and free of side effects; optional subsystems are only imported when
+# a script or caller actually reaches for them.
+_EXPORTS = {
+    'Interpreter': 'grammar',
+    'BreakException': 'grammar',
+    'ContinueException': 'grammar',
+    'Limits': 'limits',
+    'LimitExceeded': 'limits',
+    'InstructionLimitExceeded': 'limits',
+    'CallDepthExceeded': 'limits',
+    'CollectionSizeExceeded': 'limits',
+    'DeadlineExceeded': 'limits',
+    'MicrotoneInterpreter': 'app',
+    'MicrotonELexer': 'lexer',
+    'MicrotonEParser': 'parser',
+    'MicrotonEInterpreter': 'interpreter',
+    'MicrotonEExecutor': 'executor',
+    'MicrotonEProcessor': 'processor',
+    'MicrotonETranspiler': 'transpiler',
+    'MicrotonEOptimizer': 'optimizer',
+    'MicrotonECheckpoint': 'checkpoint',
+    'Replayer': 'journal',
+    'FrozenProgram': 'frozen',
+    'FrozenInterpreter': 'frozen',
+    'Metrics': 'metrics',
+    'HashwordManager': 'hashwords',
+    'RulesAndProtocols': 'rules',
+    'MicrotonELibrary': 'stdlib',
+    'QuantumRegister': 'quantum',
+    'run_batch': 'batch',
+}
+
+__all__ = ['__version__'] + sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module_name}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,32 @@
+import asyncio
+from inspect import isawaitable  # noqa: F401
+
+from .grammar import read_file, write_file
+
+
+async def sleep(seconds):
+    await asyncio.sleep(seconds)
+
+
+async def read_file_async(path):
+    return await asyncio.get_running_loop().run_in_executor(None, read_file, path)
+
+
+async def write_file_async(path, text):
+    return await asyncio.get_running_loop().run_in_executor(None, write_file, path, text)
+
+
+# Awaitable replacements for blocking builtins, used by Interpreter.run_async.
+BUILTINS = {
+    'sleep': sleep,
+    'read_file': read_file_async,
+    'write_file': write_file_async,
+}
+
+
+def yield_to_loop():
+    return asyncio.sleep(0)
+
+
+def wait_for(awaitable, timeout):
+    return asyncio.wait_for(awaitable, timeout)
@@ -0,0 +1,174 @@
+import io
+import os
+
+from .limits import LimitExceeded
+
+# Statement and expression kinds a program may use and still be evaluated
+# once over whole columns of parameters instead of once per parameter set.
+VECTOR_STATEMENTS = ('assignment', 'return', 'comment')
+VECTOR_FUNCTIONS = ('sqrt', 'exp', 'log', 'sin', 'cos', 'tan', 'abs', 'power')
+
+_program = None
+
+
+def compile_program(code, search_path=None, freeze=False):
+    # Returns (statements, functions), or (program, None) for a frozen
+    # program, which forked workers share without copying.
+    from .grammar import Interpreter
+
+    interpreter = Interpreter(search_path=search_path)
+    interpreter.eliminate_dead_functions = True
+    statements = interpreter.parse_program(code)
+    if freeze:
+        from . import frozen
+        return frozen.FrozenProgram(frozen.freeze(statements, interpreter.program_functions())), None
+    return statements, interpreter.program_functions()
+
+
+def run_one(program, index, params, limits=None, search_path=None):
+    from .grammar import Interpreter
+    from .output import OutputSink
+
+    statements, functions = program
+    output = io.StringIO()
+    response = {'index': index, 'ok': True}
+    if functions is None:
+        from .frozen import FrozenInterpreter
+        interpreter = FrozenInterpreter(statements, limits, OutputSink(output), search_path)
+        statements = statements.main
+    else:
+        interpreter = Interpreter(limits, OutputSink(output), search_path)
+        interpreter.functions = dict(functions)
+    interpreter.global_variables.update(params)
+    try:
+        try:
+            response['result'] = interpreter.execute(statements)
+        finally:
+            interpreter.output.flush()
+        response['globals'] = interpreter.global_variables
+    except LimitExceeded as e:
+        response.update(ok=False, error=f'{type(e).__name__}: {e}')
+    except Exception as e:
+        response.update(ok=False, error=f'{type(e).__name__}: {e}')
+    response['output'] = output.getvalue()
+    return response
+
+
+def _init_worker(program, limits, search_path):
+    global _program
+    _program = (program, limits, search_path)
+
+
+def _run_task(task):
+    program, limits, search_path = _program
+    return run_one(program, task[0], task[1], limits, search_path)
+
+
+def _vectorizable_expression(expr):
+    if expr[0] in ('number', 'identifier'):
+        return True
+    if expr[0] == 'operation':
+        return _vectorizable_expression(expr[1]) and _vectorizable_expression(expr[3])
+    if expr[0] == 'numeric':
+        return _vectorizable_expression(expr[2]) and _vectorizable_expression(expr[3])
+    if expr[0] == 'negate':
+        return _vectorizable_expression(expr[1])
+    if expr[0] == 'call':
+        return expr[1] in VECTOR_FUNCTIONS and all(_vectorizable_expression(arg) for arg in expr[2])
+    return False
+
+
+def is_vectorizable(statements):
+    return all(
+        statement[0] in VECTOR_STATEMENTS
+        and (statement[0] == 'comment' or _vectorizable_expression(statement[-1]))
+        for statement in statements
+    )
+
+
+def run_vectorized(program, param_sets):
+    # Binds each parameter to a column holding its value from every set and
+    # runs the program once. Returns None when the sets do not line up or the
+    # columns cannot be evaluated exactly, so the caller can fall back.
+    try:
+        import numpy
+    except ImportError:
+        return None
+    from .grammar import Interpreter
+
+    statements, functions = program
+    if functions or not param_sets or not is_vectorizable(statements):
+        return None
+    names = list(param_sets[0])
+    columns = {}
+    for name in names:
+        values = [params.get(name) for params in param_sets]
+        if any(type(value) not in (int, float) for value in values) or any(len(params) != len(names) for params in param_sets):
+            return None
+        # Floats keep IEEE semantics in float64; ints stay arbitrary precision
+        # in object arrays so the results match the scalar interpreter.
+        dtype = float if all(type(value) is float for value in values) else object
+        columns[name] = numpy.array(values, dtype=dtype)
+
+    interpreter = Interpreter()
+    interpreter.global_variables.update(columns)
+    try:
+        with numpy.errstate(all='raise'):
+            result = interpreter.execute(statements)
+    except (ArithmeticError, ValueError, TypeError, NameError):
+        return None
+
+    count = len(param_sets)
+
+    def column(value):
+        if isinstance(value, numpy.ndarray) and value.shape == (count,):
+            return value.tolist()
+        value = value.item() if isinstance(value, numpy.generic) else value
+        return [value] * count
+
+    results = column(result)
+    variables = {name: column(value) for name, value in interpreter.global_variables.items()}
+    return [
+        {'index': i, 'ok': True, 'result': results[i], 'globals': {name: values[i] for name, values in variables.items()}, 'output': ''}
+        for i in range(count)
+    ]
+
+
+def run_batch(code, param_sets, workers=None, mode='process', limits=None, ordered=True, vectorize=True, search_path=None, chunksize=None, freeze=False):
+    # Parses `code` once and runs it once per parameter set, yielding a result
+    # dictionary for each. Parameter sets are injected as global variables.
+    # With `freeze`, workers run the program from one flat buffer instead of
+    # the parsed tree; see frozen.py.
+    program = compile_program(code, search_path, freeze)
+    param_sets = list(param_sets)
+    if vectorize and limits is None and not freeze:
+        results = run_vectorized(program, param_sets)
+        if results is not None:
+            yield from results
+            return
+
+    workers = workers or os.cpu_count() or 1
+    tasks = enumerate(param_sets)
+    if workers == 1 or len(param_sets) < 2:
+        for index, params in tasks:
+            yield run_one(program, index, params, limits, search_path)
+        return
+    if chunksize is None:
+        chunksize = max(1, len(param_sets) // (workers * 4))
+
+    if mode == 'thread':
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+
+        with ThreadPoolExecutor(workers) as executor:
+            futures = [executor.submit(run_one, program, index, params, limits, search_path) for index, params in tasks]
+            for future in (futures if ordered else as_completed(futures)):
+                yield future.result()
+    elif mode == 'process':
+        import multiprocessing
+
+        context = multiprocessing.get_context('fork' if 'fork' in multiprocessing.get_all_start_methods() else None)
+        with context.Pool(workers, _init_worker, (program, limits, search_path)) as pool:
+            run = pool.imap if ordered else pool.imap_unordered
+            yield from run(_run_task, tasks, chunksize)
+    else:
+        raise ValueError(f"Unknown batch mode: {mode}")
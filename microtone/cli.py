@@ -0,0 +1,108 @@
+import os
+import sys
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='microtone', description='Run MicrotonE programs.')
+    parser.add_argument('file', nargs='?', help='MicrotonE source file (.mton, .micro, .mtn) or frozen program (.mtf); reads stdin if omitted')
+    parser.add_argument('-c', dest='code', help='program passed in as a string')
+    parser.add_argument('-I', '--path', action='append', default=[], metavar='DIR', help='add a directory to the module search path')
+    parser.add_argument('--version', action='store_true', help='print the version and exit')
+    parser.add_argument('--max-instructions', type=int, help='stop after this many instructions')
+    parser.add_argument('--max-call-depth', type=int, help='maximum function call depth')
+    parser.add_argument('--max-collection-size', type=int, help='largest list, dictionary or string a program may build')
+    parser.add_argument('--timeout', type=float, help='wall-clock deadline in seconds')
+    parser.add_argument('--no-jit', action='store_true', help='never compile hot functions to Python')
+    parser.add_argument('--freeze', metavar='FILE', help='write the program frozen to this file (.mtf) instead of running it')
+    parser.add_argument('--report-eliminated', action='store_true', help='list the functions dropped because nothing calls them on stderr')
+    parser.add_argument('--record', metavar='JOURNAL', help='record variable writes and control decisions to this file for time-travel debugging')
+    parser.add_argument('--metrics', metavar='FILE', help='write timings and counters for the run to this file')
+    parser.add_argument('--metrics-format', choices=('prometheus', 'otel'), help='metrics file format; defaults to OpenTelemetry JSON for .json files and Prometheus text otherwise')
+    parser.add_argument('--traces', metavar='FILE', help='write the spans of the run to this file as OpenTelemetry JSON')
+    parser.add_argument('--output', help='write program output to this file instead of stdout')
+    parser.add_argument('--format', default='text', choices=('text', 'jsonl', 'csv', 'binary'), help='output record format')
+    parser.add_argument('--buffer-size', type=int, default=1 << 16, help='bytes of output buffered before a write')
+    args = parser.parse_args(argv)
+
+    if args.version:
+        from . import __version__
+        print(f'MicrotonE {__version__}')
+        return 0
+
+    search_path = list(args.path)
+    frozen = None
+    if args.code is not None:
+        code = args.code
+    elif args.file and args.file.endswith('.mtf'):
+        from .frozen import FrozenProgram
+        frozen = FrozenProgram.open(args.file)
+        search_path.append(os.path.dirname(os.path.abspath(args.file)))
+    elif args.file and args.file != '-':
+        with open(args.file) as f:
+            code = f.read()
+        search_path.append(os.path.dirname(os.path.abspath(args.file)))
+    else:
+        code = sys.stdin.read()
+
+    if args.freeze and frozen is not None:
+        print(f'{args.file} is already frozen', file=sys.stderr)
+        return 1
+
+    from .grammar import JIT_THRESHOLD, Interpreter
+    if args.freeze:
+        from .frozen import freeze
+        interpreter = Interpreter(search_path=search_path)
+        interpreter.eliminate_dead_functions = True
+        try:
+            statements = interpreter.parse_program(code)
+            buffer = freeze(statements, interpreter.program_functions())
+        except (SyntaxError, ValueError) as e:
+            print(f'{type(e).__name__}: {e}', file=sys.stderr)
+            return 1
+        with open(args.freeze, 'wb') as f:
+            f.write(buffer)
+        if args.report_eliminated:
+            report_eliminated(interpreter)
+        return 0
+
+    from .limits import LimitExceeded, Limits
+    from .output import OutputSink
+    limits = Limits(args.max_instructions, args.max_call_depth, args.max_collection_size, args.timeout)
+    jit_threshold = None if args.no_jit else JIT_THRESHOLD
+    with OutputSink(args.output, args.format, args.buffer_size) as output:
+        if frozen is not None:
+            from .frozen import FrozenInterpreter
+            interpreter = FrozenInterpreter(frozen, limits, output, search_path)
+        else:
+            interpreter = Interpreter(limits, output, search_path, jit_threshold)
+            interpreter.eliminate_dead_functions = True
+        journal = interpreter.record(args.record) if args.record else None
+        if args.metrics or args.traces:
+            from .metrics import Metrics
+            interpreter.metrics = Metrics(labels={'script': args.file or '-'})
+        try:
+            if frozen is not None:
+                interpreter.run()
+            else:
+                interpreter.run(code)
+        except (SyntaxError, NameError, ValueError, ImportError, LimitExceeded) as e:
+            output.flush()
+            print(f'{type(e).__name__}: {e}', file=sys.stderr)
+            return 1
+        finally:
+            if journal is not None:
+                journal.close()
+            if args.metrics:
+                interpreter.metrics.write(args.metrics, args.metrics_format)
+            if args.traces:
+                interpreter.metrics.write_traces(args.traces)
+    if args.report_eliminated:
+        report_eliminated(interpreter)
+    return 0
+
+
+def report_eliminated(interpreter):
+    names = interpreter.eliminated_functions
+    print(f"Eliminated functions ({len(names)}): {', '.join(names) or 'none'}", file=sys.stderr)
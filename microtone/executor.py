@@ -0,0 +1,30 @@
+from .lexer import MicrotonELexer
+from .parser import MicrotonEParser
+
+
+class MicrotonEExecutor:
+    def __init__(self, interpreter, metrics=None):
+        self.interpreter = interpreter
+        self.metrics = metrics
+
+    def execute_code(self, code):
+        metrics = self.metrics
+        if metrics is not None:
+            start = metrics.now()
+        lexer = MicrotonELexer()
+        tokens = lexer.tokenize(code)
+        if metrics is not None:
+            start = metrics.span('tokenize', start)
+            metrics.count('tokens', len(tokens))
+        parser = MicrotonEParser(tokens)
+        ast = parser.parse()
+        if metrics is not None:
+            metrics.span('parse', start)
+            from .metrics import count_nodes
+            metrics.count('nodes', count_nodes(ast))
+            start = metrics.now()
+            executed = self.interpreter.instruction_count
+        self.interpreter.interpret(ast)
+        if metrics is not None:
+            metrics.span('execute', start)
+            metrics.count('instructions', self.interpreter.instruction_count - executed)
@@ -0,0 +1,155 @@
+from .grammar import LITERALS, OPERATORS, InlineCache
+from .lexer import MicrotonELexer
+
+# Binding power of each binary operator; higher binds tighter, and operators
+# of equal power associate to the left.
+PRECEDENCE = {
+    '==': 1,
+    '!=': 1,
+    '>': 1,
+    '<': 1,
+    '>=': 1,
+    '<=': 1,
+    '+': 2,
+    '-': 2,
+    '*': 3,
+    '/': 3,
+}
+UNARY = 4
+
+_lexer = MicrotonELexer()
+
+
+class ExpressionParser:
+    # A Pratt parser over MicrotonELexer tokens. It builds the interpreter's
+    # tuple nodes in one pass: literals are interned in the interpreter's
+    # constant pool, known constants are loaded from their folded nodes and
+    # operations on two literals are folded as they are built.
+    def __init__(self, interpreter, text):
+        self.interpreter = interpreter
+        self.text = text
+        metrics = interpreter.metrics
+        if metrics is not None:
+            start = metrics.now()
+        try:
+            self.tokens = _lexer.tokenize(text)
+        except ValueError as e:
+            raise SyntaxError(f"Invalid expression: {text} ({e})") from None
+        if metrics is not None:
+            # Tokenizing is interleaved with parsing, so it is timed as a
+            # running total rather than a span.
+            metrics.add_time('tokenize', (metrics.now() - start) / 1e9)
+            metrics.count('tokens', len(self.tokens))
+        self.position = 0
+
+    def error(self, index=None):
+        # Points at the token at `index`, by default the one just consumed.
+        if index is None:
+            index = self.position - 1
+        raise SyntaxError(f"Invalid expression: {self.text} (at column {_lexer.column(self.text, index)})")
+
+    def parse(self):
+        node = self.expression(0)
+        if self.position < len(self.tokens):
+            self.error(self.position)
+        return node
+
+    def next(self):
+        if self.position >= len(self.tokens):
+            self.error(self.position)
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position][1]
+        return None
+
+    def expect(self, text):
+        if self.next()[1] != text:
+            self.error()
+
+    def expression(self, power):
+        # Parses operators binding tighter than `power`; a loop rather than
+        # recursion handles each run of equal-power operators.
+        left = self.prefix()
+        tokens = self.tokens
+        while self.position < len(tokens):
+            token_type, operator = tokens[self.position]
+            if token_type != 'OPERATOR':
+                break
+            binding = PRECEDENCE.get(operator)
+            if binding is None:
+                self.error(self.position)
+            if binding <= power:
+                break
+            self.position += 1
+            left = self.operation(left, operator, self.expression(binding))
+        return left
+
+    def operation(self, left, operator, right):
+        node = ('operation', left, operator, right)
+        if left[0] in LITERALS and right[0] in LITERALS and operator in OPERATORS:
+            return self.interpreter.fold(node)
+        return node
+
+    def prefix(self):
+        token_type, text = self.next()
+        if token_type == 'NUMBER':
+            return self.interpreter.literal(float(text) if '.' in text else int(text))
+        elif token_type == 'STRING':
+            return self.interpreter.literal(text[1:-1])
+        elif token_type == 'IDENTIFIER' or (token_type == 'KEYWORD' and text.isidentifier()):
+            if self.peek() == '(':
+                self.position += 1
+                return ('call', text, self.sequence(')'), InlineCache())
+            if text in self.interpreter.constant_nodes:
+                return self.interpreter.constant_nodes[text]
+            return ('identifier', text)
+        elif text == '(':
+            node = self.expression(0)
+            self.expect(')')
+            return node
+        elif text == '[':
+            return ('list', self.sequence(']'))
+        elif text == '{':
+            return ('dictionary', self.dictionary())
+        elif text == '-':
+            operand = self.expression(UNARY)
+            if operand[0] == 'number':
+                return self.interpreter.literal(-operand[1])
+            return ('negate', operand)
+        self.error()
+
+    def sequence(self, close):
+        items = []
+        if self.peek() == close:
+            self.position += 1
+            return items
+        while True:
+            items.append(self.expression(0))
+            text = self.next()[1]
+            if text == close:
+                return items
+            if text != ',':
+                self.error()
+
+    def dictionary(self):
+        items = {}
+        if self.peek() == '}':
+            self.position += 1
+            return items
+        while True:
+            key = self.expression(0)
+            self.expect(':')
+            items[key] = self.expression(0)
+            text = self.next()[1]
+            if text == '}':
+                return items
+            if text != ',':
+                self.error()
+
+
+def parse_expression(interpreter, text):
+    return ExpressionParser(interpreter, text).parse()
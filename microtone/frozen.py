@@ -0,0 +1,477 @@
+import array
+import marshal
+import mmap
+import struct
+import sys
+
+from .grammar import OPERATORS, BreakException, ContinueException, InlineCache, Interpreter
+
+MAGIC = b'MTF1'
+FORMAT_VERSION = 2
+MARSHAL_VERSION = 4
+
+# A frozen program is one flat buffer:
+#
+#   header   MAGIC, then the counts and word offsets below as uint32s
+#   words    little-endian int32s: the code, then the constant, name and
+#            function tables
+#   blob     marshalled constants and UTF-8 names, addressed by the tables
+#
+# Every reference is an index into `words` or the blob, never a pointer, so
+# the buffer can be written to disk and mapped back at any address, or
+# inherited across fork without a single page of it being written to.
+#
+# Each node is an opcode followed by its operands; child nodes are referred
+# to by their offset in `words`. A block is BLOCK, its length and the
+# offsets of its statements. A function table entry is (name, block,
+# params), where params points at a count followed by name indices; entries
+# are sorted by name so a function is found by binary search.
+_header = struct.Struct('<4s9I')
+
+# Expressions. INT holds an integer literal that fits in a word inline.
+CONST = 1
+NAME = 2
+OPERATION = 3
+NUMERIC = 4
+CALL = 5
+LIST = 6
+DICTIONARY = 7
+INT = 8
+NEGATE = 9
+# Statements. A call statement is its CALL node.
+BLOCK = 16
+ASSIGN = 17
+CONSTANT = 18
+PRINT = 19
+IF = 20
+LOOP = 21
+WHILE = 22
+RETURN = 23
+TRY = 24
+BREAK = 25
+CONTINUE = 26
+IMPORT = 27
+
+INT_MIN = -2 ** 31
+INT_MAX = 2 ** 31 - 1
+OPERATOR_NAMES = tuple(OPERATORS)
+OPERATOR_FUNCTIONS = tuple(OPERATORS.values())
+# Statements with nothing to run once the program is parsed.
+SKIPPED = ('comment', 'function', 'hashword')
+
+
+class Freezer:
+    # Flattens a parsed program: the tuple AST from Interpreter.parse_program
+    # and the interpreter's functions.
+    def __init__(self):
+        self.words = []
+        self.constants = []
+        self.constant_indices = {}
+        self.names = []
+        self.name_indices = {}
+        self.sites = 0
+
+    def emit(self, *words):
+        offset = len(self.words)
+        self.words.extend(words)
+        return offset
+
+    def constant(self, value):
+        # As in Interpreter.literal(), floats are keyed on their repr so that
+        # -0.0 keeps its sign.
+        key = (type(value), repr(value) if type(value) is float else value)
+        if key not in self.constant_indices:
+            self.constant_indices[key] = len(self.constants)
+            self.constants.append(value)
+        return self.constant_indices[key]
+
+    def name(self, name):
+        if name not in self.name_indices:
+            self.name_indices[name] = len(self.names)
+            self.names.append(name)
+        return self.name_indices[name]
+
+    def block(self, statements):
+        offsets = [self.statement(statement) for statement in statements if statement[0] not in SKIPPED]
+        return self.emit(BLOCK, len(offsets), *offsets)
+
+    def statement(self, statement):
+        kind = statement[0]
+        if kind == 'assignment':
+            return self.emit(ASSIGN, self.name(statement[1]), self.expression(statement[2]))
+        elif kind == 'constant':
+            return self.emit(CONSTANT, self.name(statement[1]), self.expression(statement[2]))
+        elif kind == 'print':
+            return self.emit(PRINT, self.expression(statement[1]))
+        elif kind == 'if':
+            condition = self.expression(statement[1])
+            return self.emit(IF, condition, self.block(statement[2]), self.block(statement[3]))
+        elif kind == 'loop':
+            _, var, start, end, statements = statement
+            return self.emit(LOOP, self.name(var), self.constant(start), self.constant(end), self.block(statements))
+        elif kind == 'while':
+            condition = self.expression(statement[1])
+            return self.emit(WHILE, condition, self.block(statement[2]))
+        elif kind == 'return':
+            return self.emit(RETURN, self.expression(statement[1]))
+        elif kind == 'try':
+            try_block = self.block(statement[1])
+            return self.emit(TRY, try_block, self.block(statement[2]))
+        elif kind == 'call':
+            return self.expression(statement)
+        elif kind == 'break':
+            return self.emit(BREAK)
+        elif kind == 'continue':
+            return self.emit(CONTINUE)
+        elif kind == 'import':
+            return self.emit(IMPORT, self.name(statement[1]))
+        raise ValueError(f"Cannot freeze {kind} statements")
+
+    def expression(self, expr):
+        kind = expr[0]
+        if kind in ('number', 'string'):
+            value = expr[1]
+            if type(value) is int and INT_MIN <= value <= INT_MAX:
+                return self.emit(INT, value)
+            return self.emit(CONST, self.constant(value))
+        elif kind == 'identifier':
+            return self.emit(NAME, self.name(expr[1]))
+        elif kind in ('operation', 'numeric'):
+            if kind == 'operation':
+                _, left, operator, right = expr
+            else:
+                _, operator, left, right, _, _ = expr
+            if operator not in OPERATORS:
+                raise ValueError(f"Unsupported operator: {operator}")
+            left = self.expression(left)
+            right = self.expression(right)
+            return self.emit(OPERATION if kind == 'operation' else NUMERIC, OPERATOR_NAMES.index(operator), left, right)
+        elif kind == 'negate':
+            return self.emit(NEGATE, self.expression(expr[1]))
+        elif kind == 'call':
+            args = [self.expression(arg) for arg in expr[2]]
+            self.sites += 1
+            return self.emit(CALL, self.name(expr[1]), self.sites - 1, len(args), *args)
+        elif kind == 'list':
+            elements = [self.expression(element) for element in expr[1]]
+            return self.emit(LIST, len(elements), *elements)
+        elif kind == 'dictionary':
+            items = []
+            for k, v in expr[1].items():
+                items.append(self.expression(k))
+                items.append(self.expression(v))
+            return self.emit(DICTIONARY, len(expr[1]), *items)
+        raise ValueError(f"Cannot freeze {kind} expressions")
+
+    def freeze(self, statements, functions):
+        main = self.block(statements)
+        entries = []
+        for func_name, (params, body) in functions.items():
+            block = self.block(body)
+            params = self.emit(len(params), *map(self.name, params))
+            entries.append((func_name.encode(), self.name(func_name), block, params))
+        entries.sort()
+
+        blob = bytearray()
+        constant_table = len(self.words)
+        for value in self.constants:
+            payload = marshal.dumps(value, MARSHAL_VERSION)
+            self.emit(len(blob), len(payload))
+            blob += payload
+        name_table = len(self.words)
+        for name in self.names:
+            payload = name.encode()
+            self.emit(len(blob), len(payload))
+            blob += payload
+        function_table = len(self.words)
+        for _, name, block, params in entries:
+            self.emit(name, block, params)
+
+        words = array.array('i', self.words)
+        if sys.byteorder != 'little':
+            words.byteswap()
+        header = _header.pack(
+            MAGIC, FORMAT_VERSION, len(words), main, constant_table, len(self.constants),
+            name_table, function_table, len(entries), self.sites,
+        )
+        return header + words.tobytes() + bytes(blob)
+
+
+def freeze(statements, functions):
+    # Returns the frozen form of a parsed program as bytes.
+    return Freezer().freeze(statements, functions)
+
+
+def freeze_program(code, search_path=None):
+    interpreter = Interpreter(search_path=search_path)
+    interpreter.eliminate_dead_functions = True
+    statements = interpreter.parse_program(code)
+    return freeze(statements, interpreter.program_functions())
+
+
+class FrozenProgram:
+    # A read-only view of a frozen buffer: bytes, an mmap or anything else
+    # with the buffer protocol. Nothing is decoded up front; constants and
+    # names are decoded the first time they are used and kept for the rest
+    # of the process, and everything else is read from the buffer as it runs.
+    def __init__(self, buffer):
+        self.buffer = memoryview(buffer)
+        if len(self.buffer) < _header.size or self.buffer[:len(MAGIC)] != MAGIC:
+            raise ValueError("Not a frozen MicrotonE program")
+        (_, version, size, self.main, self.constant_table, self.constant_count, self.name_table,
+         self.function_table, self.function_count, self.sites) = _header.unpack_from(self.buffer)
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported frozen program version {version}")
+        end = _header.size + 4 * size
+        words = self.buffer[_header.size:end]
+        if sys.byteorder == 'little':
+            self.words = words.cast('i')
+        else:
+            self.words = array.array('i', words)
+            self.words.byteswap()
+        self.blob = self.buffer[end:]
+        self.constants = {}
+        self.names = {}
+        self.functions = {}
+
+    @classmethod
+    def open(cls, path):
+        # Maps the file read-only, so every process that opens it shares the
+        # same physical pages.
+        with open(path, 'rb') as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def __reduce__(self):
+        # Only needed where workers are spawned rather than forked.
+        return (FrozenProgram, (bytes(self.buffer),))
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.buffer)
+
+    def constant(self, index):
+        try:
+            return self.constants[index]
+        except KeyError:
+            start, length = self.words[self.constant_table + 2 * index:self.constant_table + 2 * index + 2]
+            value = self.constants[index] = marshal.loads(self.blob[start:start + length])
+            return value
+
+    def name(self, index):
+        try:
+            return self.names[index]
+        except KeyError:
+            start, length = self.words[self.name_table + 2 * index:self.name_table + 2 * index + 2]
+            name = self.names[index] = str(self.blob[start:start + length], 'utf-8')
+            return name
+
+    def function(self, func_name):
+        # (params, block) for a function in the program, or None.
+        try:
+            return self.functions[func_name]
+        except KeyError:
+            pass
+        key = func_name.encode()
+        words = self.words
+        low, high = 0, self.function_count
+        function = None
+        while low < high:
+            middle = (low + high) // 2
+            entry = self.function_table + 3 * middle
+            start, length = words[self.name_table + 2 * words[entry]:self.name_table + 2 * words[entry] + 2]
+            name = self.blob[start:start + length]
+            if name == key:
+                params = words[entry + 2]
+                function = ([self.name(index) for index in words[params + 1:params + 1 + words[params]]], words[entry + 1])
+                break
+            elif bytes(name) < key:
+                low = middle + 1
+            else:
+                high = middle
+        self.functions[func_name] = function
+        return function
+
+    def function_names(self):
+        words = self.words
+        return [self.name(words[self.function_table + 3 * i]) for i in range(self.function_count)]
+
+
+class FrozenInterpreter(Interpreter):
+    # Runs a FrozenProgram straight from its buffer. Frozen functions are
+    # found before the interpreter's own, so code run with run() can call
+    # into a frozen library; function bodies are block offsets rather than
+    # statement lists, and execute() accepts either.
+    def __init__(self, program, limits=None, output=None, search_path=None):
+        super().__init__(limits, output, search_path, jit_threshold=None)
+        if not isinstance(program, FrozenProgram):
+            program = FrozenProgram(program)
+        self.program = program
+        self.words = program.words
+        self.names = program.names
+        self.caches = [None] * program.sites
+        # Frozen functions may write any global, which inference cannot see.
+        self.infer_types = False
+
+    def run(self, code=None):
+        if code is not None:
+            return super().run(code)
+        self.reset_limits()
+        try:
+            return self.execute(self.program.main)
+        finally:
+            self.close_registers()
+            self.output.flush()
+
+    def resolve_function(self, func_name):
+        if func_name not in self._functions:
+            function = self.program.function(func_name)
+            if function is not None:
+                return (self.version, function, None, None)
+        return super().resolve_function(func_name)
+
+    def execute(self, statements):
+        if type(statements) is not int:
+            return super().execute(statements)
+        # Mirrors Interpreter.execute() over a block in the buffer.
+        words = self.words
+        program = self.program
+        self.returning = False
+        start = statements + 2
+        for i in range(start, start + words[statements + 1]):
+            offset = words[i]
+            op = words[offset]
+            self.instruction_count += 1
+            if self.instruction_count > self.checkpoint:
+                self.checkpoint = self.check_limits()
+            if op == ASSIGN:
+                self.set_variable(self.names.get(words[offset + 1]) or program.name(words[offset + 1]), self.evaluate_expression(words[offset + 2]))
+            elif op == CALL:
+                self.evaluate_expression(offset)
+            elif op == PRINT:
+                self.output.write(self.evaluate_expression(words[offset + 1]))
+            elif op == IF:
+                taken = self.evaluate_expression(words[offset + 1])
+                if self.journal is not None:
+                    self.journal.decision(self.instruction_count, 'if', taken)
+                result = self.execute(words[offset + 2] if taken else words[offset + 3])
+                if self.returning:
+                    return result
+            elif op == LOOP:
+                var = program.name(words[offset + 1])
+                block = words[offset + 4]
+                for value in range(program.constant(words[offset + 2]), program.constant(words[offset + 3]) + 1):
+                    self.set_variable(var, value)
+                    try:
+                        result = self.execute(block)
+                    except BreakException:
+                        break
+                    except ContinueException:
+                        continue
+                    if self.returning:
+                        return result
+            elif op == WHILE:
+                condition = words[offset + 1]
+                block = words[offset + 2]
+                while self.evaluate_expression(condition):
+                    if self.journal is not None:
+                        self.journal.decision(self.instruction_count, 'while', True)
+                    self.instruction_count += 1
+                    if self.instruction_count > self.checkpoint:
+                        self.checkpoint = self.check_limits()
+                    try:
+                        result = self.execute(block)
+                    except BreakException:
+                        break
+                    except ContinueException:
+                        continue
+                    if self.returning:
+                        return result
+                else:
+                    if self.journal is not None:
+                        self.journal.decision(self.instruction_count, 'while', False)
+            elif op == RETURN:
+                value = self.evaluate_expression(words[offset + 1])
+                self.returning = True
+                return value
+            elif op == CONSTANT:
+                name = program.name(words[offset + 1])
+                value = self.global_variables[name] = self.evaluate_expression(words[offset + 2])
+                if self.journal is not None:
+                    self.journal.append((self.instruction_count, name, value))
+            elif op == TRY:
+                try:
+                    result = self.execute(words[offset + 1])
+                except Exception:
+                    if self.journal is not None:
+                        self.journal.decision(self.instruction_count, 'except', True)
+                    result = self.execute(words[offset + 2])
+                if self.returning:
+                    return result
+            elif op == IMPORT:
+                self.import_module(program.name(words[offset + 1]))
+            elif op == BREAK:
+                raise BreakException()
+            elif op == CONTINUE:
+                raise ContinueException()
+            else:
+                raise ValueError(f"Corrupt frozen program: opcode {op} at {offset}")
+
+    def evaluate_expression(self, expr):
+        if type(expr) is not int:
+            return super().evaluate_expression(expr)
+        words = self.words
+        op = words[expr]
+        if op == NAME:
+            name = self.names.get(words[expr + 1]) or self.program.name(words[expr + 1])
+            try:
+                return self.global_variables[name]
+            except KeyError:
+                return self.get_variable(name)
+        elif op == NUMERIC or op == OPERATION:
+            # Literal and variable operands are read in place rather than
+            # through another call.
+            left = words[expr + 2]
+            kind = words[left]
+            if kind == INT:
+                a = words[left + 1]
+            elif kind == NAME and (self.names.get(words[left + 1]) or self.program.name(words[left + 1])) in self.global_variables:
+                a = self.global_variables[self.names[words[left + 1]]]
+            else:
+                a = self.evaluate_expression(left)
+            right = words[expr + 3]
+            kind = words[right]
+            if kind == INT:
+                b = words[right + 1]
+            elif kind == NAME and (self.names.get(words[right + 1]) or self.program.name(words[right + 1])) in self.global_variables:
+                b = self.global_variables[self.names[words[right + 1]]]
+            else:
+                b = self.evaluate_expression(right)
+            if op == OPERATION and self.max_collection_size is not None:
+                self.check_operation(OPERATOR_NAMES[words[expr + 1]], a, b)
+            return OPERATOR_FUNCTIONS[words[expr + 1]](a, b)
+        elif op == INT:
+            return words[expr + 1]
+        elif op == CONST:
+            return self.program.constant(words[expr + 1])
+        elif op == NEGATE:
+            return -self.evaluate_expression(words[expr + 1])
+        elif op == CALL:
+            site = words[expr + 2]
+            cache = self.caches[site]
+            if cache is None:
+                cache = self.caches[site] = InlineCache()
+            start = expr + 4
+            args = [self.evaluate_expression(arg) for arg in words[start:start + words[expr + 3]]]
+            return self.call_function(self.names.get(words[expr + 1]) or self.program.name(words[expr + 1]), args, cache)
+        elif op == LIST:
+            count = words[expr + 1]
+            if self.max_collection_size is not None and count > self.max_collection_size:
+                self.check_size(range(count))
+            return [self.evaluate_expression(element) for element in words[expr + 2:expr + 2 + count]]
+        elif op == DICTIONARY:
+            count = words[expr + 1]
+            if self.max_collection_size is not None and count > self.max_collection_size:
+                self.check_size(range(count))
+            items = words[expr + 2:expr + 2 + 2 * count]
+            return {self.evaluate_expression(items[i]): self.evaluate_expression(items[i + 1]) for i in range(0, len(items), 2)}
+        raise ValueError(f"Corrupt frozen program: opcode {op} at {expr}")
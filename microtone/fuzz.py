@@ -0,0 +1,461 @@
+import contextlib
+import io
+import random
+import time
+
+# The productions of Microtone.g4 the generator draws from. Each engine lists
+# the ones it implements, and is only given programs built from those.
+FEATURES = frozenset(('print', 'assign', 'arithmetic', 'compare', 'if', 'loop', 'function', 'call', 'comment', 'string'))
+# MicrotoneInterpreter in app.py has no operators, and its function calls
+# bind unevaluated arguments and return nothing.
+APP_FEATURES = frozenset(('print', 'assign', 'if', 'loop', 'comment', 'string'))
+# MicrotonEParser only parses `print` of a single token, which
+# MicrotonEInterpreter prints as-is unless it is a number.
+PIPELINE_FEATURES = frozenset(('print',))
+
+NUMBERS = tuple(f'n{i}' for i in range(6))
+STRINGS = tuple(f's{i}' for i in range(3))
+TEMPORARIES = ('t0', 't1')
+COMPARISONS = ('==', '!=', '<', '>', '<=', '>=')
+WORDS = ('alpha', 'beta', 'gamma', 'delta', 'tone', 'pitch', 'scale', 'chord')
+
+
+class ProgramGenerator:
+    # Writes random programs that always run to completion: variables are
+    # read only where they are certain to be bound, loops count up over
+    # literal ranges, functions call only functions defined before them and
+    # contain no loops, and multiplication always has a literal operand, so
+    # values grow at most exponentially with the iteration count. Strings
+    # and numbers live in separate variables, so the only run-time errors
+    # are division by zero and float overflow, which every engine should
+    # raise alike.
+    def __init__(self, rng, features=FEATURES, max_statements=10, max_depth=3, max_functions=3):
+        self.rng = rng
+        self.features = frozenset(features)
+        self.max_statements = max_statements
+        self.max_depth = max_depth
+        self.max_functions = max_functions
+
+    def generate(self):
+        # Returns (code, features), the features being those the program
+        # actually uses.
+        self.lines = []
+        self.used = set()
+        self.functions = []
+        self.numbers = set()
+        self.strings = set()
+        self.targets = NUMBERS
+        self.in_function = False
+        for _ in range(self.rng.randint(1, self.max_statements)):
+            self.statement(0)
+        return '\n'.join(self.lines) + '\n', frozenset(self.used)
+
+    def emit(self, depth, line):
+        self.lines.append('    ' * depth + line)
+
+    def block(self, depth):
+        for _ in range(self.rng.randint(1, 3)):
+            self.statement(depth)
+
+    def scope(self):
+        return set(self.numbers), set(self.strings)
+
+    def restore(self, scope):
+        self.numbers, self.strings = set(scope[0]), set(scope[1])
+
+    def statement(self, depth):
+        features = self.features
+        choices = ['print']
+        if 'assign' in features:
+            choices += ['assign'] * 3
+        if 'comment' in features:
+            choices.append('comment')
+        if depth < self.max_depth:
+            if 'if' in features:
+                choices.append('if')
+            if 'loop' in features and not self.in_function:
+                choices.append('loop')
+        if 'call' in features and self.functions:
+            choices.append('call')
+        if 'function' in features and depth == 0 and len(self.functions) < self.max_functions:
+            choices.append('function')
+        getattr(self, f'emit_{self.rng.choice(choices)}')(depth)
+
+    def emit_print(self, depth):
+        self.used.add('print')
+        if 'string' in self.features and self.rng.random() < 0.3:
+            self.emit(depth, f'print {self.string_expression()} rest')
+        else:
+            self.emit(depth, f'print {self.number_expression(0)} rest')
+
+    def emit_assign(self, depth):
+        self.used.add('assign')
+        if 'string' in self.features and self.rng.random() < 0.25:
+            name = self.rng.choice(STRINGS)
+            value = self.string_expression()
+            self.strings.add(name)
+        else:
+            name = self.rng.choice(self.targets)
+            value = self.number_expression(0)
+            self.numbers.add(name)
+        self.emit(depth, f'{name} = {value} rest')
+
+    def emit_comment(self, depth):
+        self.used.add('comment')
+        self.emit(depth, 'start ' + ' '.join(self.rng.sample(WORDS, 3)))
+
+    def emit_if(self, depth):
+        self.used.add('if')
+        self.emit(depth, f'if {self.condition()} rest')
+        # Only names bound before the conditional are certain to be bound
+        # after it.
+        outer = self.scope()
+        self.block(depth + 1)
+        if self.in_function and self.rng.random() < 0.3:
+            self.emit(depth + 1, f'return {self.number_expression(0)} rest')
+        self.restore(outer)
+        if self.rng.random() < 0.5:
+            self.emit(depth, 'else rest')
+            self.block(depth + 1)
+            self.restore(outer)
+        self.emit(depth, 'end rest')
+
+    def emit_loop(self, depth):
+        self.used.add('loop')
+        name = f'i{depth}'
+        start = self.rng.randint(0, 3)
+        self.emit(depth, f'for each {name} in {start} to {start + self.rng.randint(0, 4)} rest')
+        # The body runs at least once, so what it binds stays bound.
+        self.numbers.add(name)
+        self.block(depth + 1)
+        self.emit(depth, 'end rest')
+
+    def emit_function(self, depth):
+        self.used.add('function')
+        name = f'f{len(self.functions)}'
+        params = [f'p{i}' for i in range(self.rng.randint(0, 2))]
+        self.emit(depth, f'define function {name}({", ".join(params)}) rest')
+        # The body sees its parameters and the globals bound before the
+        # definition, and assigns only to parameters and temporaries, which
+        # the rest of the program never reads.
+        outer = self.scope()
+        self.numbers |= set(params)
+        self.targets = tuple(params) + TEMPORARIES
+        self.in_function = True
+        for _ in range(self.rng.randint(0, 3)):
+            self.statement(depth + 1)
+        self.emit(depth + 1, f'return {self.number_expression(0)} rest')
+        self.in_function = False
+        self.targets = NUMBERS
+        self.restore(outer)
+        self.emit(depth, 'end rest')
+        self.functions.append((name, len(params)))
+
+    def emit_call(self, depth):
+        self.emit(depth, f'{self.call(1)} rest')
+
+    def call(self, depth):
+        self.used.add('call')
+        name, arity = self.rng.choice(self.functions)
+        args = ', '.join(self.number_expression(depth + 1) for _ in range(arity))
+        return f'{name}({args})'
+
+    def number_expression(self, depth):
+        rng = self.rng
+        if 'arithmetic' in self.features and depth < 2 and rng.random() < 0.5:
+            self.used.add('arithmetic')
+            operator = rng.choice('+-*/')
+            left = self.number_expression(depth + 1)
+            if operator == '*':
+                right = str(rng.randint(0, 5))
+            elif operator == '/' and self.numbers and rng.random() < 0.2:
+                right = rng.choice(sorted(self.numbers))
+            elif operator == '/':
+                right = str(rng.randint(1, 9))
+            else:
+                right = self.number_expression(depth + 1)
+            if operator in '+*' and rng.random() < 0.5:
+                left, right = right, left
+            expression = f'{left} {operator} {right}'
+            return f'({expression})' if depth else expression
+        return self.number_atom(depth)
+
+    def number_atom(self, depth):
+        rng = self.rng
+        choices = ['literal']
+        if self.numbers:
+            choices += ['name'] * 2
+        if 'call' in self.features and self.functions and depth < 2:
+            choices.append('call')
+        choice = rng.choice(choices)
+        if choice == 'name':
+            name = rng.choice(sorted(self.numbers))
+            if 'arithmetic' in self.features and rng.random() < 0.2:
+                self.used.add('arithmetic')
+                return f'-{name}'
+            return name
+        if choice == 'call':
+            return self.call(depth)
+        if 'arithmetic' in self.features and rng.random() < 0.2:
+            self.used.add('arithmetic')
+            return str(-rng.randint(1, 9))
+        return str(rng.randint(0, 20))
+
+    def string_expression(self):
+        rng = self.rng
+        self.used.add('string')
+        literal = f'"{rng.choice(WORDS)}"'
+        if not self.strings:
+            return literal
+        name = rng.choice(sorted(self.strings))
+        if 'arithmetic' in self.features and rng.random() < 0.4:
+            # One variable operand at most, so strings grow linearly in loops.
+            self.used.add('arithmetic')
+            return f'{name} + {literal}' if rng.random() < 0.5 else f'{literal} + {name}'
+        return name if rng.random() < 0.7 else literal
+
+    def condition(self):
+        rng = self.rng
+        if 'compare' in self.features and rng.random() < 0.8:
+            self.used.add('compare')
+            if 'string' in self.features and self.strings and rng.random() < 0.2:
+                return f'{self.string_expression()} {rng.choice(COMPARISONS[:2])} {self.string_expression()}'
+            return f'{self.number_expression(1)} {rng.choice(COMPARISONS)} {self.number_expression(1)}'
+        return self.number_atom(1)
+
+
+def generate(seed, index, features=FEATURES, **options):
+    # Program `index` of the run seeded with `seed`; each program has its own
+    # generator, so any one can be regenerated on its own.
+    return ProgramGenerator(random.Random(f'{seed}:{index}'), features, **options).generate()
+
+
+def _interpreter(jit_threshold=None, infer_types=False):
+    from .grammar import Interpreter
+    from .output import OutputSink
+    interpreter = Interpreter(output=OutputSink(), jit_threshold=jit_threshold)
+    interpreter.infer_types = infer_types
+    return interpreter
+
+
+def run_tree(code):
+    # The plain tree-walker, every other engine's reference.
+    interpreter = _interpreter()
+    interpreter.run(code)
+    return interpreter.global_variables
+
+
+def run_inferred(code):
+    interpreter = _interpreter(infer_types=True)
+    interpreter.run(code)
+    return interpreter.global_variables
+
+
+def run_jit(code):
+    # Compiles every function on its first call.
+    interpreter = _interpreter(jit_threshold=1, infer_types=True)
+    interpreter.run(code)
+    return interpreter.global_variables
+
+
+def run_default(code):
+    # The interpreter as the command line configures it.
+    from .grammar import JIT_THRESHOLD
+    interpreter = _interpreter(jit_threshold=JIT_THRESHOLD, infer_types=True)
+    interpreter.eliminate_dead_functions = True
+    interpreter.run(code)
+    return interpreter.global_variables
+
+
+_loop = None
+
+
+def run_async(code):
+    global _loop
+    import asyncio
+    if _loop is None:
+        _loop = asyncio.new_event_loop()
+    interpreter = _interpreter(infer_types=True)
+    _loop.run_until_complete(interpreter.run_async(code))
+    return interpreter.global_variables
+
+
+def run_frozen(code):
+    from .frozen import FrozenInterpreter, freeze_program
+    from .output import OutputSink
+    interpreter = FrozenInterpreter(freeze_program(code), output=OutputSink())
+    interpreter.run()
+    return interpreter.global_variables
+
+
+def run_journal(code):
+    # Records the run and returns the variables as the journal replays them,
+    # rather than as the interpreter left them.
+    import os
+    import tempfile
+    from .journal import Replayer
+    fd, path = tempfile.mkstemp(suffix='.mtj')
+    os.close(fd)
+    try:
+        interpreter = _interpreter()
+        journal = interpreter.record(path)
+        try:
+            interpreter.run(code)
+        finally:
+            journal.close()
+        replayer = Replayer(path)
+        return replayer.seek(replayer.end + 1)
+    finally:
+        os.remove(path)
+
+
+def run_app(code):
+    from .app import MicrotoneInterpreter
+    interpreter = MicrotoneInterpreter()
+    interpreter.run(code)
+    return interpreter.global_variables
+
+
+def run_pipeline(code):
+    # The lexer, MicrotonEParser and MicrotonEInterpreter. Its variables hold
+    # function definitions rather than values, so only output is compared.
+    from .executor import MicrotonEExecutor
+    from .interpreter import MicrotonEInterpreter
+    MicrotonEExecutor(MicrotonEInterpreter()).execute_code(code)
+    return None
+
+
+# name: (features, run). run(code) runs a program, printing to stdout, and
+# returns its final variables, or None if they are not comparable.
+ENGINES = {
+    'tree': (FEATURES, run_tree),
+    'inferred': (FEATURES, run_inferred),
+    'jit': (FEATURES, run_jit),
+    'default': (FEATURES, run_default),
+    'async': (FEATURES, run_async),
+    'frozen': (FEATURES, run_frozen),
+    'journal': (FEATURES, run_journal),
+    'app': (APP_FEATURES, run_app),
+    'pipeline': (PIPELINE_FEATURES, run_pipeline),
+}
+BASELINE = 'tree'
+
+
+def run_engine(run, code):
+    # Returns the outcome of one run, its output, final variables and the
+    # name of the error that stopped it, with the seconds it took.
+    stdout = io.StringIO()
+    variables = error = None
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(stdout):
+        try:
+            variables = run(code)
+        except Exception as e:
+            error = type(e).__name__
+    seconds = time.perf_counter() - start
+    if variables is not None:
+        # repr() so that NaN compares equal to itself.
+        variables = {name: repr(value) for name, value in sorted(variables.items())}
+    return {'output': stdout.getvalue(), 'variables': variables, 'error': error}, seconds
+
+
+def differences(expected, actual):
+    keys = ['output', 'error']
+    if expected['variables'] is not None and actual['variables'] is not None:
+        keys.append('variables')
+    return [key for key in keys if expected[key] != actual[key]]
+
+
+def fuzz(programs=100, seed=0, engines=None, **options):
+    # Runs `programs` generated programs on the baseline and on every engine
+    # in `engines` (default all) that implements the features each uses.
+    # Programs are generated in turn for each distinct feature set among the
+    # engines, so engines with narrow grammars still see a share of them.
+    # Timings include each engine's own parsing and compilation, and are
+    # also given relative to the baseline over the same programs.
+    names = [BASELINE] + [name for name in engines or ENGINES if name != BASELINE]
+    for name in names:
+        if name not in ENGINES:
+            raise ValueError(f"Unknown engine: {name}")
+    tiers = sorted({ENGINES[name][0] for name in names}, key=lambda features: (-len(features), sorted(features)))
+    stats = {name: {'programs': 0, 'mismatches': 0, 'seconds': 0.0, 'baseline_seconds': 0.0} for name in names}
+    mismatches = []
+    for index in range(programs):
+        code, used = generate(seed, index, tiers[index % len(tiers)], **options)
+        expected, baseline_seconds = run_engine(ENGINES[BASELINE][1], code)
+        for name in names:
+            features, run = ENGINES[name]
+            if not used <= features:
+                continue
+            if name == BASELINE:
+                actual, seconds = expected, baseline_seconds
+            else:
+                actual, seconds = run_engine(run, code)
+            entry = stats[name]
+            entry['programs'] += 1
+            entry['seconds'] += seconds
+            entry['baseline_seconds'] += baseline_seconds
+            differing = differences(expected, actual)
+            if differing:
+                entry['mismatches'] += 1
+                mismatches.append({
+                    'seed': seed,
+                    'index': index,
+                    'engine': name,
+                    'differences': differing,
+                    'code': code,
+                    'expected': expected,
+                    'actual': actual,
+                })
+    for entry in stats.values():
+        baseline_seconds = entry.pop('baseline_seconds')
+        entry['relative'] = entry['seconds'] / baseline_seconds if baseline_seconds else None
+    return {'seed': seed, 'programs': programs, 'engines': stats, 'mismatches': mismatches}
+
+
+def main(argv=None):
+    import argparse
+    import json
+    import sys
+
+    parser = argparse.ArgumentParser(prog='microtone.fuzz', description='Run random MicrotonE programs on every engine and compare the results.')
+    parser.add_argument('--programs', type=int, default=200, help='programs to generate (default: 200)')
+    parser.add_argument('--seed', type=int, default=0, help='seed for the generator (default: 0)')
+    parser.add_argument('--engines', help=f'comma-separated engines to compare with {BASELINE} (default: {",".join(ENGINES)})')
+    parser.add_argument('--max-statements', type=int, default=10, help='most top-level statements per program')
+    parser.add_argument('--max-depth', type=int, default=3, help='deepest nesting of blocks')
+    parser.add_argument('--max-relative', action='append', default=[], metavar='ENGINE=RATIO',
+                        help='fail if ENGINE takes more than RATIO times the time of the baseline')
+    parser.add_argument('--show', type=int, default=5, help='mismatching programs to print (default: 5)')
+    args = parser.parse_args(argv)
+
+    engines = args.engines.split(',') if args.engines else None
+    bounds = {}
+    for bound in args.max_relative:
+        name, _, ratio = bound.partition('=')
+        try:
+            bounds[name] = float(ratio)
+        except ValueError:
+            parser.error(f'invalid --max-relative {bound!r}')
+    try:
+        results = fuzz(args.programs, args.seed, engines, max_statements=args.max_statements, max_depth=args.max_depth)
+    except ValueError as e:
+        parser.error(str(e))
+    for mismatch in results['mismatches'][:args.show]:
+        print(f"Program {mismatch['index']} (seed {mismatch['seed']}) differs on {mismatch['engine']} in {', '.join(mismatch['differences'])}:", file=sys.stderr)
+        print(mismatch['code'], file=sys.stderr)
+        for key in mismatch['differences']:
+            print(f"  {BASELINE}: {mismatch['expected'][key]!r}", file=sys.stderr)
+            print(f"  {mismatch['engine']}: {mismatch['actual'][key]!r}", file=sys.stderr)
+    slow = sorted(name for name, ratio in bounds.items()
+                  if name in results['engines'] and (results['engines'][name]['relative'] or 0) > ratio)
+    results['slow'] = slow
+    results['mismatches'] = results['mismatches'][:args.show]
+    print(json.dumps(results, indent=2))
+    mismatched = any(entry['mismatches'] for entry in results['engines'].values())
+    return 1 if mismatched or slow else 0
+
+
+if __name__ == '__main__':
+    import sys
+    sys.exit(main())
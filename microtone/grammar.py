@@ -0,0 +1,978 @@
+import itertools
+import operator
+import re
+import time
+
+from .limits import CallDepthExceeded, CollectionSizeExceeded, Limits
+from .output import PrintSink
+
+OPERATORS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+    '==': operator.eq,
+    '!=': operator.ne,
+    '>': operator.gt,
+    '<': operator.lt,
+    '>=': operator.ge,
+    '<=': operator.le,
+}
+
+
+def read_file(path):
+    with open(path) as f:
+        return f.read()
+
+
+def write_file(path, text):
+    with open(path, 'w') as f:
+        return f.write(str(text))
+
+
+class BreakException(Exception):
+    pass
+
+class ContinueException(Exception):
+    pass
+
+SIZED_TYPES = (list, dict, str)
+
+
+def operation_size(operator, a, b):
+    # The length of the string or list `a operator b` would build, worked
+    # out without building it, or None if it builds neither. Only `+` and
+    # `*` can make one; they raise TypeError on dictionaries.
+    kind = type(a)
+    if operator == '+':
+        if kind is type(b) and (kind is str or kind is list):
+            return len(a) + len(b)
+    elif operator == '*':
+        if kind is str or kind is list:
+            sequence, count = a, b
+        else:
+            sequence, count = b, a
+        if (type(sequence) is str or type(sequence) is list) and isinstance(count, int):
+            return len(sequence) * max(count, 0)
+    return None
+
+# Interpreter versions are drawn from one process-wide counter, so a call-site
+# cache filled by one interpreter is never valid for another that shares the
+# same parsed program.
+_versions = itertools.count(1)
+# Calls after which a function is translated to Python and compiled.
+JIT_THRESHOLD = 20
+LITERALS = ('number', 'string')
+# Folded string constants longer than this are left to be built at run time.
+FOLD_LIMIT = 256
+# A line assigns when it starts `name = `; a bare `=` elsewhere is part of a
+# comparison such as `if n == 0 rest`.
+ASSIGNMENT = re.compile(r"\w+ = ")
+
+
+class InlineCache:
+    # The resolved target of one call site, as a (version, function, builtin,
+    # native) entry that holds while the interpreter's version is unchanged.
+    __slots__ = ('entry',)
+
+    def __init__(self):
+        self.entry = None
+
+    def __reduce__(self):
+        return (InlineCache, ())
+
+
+class Interpreter:
+    def __init__(self, limits=None, output=None, search_path=None, jit_threshold=JIT_THRESHOLD):
+        self.global_variables = {}
+        self.version = next(_versions)
+        self.jit_threshold = jit_threshold
+        self.infer_types = True
+        # Dropping uncalled functions at parse time is only safe when each
+        # parse_program() call is given a whole program, so it is opt-in.
+        self.eliminate_dead_functions = False
+        self.eliminated_functions = []
+        self.call_counts = {}
+        self.compiled = {}
+        # Function bodies with the type annotations inferred for the program
+        # last parsed. They are kept apart from the functions themselves,
+        # which stay as written, so each program is inferred afresh and a
+        # later program cannot run on types proven for an earlier one.
+        self.annotations = {}
+        self.functions = {}
+        self.search_path = search_path
+        self.imports = []
+        # The constant pool: literals are interned as shared nodes. Names bound
+        # with `constant` can never be rebound, and those bound to a literal
+        # map to the node holding their folded value.
+        self.literals = {}
+        self.constants = set()
+        self.constant_nodes = {}
+        self.output = output if output is not None else PrintSink()
+        self.builtins = {
+            'print': self.write_output,
+            'sleep': time.sleep,
+            'read_file': read_file,
+            'write_file': write_file,
+        }
+        self.async_builtins = {}
+        self.library = None
+        self.returning = False
+        self.yield_every = 1000
+        self.budget = self.yield_every
+        self.limits = limits or Limits()
+        self.call_depth = 0
+        self.journal = None
+        self.metrics = None
+        self.reset_limits()
+
+    @property
+    def functions(self):
+        return self._functions
+
+    @functions.setter
+    def functions(self, functions):
+        self._functions = functions
+        self.annotations = {}
+        self.deoptimize()
+
+    def program_functions(self):
+        # The functions as the program last parsed runs them, annotations
+        # included, for handing a whole compiled program to another
+        # interpreter.
+        return {**self._functions, **self.annotations}
+
+    def deoptimize(self, *names):
+        # Drops compiled code so calls go back through the interpreter and
+        # start counting again: for every function when no names are given,
+        # otherwise for the named functions and any compiled on the
+        # assumption that those names were builtins.
+        if not names:
+            self.call_counts.clear()
+            self.compiled.clear()
+        for name in names:
+            self.call_counts.pop(name, None)
+            for func_name, (_, _, assumptions) in list(self.compiled.items()):
+                if func_name == name or name in assumptions:
+                    del self.compiled[func_name]
+        self.invalidate()
+
+    def invalidate(self):
+        # Called whenever a name could resolve to a different function.
+        self.version = next(_versions)
+
+    def reset_limits(self):
+        self.instruction_count = 0
+        self.function_calls = 0
+        self.cache_misses = 0
+        self.peak_call_depth = 0
+        self.checkpoint = self.limits.first_checkpoint()
+        self.deadline = self.limits.deadline()
+        self.max_call_depth = self.limits.max_call_depth
+        self.max_collection_size = self.limits.max_collection_size
+        if self.journal is not None:
+            self.checkpoint = min(self.checkpoint, self.journal.restart(self.global_variables))
+        if self.compiled and not self.can_compile():
+            self.deoptimize()
+
+    def check_limits(self):
+        checkpoint = self.limits.check(self.instruction_count, self.deadline)
+        if self.journal is not None:
+            checkpoint = min(checkpoint, self.journal.checkpoint(self.instruction_count, self.global_variables))
+        return checkpoint
+
+    def can_compile(self):
+        # Compiled functions skip the per-statement instruction count and
+        # collection size checks, and write variables without journaling
+        # them, so limited and recorded runs stay interpreted.
+        return (
+            self.limits.max_instructions is None and self.limits.timeout is None and self.max_collection_size is None
+            and self.journal is None
+        )
+
+    def record(self, path, interval=None):
+        # Starts journaling variable writes and control decisions to `path`
+        # for time-travel debugging; read it back with journal.Replayer.
+        # Returns the journal, which stops the recording when closed.
+        from . import journal
+        if self.journal is not None:
+            self.journal.close()
+        self.journal = journal.Journal(self, path, interval or journal.CHECKPOINT_INTERVAL)
+        self.checkpoint = min(self.checkpoint, self.journal.checkpoint(self.instruction_count, self.global_variables))
+        if self.compiled:
+            self.deoptimize()
+        return self.journal
+
+    def write_output(self, *values):
+        self.output.write(*values)
+
+    def check_size(self, value):
+        if len(value) > self.max_collection_size:
+            raise CollectionSizeExceeded(f"Collection of {len(value)} items exceeds the limit of {self.max_collection_size}")
+
+    def check_operation(self, operator, a, b):
+        # Checked before the operation runs, so an oversized string or list
+        # is refused rather than built and then found too big.
+        size = operation_size(operator, a, b)
+        if size is not None and size > self.max_collection_size:
+            raise CollectionSizeExceeded(f"Collection of {size} items exceeds the limit of {self.max_collection_size}")
+
+    def check_allocation(self, func_name, args):
+        # Builtins that build arrays are checked from their arguments, before
+        # they allocate; checking their result would be too late for memory.
+        from .stdlib import allocation_size
+        size = allocation_size(func_name, args)
+        if size is not None and size > self.max_collection_size:
+            raise CollectionSizeExceeded(f"{func_name} would build {size} items, exceeding the limit of {self.max_collection_size}")
+
+    def check_result(self, value):
+        # Builtin results may also be NumPy arrays or quantum registers.
+        if type(value) in SIZED_TYPES:
+            self.check_size(value)
+            return
+        from .stdlib import collection_size
+        size = collection_size(value)
+        if size is not None and size > self.max_collection_size:
+            raise CollectionSizeExceeded(f"Collection of {size} items exceeds the limit of {self.max_collection_size}")
+        return value
+
+    def parse_program(self, code):
+        metrics = self.metrics
+        if metrics is not None:
+            start = metrics.now()
+        lines = code.split("\n")
+        statements = []
+        while lines:
+            line = lines.pop(0).strip()
+            if line:
+                statements.append(self.parse_statement(line, lines))
+        if metrics is not None:
+            start = metrics.span('parse', start)
+        if self.eliminate_dead_functions:
+            statements = self.eliminate_functions(statements)
+        if self.infer_types:
+            statements = self.annotate_types(statements)
+        elif self.annotations:
+            self.deoptimize(*self.annotations)
+            self.annotations = {}
+        if metrics is not None:
+            metrics.span('optimize', start)
+            from .metrics import count_nodes
+            metrics.count('nodes', count_nodes(statements) + count_nodes(list(self._functions.values())))
+        return statements
+
+    def eliminate_functions(self, statements):
+        # Functions from imported modules may call back into the program.
+        self.eliminated_functions = []
+        if self.imports:
+            return statements
+        from . import reachability
+        statements, _, eliminated = reachability.eliminate_dead_functions(statements, self._functions)
+        for name in eliminated:
+            del self._functions[name]
+        if eliminated:
+            self.deoptimize(*eliminated)
+        self.eliminated_functions = eliminated
+        return statements
+
+    def annotate_types(self, statements):
+        from . import inference
+        previous = self.annotations
+        statements, self.annotations = inference.annotate_program(self, statements)
+        changed = [name for name in set(previous) | set(self.annotations) if previous.get(name) is not self.annotations.get(name)]
+        if changed:
+            self.deoptimize(*changed)
+        return statements
+
+    def parse_statement(self, line, lines):
+        if line.startswith("define function"):
+            return self.parse_function_definition(line, lines)
+        elif line.startswith("import "):
+            return self.parse_import(line)
+        elif line.startswith("constant "):
+            return self.parse_constant(line)
+        elif line.startswith("#HASH:"):
+            return ('hashword', line[len("#HASH:"):].strip())
+        elif ASSIGNMENT.match(line):
+            return self.parse_assignment(line)
+        elif line.startswith("if"):
+            return self.parse_conditional(line, lines)
+        elif line.startswith("for each"):
+            return self.parse_loop(line, lines)
+        elif line.startswith("while"):
+            return self.parse_while_loop(line, lines)
+        elif line.startswith("print"):
+            return self.parse_print(line)
+        elif line.startswith("start"):
+            return self.parse_comment(line)
+        elif line.startswith("return"):
+            return self.parse_return(line)
+        elif line.startswith("try"):
+            return self.parse_try_except(line, lines)
+        elif line.startswith("lambda"):
+            return self.parse_lambda(line)
+        elif line.startswith("break rest"):
+            return ('break',)
+        elif line.startswith("continue rest"):
+            return ('continue',)
+        elif line.endswith(" rest"):
+            return self.parse_expression(line[:-len(" rest")])
+        else:
+            return self.parse_expression(line)
+
+    def parse_function_definition(self, line, lines):
+        match = re.match(r"define function (\w+)\((.*?)\) rest", line)
+        if not match:
+            raise SyntaxError(f"Invalid function definition: {line}")
+        func_name, params = match.groups()
+        params = [param.strip() for param in params.split(",")] if params else []
+        for param in params:
+            self.check_not_constant(param)
+        statements = []
+        while lines:
+            line = lines.pop(0).strip()
+            if line == "end rest":
+                break
+            statements.append(self.parse_statement(line, lines))
+        self.functions[func_name] = (params, statements)
+        self.deoptimize(func_name)
+        return ('function', func_name, params, statements)
+
+    def parse_import(self, line):
+        match = re.match(r"import ([\w.]+) rest", line)
+        if not match:
+            raise SyntaxError(f"Invalid import: {line}")
+        return ('import', match.groups()[0])
+
+    def parse_assignment(self, line):
+        match = re.match(r"(\w+) = (.*) rest", line)
+        if not match:
+            raise SyntaxError(f"Invalid assignment: {line}")
+        var, expr = match.groups()
+        self.check_not_constant(var)
+        return ('assignment', var, self.parse_expression(expr))
+
+    def parse_constant(self, line):
+        match = re.match(r"constant (\w+) = (.*) rest", line)
+        if not match:
+            raise SyntaxError(f"Invalid constant: {line}")
+        name, expr = match.groups()
+        self.check_not_constant(name)
+        expr = self.parse_expression(expr)
+        self.constants.add(name)
+        if expr[0] in LITERALS:
+            # Later references load the folded value straight from the node.
+            self.constant_nodes[name] = expr
+        return ('constant', name, expr)
+
+    def check_not_constant(self, name):
+        if name in self.constants:
+            raise SyntaxError(f"Cannot rebind constant {name}")
+
+    def literal(self, value):
+        kind = 'string' if type(value) is str else 'number'
+        # repr() keeps 0.0 and -0.0 apart and lets NaN find itself.
+        key = (kind, type(value), repr(value) if type(value) is float else value)
+        node = self.literals.get(key)
+        if node is None:
+            node = self.literals[key] = (kind, value)
+        return node
+
+    def fold(self, node):
+        _, left, operator, right = node
+        a, b = left[1], right[1]
+        limit = FOLD_LIMIT
+        if self.limits.max_collection_size is not None:
+            limit = min(limit, self.limits.max_collection_size)
+        if operator == '*' and (type(a) is str or type(b) is str):
+            count = b if type(a) is str else a
+            if type(count) is not int or count < 0:
+                return node
+        # Strings are sized before they are built, so a huge or over-limit
+        # result costs nothing until it actually runs.
+        size = operation_size(operator, a, b)
+        if size is not None and size > limit:
+            return node
+        try:
+            value = OPERATORS[operator](a, b)
+        except (ArithmeticError, TypeError):
+            return node
+        return self.literal(value)
+
+    def parse_conditional(self, line, lines):
+        match = re.match(r"if (.*) rest", line)
+        if not match:
+            raise SyntaxError(f"Invalid conditional: {line}")
+        expr = match.groups()[0]
+        true_statements = []
+        false_statements = []
+        current_statements = true_statements
+        while lines:
+            line = lines.pop(0).strip()
+            if line == "end rest":
+                break
+            elif line == "else rest":
+                current_statements = false_statements
+            else:
+                current_statements.append(self.parse_statement(line, lines))
+        return ('if', self.parse_expression(expr), true_statements, false_statements)
+
+    def parse_loop(self, line, lines):
+        match = re.match(r"for each (\w+) in (\d+) to (\d+) rest", line)
+        if not match:
+            raise SyntaxError(f"Invalid loop: {line}")
+        var, start, end = match.groups()
+        self.check_not_constant(var)
+        statements = []
+        while lines:
+            line = lines.pop(0).strip()
+            if line == "end rest":
+                break
+            statements.append(self.parse_statement(line, lines))
+        return ('loop', var, int(start), int(end), statements)
+
+    def parse_while_loop(self, line, lines):
+        match = re.match(r"while (.*) rest", line)
+        if not match:
+            raise SyntaxError(f"Invalid while loop: {line}")
+        condition = match.groups()[0]
+        statements = []
+        while lines:
+            line = lines.pop(0).strip()
+            if line == "end rest":
+                break
+            statements.append(self.parse_statement(line, lines))
+        return ('while', self.parse_expression(condition), statements)
+
+    def parse_print(self, line):
+        match = re.match(r"print (.*) rest", line)
+        if not match:
+            raise SyntaxError(f"Invalid print statement: {line}")
+        expr = match.groups()[0]
+        return ('print', self.parse_expression(expr))
+
+    def parse_comment(self, line):
+        match = re.match(r"start (.*)", line)
+        if not match:
+            raise SyntaxError(f"Invalid comment: {line}")
+        text = match.groups()[0]
+        return ('comment', text)
+
+    def parse_return(self, line):
+        match = re.match(r"return (.*) rest", line)
+        if not match:
+            raise SyntaxError(f"Invalid return statement: {line}")
+        expr = match.groups()[0]
+        return ('return', self.parse_expression(expr))
+
+    def parse_try_except(self, line, lines):
+        match = re.match(r"try rest", line)
+        if not match:
+            raise SyntaxError(f"Invalid try block: {line}")
+        try_statements = []
+        while lines:
+            line = lines.pop(0).strip()
+            if line == "except rest":
+                break
+            try_statements.append(self.parse_statement(line, lines))
+        except_statements = []
+        while lines:
+            line = lines.pop(0).strip()
+            if line == "end rest":
+                break
+            except_statements.append(self.parse_statement(line, lines))
+        return ('try', try_statements, except_statements)
+
+    def parse_lambda(self, line):
+        match = re.match(r"lambda (\w*) \(?(.*)\)? rest", line)
+        if not match:
+            raise SyntaxError(f"Invalid lambda function: {line}")
+        default_params, params = match.groups()
+        params = [param.strip() for param in params.split(",")] if params else []
+        return ('lambda', default_params, params)
+
+    def parse_expression(self, expr):
+        from .expressions import parse_expression
+        return parse_expression(self, expr)
+
+    def run(self, code):
+        statements = self.parse_program(code)
+        self.reset_limits()
+        if self.metrics is not None:
+            start = self.metrics.now()
+        try:
+            return self.execute(statements)
+        finally:
+            self.close_registers()
+            self.output.flush()
+            if self.metrics is not None:
+                self.metrics.span('execute', start)
+                self.metrics.record_run(self)
+
+    def close_registers(self):
+        # Quantum registers may hold worker threads and a memory-mapped file,
+        # which are released when the run that made them ends.
+        if self.library is not None:
+            self.library.close_registers()
+
+    async def run_async(self, code, timeout=None, yield_every=None):
+        from . import aio
+        if yield_every is not None:
+            self.yield_every = yield_every
+        self.budget = self.yield_every
+        self.async_builtins = {**aio.BUILTINS, **self.async_builtins}
+        statements = self.parse_program(code)
+        self.reset_limits()
+        if self.metrics is not None:
+            start = self.metrics.now()
+        try:
+            if timeout is None:
+                return await self.execute_async(statements)
+            return await aio.wait_for(self.execute_async(statements), timeout)
+        finally:
+            self.close_registers()
+            self.output.flush()
+            if self.metrics is not None:
+                self.metrics.span('execute', start)
+                self.metrics.record_run(self)
+
+    def execute(self, statements):
+        self.returning = False
+        i = 0
+        while i < len(statements):
+            statement = statements[i]
+            self.instruction_count += 1
+            if self.instruction_count > self.checkpoint:
+                self.checkpoint = self.check_limits()
+            if statement[0] == 'assignment':
+                var, expr = statement[1:]
+                self.set_variable(var, self.evaluate_expression(expr))
+            elif statement[0] == 'constant':
+                # Also bound as a global for code parsed before the definition.
+                value = self.global_variables[statement[1]] = self.evaluate_expression(statement[2])
+                if self.journal is not None:
+                    self.journal.append((self.instruction_count, statement[1], value))
+            elif statement[0] == 'print':
+                self.output.write(self.evaluate_expression(statement[1]))
+            elif statement[0] == 'if':
+                condition, true_statements, false_statements = statement[1:]
+                taken = self.evaluate_expression(condition)
+                if self.journal is not None:
+                    self.journal.decision(self.instruction_count, 'if', taken)
+                if taken:
+                    result = self.execute(true_statements)
+                else:
+                    result = self.execute(false_statements)
+                if self.returning:
+                    return result
+            elif statement[0] == 'loop':
+                var, start, end, loop_statements = statement[1:]
+                for value in range(start, end + 1):
+                    self.set_variable(var, value)
+                    try:
+                        result = self.execute(loop_statements)
+                    except BreakException:
+                        break
+                    except ContinueException:
+                        continue
+                    if self.returning:
+                        return result
+            elif statement[0] == 'while':
+                condition, while_statements = statement[1:]
+                while self.evaluate_expression(condition):
+                    if self.journal is not None:
+                        self.journal.decision(self.instruction_count, 'while', True)
+                    self.instruction_count += 1
+                    if self.instruction_count > self.checkpoint:
+                        self.checkpoint = self.check_limits()
+                    try:
+                        result = self.execute(while_statements)
+                    except BreakException:
+                        break
+                    except ContinueException:
+                        continue
+                    if self.returning:
+                        return result
+                else:
+                    if self.journal is not None:
+                        self.journal.decision(self.instruction_count, 'while', False)
+            elif statement[0] == 'comment':
+                pass
+            elif statement[0] == 'function':
+                pass  # Functions are registered but not executed here
+            elif statement[0] == 'import':
+                self.import_module(statement[1])
+            elif statement[0] == 'hashword':
+                pass
+            elif statement[0] == 'return':
+                value = self.evaluate_expression(statement[1])
+                self.returning = True
+                return value
+            elif statement[0] == 'try':
+                try_statements, except_statements = statement[1:]
+                try:
+                    result = self.execute(try_statements)
+                except Exception:
+                    if self.journal is not None:
+                        self.journal.decision(self.instruction_count, 'except', True)
+                    result = self.execute(except_statements)
+                if self.returning:
+                    return result
+            elif statement[0] == 'lambda':
+                _, default_params, params = statement
+                return lambda *args: self.execute_lambda(params, args)
+            elif statement[0] == 'call':
+                self.call_function(statement[1], [self.evaluate_expression(arg) for arg in statement[2]], statement[3])
+            elif statement[0] == 'break':
+                raise BreakException()
+            elif statement[0] == 'continue':
+                raise ContinueException()
+            i += 1
+
+    async def execute_async(self, statements):
+        # Mirrors execute(), but spends one unit of the instruction budget per
+        # block and per statement and hands control back to the event loop
+        # whenever the budget runs out.
+        self.returning = False
+        self.budget -= 1
+        if self.budget <= 0:
+            await self.yield_to_loop()
+        i = 0
+        while i < len(statements):
+            self.budget -= 1
+            if self.budget <= 0:
+                await self.yield_to_loop()
+            statement = statements[i]
+            self.instruction_count += 1
+            if self.instruction_count > self.checkpoint:
+                self.checkpoint = self.check_limits()
+            if statement[0] == 'assignment':
+                var, expr = statement[1:]
+                self.set_variable(var, await self.evaluate_expression_async(expr))
+            elif statement[0] == 'constant':
+                value = self.global_variables[statement[1]] = await self.evaluate_expression_async(statement[2])
+                if self.journal is not None:
+                    self.journal.append((self.instruction_count, statement[1], value))
+            elif statement[0] == 'print':
+                self.output.write(await self.evaluate_expression_async(statement[1]))
+            elif statement[0] == 'if':
+                condition, true_statements, false_statements = statement[1:]
+                taken = await self.evaluate_expression_async(condition)
+                if self.journal is not None:
+                    self.journal.decision(self.instruction_count, 'if', taken)
+                if taken:
+                    result = await self.execute_async(true_statements)
+                else:
+                    result = await self.execute_async(false_statements)
+                if self.returning:
+                    return result
+            elif statement[0] == 'loop':
+                var, start, end, loop_statements = statement[1:]
+                for value in range(start, end + 1):
+                    self.set_variable(var, value)
+                    try:
+                        result = await self.execute_async(loop_statements)
+                    except BreakException:
+                        break
+                    except ContinueException:
+                        continue
+                    if self.returning:
+                        return result
+            elif statement[0] == 'while':
+                condition, while_statements = statement[1:]
+                while await self.evaluate_expression_async(condition):
+                    if self.journal is not None:
+                        self.journal.decision(self.instruction_count, 'while', True)
+                    self.instruction_count += 1
+                    if self.instruction_count > self.checkpoint:
+                        self.checkpoint = self.check_limits()
+                    try:
+                        result = await self.execute_async(while_statements)
+                    except BreakException:
+                        break
+                    except ContinueException:
+                        continue
+                    if self.returning:
+                        return result
+                else:
+                    if self.journal is not None:
+                        self.journal.decision(self.instruction_count, 'while', False)
+            elif statement[0] == 'comment':
+                pass
+            elif statement[0] == 'function':
+                pass  # Functions are registered but not executed here
+            elif statement[0] == 'import':
+                self.import_module(statement[1])
+            elif statement[0] == 'hashword':
+                pass
+            elif statement[0] == 'return':
+                value = await self.evaluate_expression_async(statement[1])
+                self.returning = True
+                return value
+            elif statement[0] == 'try':
+                try_statements, except_statements = statement[1:]
+                try:
+                    result = await self.execute_async(try_statements)
+                except Exception:
+                    if self.journal is not None:
+                        self.journal.decision(self.instruction_count, 'except', True)
+                    result = await self.execute_async(except_statements)
+                if self.returning:
+                    return result
+            elif statement[0] == 'lambda':
+                _, default_params, params = statement
+                return lambda *args: self.execute_lambda(params, args)
+            elif statement[0] == 'call':
+                await self.call_function_async(statement[1], [await self.evaluate_expression_async(arg) for arg in statement[2]])
+            elif statement[0] == 'break':
+                raise BreakException()
+            elif statement[0] == 'continue':
+                raise ContinueException()
+            i += 1
+
+    async def yield_to_loop(self):
+        from . import aio
+        self.budget = self.yield_every
+        await aio.yield_to_loop()
+
+    def execute_lambda(self, params, args):
+        local_variables = dict(zip(params, args))
+        local_variables.update(self.global_variables)
+        self.global_variables = local_variables
+        return self.evaluate_expression(params)
+
+    def evaluate_expression(self, expr):
+        if expr[0] == 'numeric':
+            # Operands proven numeric by type inference: the operator is
+            # already resolved, the result cannot be a sized collection, and
+            # literal and variable operands are read in place.
+            _, _, left, right, function, _ = expr
+            kind = left[0]
+            a = left[1] if kind == 'number' else self.global_variables[left[1]] if kind == 'identifier' else self.evaluate_expression(left)
+            kind = right[0]
+            b = right[1] if kind == 'number' else self.global_variables[right[1]] if kind == 'identifier' else self.evaluate_expression(right)
+            return function(a, b)
+        elif expr[0] == 'number':
+            return expr[1]
+        elif expr[0] == 'string':
+            return expr[1]
+        elif expr[0] == 'identifier':
+            try:
+                return self.global_variables[expr[1]]
+            except KeyError:
+                return self.get_variable(expr[1])
+        elif expr[0] == 'operation':
+            left, operator, right = expr[1:]
+            if operator not in OPERATORS:
+                raise ValueError(f"Unsupported operator: {operator}")
+            a = self.evaluate_expression(left)
+            b = self.evaluate_expression(right)
+            if self.max_collection_size is not None:
+                self.check_operation(operator, a, b)
+            return OPERATORS[operator](a, b)
+        elif expr[0] == 'negate':
+            return -self.evaluate_expression(expr[1])
+        elif expr[0] == 'call':
+            return self.call_function(expr[1], [self.evaluate_expression(arg) for arg in expr[2]], expr[3])
+        elif expr[0] == 'list':
+            if self.max_collection_size is not None:
+                self.check_size(expr[1])
+            return [self.evaluate_expression(element) for element in expr[1]]
+        elif expr[0] == 'dictionary':
+            if self.max_collection_size is not None:
+                self.check_size(expr[1])
+            return {self.evaluate_expression(k): self.evaluate_expression(v) for k, v in expr[1].items()}
+        else:
+            raise ValueError(f"Unknown expression type: {expr}")
+
+    async def evaluate_expression_async(self, expr):
+        # Only nodes that can reach a call need to be awaited; leaves are
+        # evaluated by the synchronous path.
+        if expr[0] == 'operation':
+            left, operator, right = expr[1:]
+            if operator not in OPERATORS:
+                raise ValueError(f"Unsupported operator: {operator}")
+            a = await self.evaluate_expression_async(left)
+            b = await self.evaluate_expression_async(right)
+            if self.max_collection_size is not None:
+                self.check_operation(operator, a, b)
+            return OPERATORS[operator](a, b)
+        elif expr[0] == 'negate':
+            return -await self.evaluate_expression_async(expr[1])
+        elif expr[0] == 'call':
+            return await self.call_function_async(expr[1], [await self.evaluate_expression_async(arg) for arg in expr[2]])
+        elif expr[0] == 'list':
+            if self.max_collection_size is not None:
+                self.check_size(expr[1])
+            return [await self.evaluate_expression_async(element) for element in expr[1]]
+        elif expr[0] == 'dictionary':
+            if self.max_collection_size is not None:
+                self.check_size(expr[1])
+            return {await self.evaluate_expression_async(k): await self.evaluate_expression_async(v) for k, v in expr[1].items()}
+        return self.evaluate_expression(expr)
+
+    def call_function(self, func_name, args, cache=None):
+        self.function_calls += 1
+        entry = cache.entry if cache is not None else None
+        if entry is None or entry[0] != self.version:
+            self.cache_misses += 1
+            entry = self.resolve_function(func_name)
+            if cache is not None:
+                cache.entry = entry
+        _, function, builtin, native = entry
+        if native is not None:
+            params, _, saved = self.bind_arguments(func_name, function, args)
+            try:
+                return native(self, self.global_variables)
+            finally:
+                self.unbind_arguments(params, saved)
+        if function is not None:
+            if self.jit_threshold is not None:
+                count = self.call_counts[func_name] = self.call_counts.get(func_name, 0) + 1
+                if count == self.jit_threshold:
+                    self.tier_up(func_name, function)
+            params, body, saved = self.bind_arguments(func_name, function, args)
+            try:
+                return self.execute(body)
+            finally:
+                self.unbind_arguments(params, saved)
+        if self.max_collection_size is None:
+            return builtin(*args)
+        self.check_allocation(func_name, args)
+        value = builtin(*args)
+        self.check_result(value)
+        return value
+
+    def resolve_function(self, func_name):
+        if func_name in self._functions:
+            function = self.annotations.get(func_name) or self._functions[func_name]
+            compiled = self.compiled.get(func_name)
+            native = compiled[1] if compiled is not None and compiled[0] is function else None
+            return (self.version, function, None, native)
+        elif func_name in self.builtins:
+            return (self.version, None, self.builtins[func_name], None)
+        elif self.imports and self.load_import(func_name):
+            return self.resolve_function(func_name)
+        builtin = self.load_builtin(func_name)
+        return (self.version, None, builtin, None)
+
+    def tier_up(self, func_name, function):
+        if not self.can_compile():
+            return
+        from . import jit
+        compiled = jit.compile_function(self, func_name, function)
+        if compiled is not None:
+            native, assumptions = compiled
+            self.compiled[func_name] = (function, native, assumptions)
+            self.invalidate()
+
+    async def call_function_async(self, func_name, args):
+        # The async path has no call-site caches, so every call is a miss.
+        self.function_calls += 1
+        self.cache_misses += 1
+        if func_name in self.functions:
+            function = self.annotations.get(func_name) or self.functions[func_name]
+            params, body, saved = self.bind_arguments(func_name, function, args)
+            try:
+                return await self.execute_async(body)
+            finally:
+                self.unbind_arguments(params, saved)
+        elif func_name in self.async_builtins:
+            result = await self.async_builtins[func_name](*args)
+        elif func_name not in self.builtins and self.imports and self.load_import(func_name):
+            return await self.call_function_async(func_name, args)
+        else:
+            from . import aio
+            builtin = self.builtins[func_name] if func_name in self.builtins else self.load_builtin(func_name)
+            if self.max_collection_size is not None:
+                self.check_allocation(func_name, args)
+            result = builtin(*args)
+            if aio.isawaitable(result):
+                result = await result
+        if self.max_collection_size is not None:
+            self.check_result(result)
+        return result
+
+    def import_module(self, name):
+        from . import modules
+        module = modules.load_module(name, self.search_path)
+        if module not in self.imports:
+            self.imports.append(module)
+        return module
+
+    def load_import(self, name):
+        # Imported modules are only unpacked into the interpreter when one of
+        # their names is first used; definitions in the program take priority.
+        for module in self.imports:
+            if name in module.exports:
+                for imported in module.imports:
+                    self.import_module(imported)
+                for func_name, function in module.functions.items():
+                    self.functions.setdefault(func_name, function)
+                self.deoptimize(*module.functions)
+                for constant, value in module.constants.items():
+                    if constant not in self.global_variables:
+                        self.global_variables[constant] = value
+                        if self.journal is not None:
+                            self.journal.append((self.instruction_count, constant, value))
+                return True
+        return False
+
+    def load_builtin(self, func_name):
+        # The numeric standard library pulls in NumPy, so it is only loaded
+        # into the builtins when a script first calls one of its functions.
+        from . import stdlib
+        if func_name not in stdlib.FUNCTIONS:
+            raise NameError(f"Function {func_name} not defined")
+        self.library = stdlib.MicrotonELibrary()
+        for name, function in self.library.library.items():
+            self.builtins.setdefault(name, function)
+        self.invalidate()
+        return self.builtins[func_name]
+
+    def bind_arguments(self, func_name, function, args):
+        # Parameters shadow variables of the same name for the duration of the
+        # call; everything else stays shared with the caller.
+        params, body = function
+        if len(args) != len(params):
+            raise ValueError(f"Function {func_name} expects {len(params)} arguments, got {len(args)}")
+        if self.call_depth >= self.peak_call_depth:
+            self.check_call_depth(func_name)
+        self.call_depth += 1
+        saved = {name: self.global_variables[name] for name in params if name in self.global_variables}
+        self.global_variables.update(zip(params, args))
+        if self.journal is not None:
+            self.journal.bind(self.instruction_count, params, args)
+        return params, body, saved
+
+    def check_call_depth(self, func_name):
+        # Only reached by a call deeper than any before it in this run, so
+        # the peak depth costs nothing to track and the limit is checked
+        # only where it could be exceeded.
+        if self.max_call_depth is not None and self.call_depth >= self.max_call_depth:
+            raise CallDepthExceeded(f"Call depth limit of {self.max_call_depth} exceeded in {func_name}")
+        self.peak_call_depth = self.call_depth + 1
+
+    def unbind_arguments(self, params, saved):
+        self.returning = False
+        self.call_depth -= 1
+        for name in params:
+            if name in saved:
+                self.global_variables[name] = saved[name]
+            else:
+                self.global_variables.pop(name, None)
+        if self.journal is not None:
+            self.journal.unbind(self.instruction_count, params, saved)
+
+    def get_variable(self, name):
+        if name in self.global_variables:
+            return self.global_variables[name]
+        elif self.imports and self.load_import(name) and name in self.global_variables:
+            return self.global_variables[name]
+        else:
+            raise NameError(f"Variable {name} not defined")
+
+    def set_variable(self, name, value):
+        self.global_variables[name] = value
+        if self.journal is not None:
+            self.journal.append((self.instruction_count, name, value))
@@ -0,0 +1,268 @@
+from .grammar import OPERATORS
+
+# The type lattice: 'int', 'float' and 'bool' join to 'number'; anything else
+# that disagrees joins to None, meaning unknown. BOTTOM marks a variable with
+# no writes seen yet.
+BOTTOM = 'bottom'
+NUMERIC = ('int', 'float', 'bool', 'number')
+COMPARISONS = ('==', '!=', '>', '<', '>=', '<=')
+LITERAL_TYPES = {int: 'int', float: 'float', bool: 'bool', str: 'string'}
+
+
+def join(a, b):
+    if a == b or b == BOTTOM:
+        return a
+    if a == BOTTOM:
+        return b
+    if a in NUMERIC and b in NUMERIC:
+        return 'number'
+    return None
+
+
+def operation_type(operator, left, right):
+    if left == BOTTOM or right == BOTTOM:
+        return BOTTOM
+    if left in NUMERIC and right in NUMERIC:
+        if operator in COMPARISONS:
+            return 'bool'
+        if operator == '/' or 'float' in (left, right):
+            return 'float'
+        if left in ('int', 'bool') and right in ('int', 'bool'):
+            return 'int'
+        return 'number'
+    if operator == '+' and left == right and left in ('string', 'array'):
+        return left
+    return None
+
+
+class TypeInference:
+    # Whole-program, flow-insensitive inference over the tuple AST. Every
+    # variable is global, so a name's type is the join of everything written
+    # to it anywhere: assignments, constants, loop variables and arguments
+    # bound to parameters. A read only gets that type where the name is
+    # certainly bound already, so values set from outside the program, such
+    # as run_batch parameters, are never assumed.
+    def __init__(self, functions):
+        self.functions = functions
+        self.types = {}
+        self.writes = []
+        self.changed = {}
+
+    def solve(self, statements):
+        self.collect(statements, set())
+        for params, body in self.functions.values():
+            self.collect(body, set(params))
+        changed = True
+        while changed:
+            changed = False
+            for name, expr, known in self.writes:
+                value = expr if isinstance(expr, str) else self.type_of(expr, known)
+                joined = join(self.types.get(name, BOTTOM), value)
+                if joined != self.types.get(name, BOTTOM):
+                    self.types[name] = joined
+                    changed = True
+
+    def collect(self, statements, known):
+        for statement in statements:
+            kind = statement[0]
+            if kind in ('assignment', 'constant'):
+                self.collect_expression(statement[2], known)
+                self.write(statement[1], statement[2], known)
+                known.add(statement[1])
+            elif kind in ('print', 'return'):
+                self.collect_expression(statement[1], known)
+            elif kind == 'if':
+                self.collect_expression(statement[1], known)
+                self.collect(statement[2], set(known))
+                self.collect(statement[3], set(known))
+            elif kind == 'loop':
+                self.writes.append((statement[1], 'int', frozenset()))
+                self.collect(statement[4], known | {statement[1]})
+            elif kind == 'while':
+                self.collect_expression(statement[1], known)
+                self.collect(statement[2], set(known))
+            elif kind == 'try':
+                self.collect(statement[1], set(known))
+                self.collect(statement[2], set(known))
+            elif kind == 'call':
+                self.collect_expression(statement, known)
+
+    def write(self, name, expr, known):
+        # Only the bound names the expression actually reads are kept.
+        names = frozenset(node[1] for node in _identifiers(expr) if node[1] in known)
+        self.writes.append((name, expr, names))
+
+    def collect_expression(self, expr, known):
+        kind = expr[0]
+        if kind == 'operation':
+            self.collect_expression(expr[1], known)
+            self.collect_expression(expr[3], known)
+        elif kind == 'negate':
+            self.collect_expression(expr[1], known)
+        elif kind == 'call':
+            for arg in expr[2]:
+                self.collect_expression(arg, known)
+            if expr[1] in self.functions:
+                for param, arg in zip(self.functions[expr[1]][0], expr[2]):
+                    self.write(param, arg, known)
+        elif kind == 'list':
+            for element in expr[1]:
+                self.collect_expression(element, known)
+        elif kind == 'dictionary':
+            for k, v in expr[1].items():
+                self.collect_expression(k, known)
+                self.collect_expression(v, known)
+
+    def type_of(self, expr, known):
+        kind = expr[0]
+        if kind in ('number', 'string'):
+            return LITERAL_TYPES.get(type(expr[1]))
+        elif kind == 'identifier':
+            return self.types.get(expr[1], BOTTOM) if expr[1] in known else None
+        elif kind == 'operation':
+            return operation_type(expr[2], self.type_of(expr[1], known), self.type_of(expr[3], known))
+        elif kind == 'numeric':
+            return expr[5]
+        elif kind == 'negate':
+            operand = self.type_of(expr[1], known)
+            if operand == 'bool':
+                return 'int'
+            return operand if operand in NUMERIC or operand == BOTTOM else None
+        elif kind == 'list':
+            return 'array'
+        elif kind == 'dictionary':
+            return 'dict'
+        return None
+
+    # Rewriting. Operations whose operands are proven numeric become
+    # ('numeric', operator, left, right, function, type) nodes. Unchanged
+    # subtrees are returned as-is so shared nodes keep their identity.
+
+    def annotate(self, statements, known):
+        result = []
+        changed = False
+        for statement in statements:
+            rewritten = self.annotate_statement(statement, known)
+            changed = changed or rewritten is not statement
+            result.append(rewritten)
+        return result if changed else statements
+
+    def annotate_statement(self, statement, known):
+        kind = statement[0]
+        if kind in ('assignment', 'constant'):
+            expr = self.annotate_expression(statement[2], known)
+            known.add(statement[1])
+            return statement if expr is statement[2] else (kind, statement[1], expr)
+        elif kind in ('print', 'return'):
+            expr = self.annotate_expression(statement[1], known)
+            return statement if expr is statement[1] else (kind, expr)
+        elif kind == 'if':
+            condition = self.annotate_expression(statement[1], known)
+            true_statements = self.annotate(statement[2], set(known))
+            false_statements = self.annotate(statement[3], set(known))
+            if condition is statement[1] and true_statements is statement[2] and false_statements is statement[3]:
+                return statement
+            return ('if', condition, true_statements, false_statements)
+        elif kind == 'loop':
+            body = self.annotate(statement[4], known | {statement[1]})
+            return statement if body is statement[4] else statement[:4] + (body,)
+        elif kind == 'while':
+            condition = self.annotate_expression(statement[1], known)
+            body = self.annotate(statement[2], set(known))
+            return statement if condition is statement[1] and body is statement[2] else ('while', condition, body)
+        elif kind == 'try':
+            try_statements = self.annotate(statement[1], set(known))
+            except_statements = self.annotate(statement[2], set(known))
+            if try_statements is statement[1] and except_statements is statement[2]:
+                return statement
+            return ('try', try_statements, except_statements)
+        elif kind == 'call':
+            return self.annotate_expression(statement, known)
+        elif kind == 'function' and statement[1] in self.changed:
+            return ('function', statement[1], statement[2], self.changed[statement[1]][1])
+        return statement
+
+    def annotate_expression(self, expr, known):
+        kind = expr[0]
+        if kind == 'numeric':
+            # Annotations from an earlier inference are proven again, never
+            # trusted: the types they were proven for may no longer hold.
+            _, operator, left, right, _, _ = expr
+            expr = ('operation', left, operator, right)
+            kind = 'operation'
+        if kind == 'operation':
+            _, left, operator, right = expr
+            left = self.annotate_expression(left, known)
+            right = self.annotate_expression(right, known)
+            left_type = self.type_of(left, known)
+            right_type = self.type_of(right, known)
+            if left_type in NUMERIC and right_type in NUMERIC and operator in OPERATORS:
+                return ('numeric', operator, left, right, OPERATORS[operator], operation_type(operator, left_type, right_type))
+            if left is expr[1] and right is expr[3]:
+                return expr
+            return ('operation', left, operator, right)
+        elif kind == 'negate':
+            operand = self.annotate_expression(expr[1], known)
+            return expr if operand is expr[1] else ('negate', operand)
+        elif kind == 'call':
+            args = [self.annotate_expression(arg, known) for arg in expr[2]]
+            if all(new is old for new, old in zip(args, expr[2])):
+                return expr
+            return ('call', expr[1], args, expr[3])
+        elif kind == 'list':
+            elements = [self.annotate_expression(element, known) for element in expr[1]]
+            if all(new is old for new, old in zip(elements, expr[1])):
+                return expr
+            return ('list', elements)
+        return expr
+
+
+def _identifiers(expr):
+    kind = expr[0]
+    if kind == 'identifier':
+        yield expr
+    elif kind == 'operation':
+        yield from _identifiers(expr[1])
+        yield from _identifiers(expr[3])
+    elif kind == 'numeric':
+        yield from _identifiers(expr[2])
+        yield from _identifiers(expr[3])
+    elif kind == 'negate':
+        yield from _identifiers(expr[1])
+    elif kind in ('call', 'list'):
+        for element in expr[2] if kind == 'call' else expr[1]:
+            yield from _identifiers(element)
+    elif kind == 'dictionary':
+        for k, v in expr[1].items():
+            yield from _identifiers(k)
+            yield from _identifiers(v)
+
+
+def _has_imports(statements):
+    for statement in statements:
+        kind = statement[0]
+        if kind == 'import':
+            return True
+        for part in statement[1:]:
+            if isinstance(part, list) and part and isinstance(part[0], tuple) and _has_imports(part):
+                return True
+    return False
+
+
+def annotate_program(interpreter, statements):
+    # Returns the annotated top-level statements and a dictionary of the
+    # functions whose bodies changed. Programs that import modules are left
+    # alone: module functions are not analyzed, and may write any global.
+    functions = interpreter.functions
+    # Straight-line code runs once, so there is nothing to gain from it.
+    if not functions and not any(statement[0] in ('loop', 'while') for statement in statements):
+        return statements, {}
+    if interpreter.imports or _has_imports(statements) or any(_has_imports(body) for _, body in functions.values()):
+        return statements, {}
+    inference = TypeInference(functions)
+    inference.solve(statements)
+    for name, (params, body) in functions.items():
+        annotated = inference.annotate(body, set(params))
+        if annotated is not body:
+            inference.changed[name] = (params, annotated)
+    return inference.annotate(statements, set()), inference.changed
@@ -1,12 +1,14 @@
 class MicrotonEInterpreter:
     def __init__(self):
         self.variables = {}
+        self.instruction_count = 0
 
     def interpret(self, ast):
         for statement in ast:
             self.execute(statement)
 
     def execute(self, statement):
+        self.instruction_count += 1
         if statement['type'] == 'function_definition':
             self.define_function(statement)
         elif statement['type'] == 'print':
@@ -0,0 +1,266 @@
+import math
+
+from . import stdlib
+from .grammar import OPERATORS, BreakException, ContinueException
+
+_MISSING = object()
+
+
+class Unsupported(Exception):
+    pass
+
+
+def _walk(statements):
+    # Yields every statement and expression node under `statements`.
+    for statement in statements:
+        yield statement
+        kind = statement[0]
+        if kind in ('assignment', 'constant'):
+            yield from _walk_expression(statement[2])
+        elif kind in ('print', 'return'):
+            yield from _walk_expression(statement[1])
+        elif kind == 'if':
+            yield from _walk_expression(statement[1])
+            yield from _walk(statement[2])
+            yield from _walk(statement[3])
+        elif kind == 'loop':
+            yield from _walk(statement[4])
+        elif kind == 'while':
+            yield from _walk_expression(statement[1])
+            yield from _walk(statement[2])
+        elif kind == 'try':
+            yield from _walk(statement[1])
+            yield from _walk(statement[2])
+        elif kind == 'call':
+            for arg in statement[2]:
+                yield from _walk_expression(arg)
+
+
+def _walk_expression(expr):
+    yield expr
+    if expr[0] == 'operation':
+        yield from _walk_expression(expr[1])
+        yield from _walk_expression(expr[3])
+    elif expr[0] == 'numeric':
+        yield from _walk_expression(expr[2])
+        yield from _walk_expression(expr[3])
+    elif expr[0] == 'negate':
+        yield from _walk_expression(expr[1])
+    elif expr[0] == 'call':
+        for arg in expr[2]:
+            yield from _walk_expression(arg)
+    elif expr[0] == 'list':
+        for element in expr[1]:
+            yield from _walk_expression(element)
+    elif expr[0] == 'dictionary':
+        for k, v in expr[1].items():
+            yield from _walk_expression(k)
+            yield from _walk_expression(v)
+
+
+class Translator:
+    # Turns one function's statement list into the source of an equivalent
+    # Python function.
+    #
+    # Callees see the caller's variables and parameters, so a function that
+    # calls other MicrotonE functions keeps its variables in the interpreter's
+    # global dictionary. A leaf function, one that calls only builtins, works
+    # on Python locals loaded on entry and writes them back on exit. The
+    # builtin names it calls are recorded as assumptions; defining a function
+    # with one of those names deoptimizes it.
+    def __init__(self, func_name, params, leaf=False):
+        self.func_name = func_name
+        self.params = params
+        self.leaf = leaf
+        self.lines = []
+        self.constants = {}
+        self.temporaries = 0
+
+    def constant(self, value):
+        name = f'_k{len(self.constants)}'
+        self.constants[name] = value
+        return name
+
+    def temporary(self):
+        self.temporaries += 1
+        return f'_v{self.temporaries}'
+
+    def emit(self, depth, line):
+        self.lines.append('    ' * depth + line)
+
+    def translate(self, body):
+        self.emit(0, f'def {self.name}(interp, g):')
+        self.emit(1, 'call = interp.call_function')
+        if not self.leaf:
+            self.block(body, 1, set(self.params))
+            return '\n'.join(self.lines) + '\n'
+        names = set()
+        assigned = set()
+        for node in _walk(body):
+            if node[0] == 'identifier':
+                names.add(node[1])
+            elif node[0] in ('assignment', 'constant', 'loop'):
+                names.add(node[1])
+                assigned.add(node[1])
+        for name in sorted(names):
+            if name in self.params:
+                self.emit(1, f'{self.local(name)} = g[{name!r}]')
+            else:
+                self.emit(1, f'{self.local(name)} = g.get({name!r}, _MISSING)')
+        self.emit(1, 'try:')
+        self.block(body, 2, set(self.params))
+        self.emit(1, 'finally:')
+        # Parameters are restored by the caller, as in the interpreter.
+        written = sorted(assigned - set(self.params))
+        for name in written:
+            self.emit(2, f'if {self.local(name)} is not _MISSING:')
+            self.emit(3, f'g[{name!r}] = {self.local(name)}')
+        if not written:
+            self.emit(2, 'pass')
+        return '\n'.join(self.lines) + '\n'
+
+    def local(self, name):
+        return f'v_{name}'
+
+    def store(self, depth, name, value):
+        if self.leaf:
+            self.emit(depth, f'{self.local(name)} = {value}')
+        else:
+            self.emit(depth, f'g[{name!r}] = {value}')
+
+    def load(self, name, known):
+        if self.leaf:
+            if name in known:
+                return self.local(name)
+            return f'({self.local(name)} if {self.local(name)} is not _MISSING else interp.get_variable({name!r}))'
+        if name in known:
+            return f'g[{name!r}]'
+        return f'(g[{name!r}] if {name!r} in g else interp.get_variable({name!r}))'
+
+    @property
+    def name(self):
+        return f'mt_{self.func_name}'
+
+    def block(self, statements, depth, known):
+        # `known` holds the names certain to be bound at this point; they are
+        # read with a plain subscript instead of a guarded lookup.
+        if not statements:
+            self.emit(depth, 'pass')
+        for statement in statements:
+            self.statement(statement, depth, known)
+
+    def loop_body(self, statements, depth, known):
+        self.emit(depth, 'try:')
+        self.block(statements, depth + 1, known)
+        self.emit(depth, 'except _Break:')
+        self.emit(depth + 1, 'break')
+        self.emit(depth, 'except _Continue:')
+        self.emit(depth + 1, 'continue')
+
+    def statement(self, statement, depth, known):
+        kind = statement[0]
+        if kind in ('assignment', 'constant'):
+            self.store(depth, statement[1], self.expression(statement[2], known))
+            known.add(statement[1])
+        elif kind == 'print':
+            self.emit(depth, f'interp.output.write({self.expression(statement[1], known)})')
+        elif kind == 'if':
+            self.emit(depth, f'if {self.expression(statement[1], known)}:')
+            self.block(statement[2], depth + 1, set(known))
+            if statement[3]:
+                self.emit(depth, 'else:')
+                self.block(statement[3], depth + 1, set(known))
+        elif kind == 'loop':
+            _, var, start, end, statements = statement
+            value = self.temporary()
+            self.emit(depth, f'for {value} in range({start!r}, {end + 1!r}):')
+            self.store(depth + 1, var, value)
+            self.loop_body(statements, depth + 1, known | {var})
+        elif kind == 'while':
+            self.emit(depth, f'while {self.expression(statement[1], known)}:')
+            self.loop_body(statement[2], depth + 1, set(known))
+        elif kind == 'return':
+            self.emit(depth, f'return {self.expression(statement[1], known)}')
+        elif kind == 'try':
+            self.emit(depth, 'try:')
+            self.block(statement[1], depth + 1, set(known))
+            self.emit(depth, 'except Exception:')
+            self.block(statement[2], depth + 1, set(known))
+        elif kind == 'call':
+            self.emit(depth, self.expression(statement, known))
+        elif kind == 'break':
+            # Raised rather than compiled to `break`, so that a surrounding
+            # MicrotonE try block or a caller's loop sees it as it would when
+            # interpreted.
+            self.emit(depth, 'raise _Break()')
+        elif kind == 'continue':
+            self.emit(depth, 'raise _Continue()')
+        elif kind == 'import':
+            self.emit(depth, f'interp.import_module({statement[1]!r})')
+        elif kind in ('comment', 'function', 'hashword'):
+            self.emit(depth, 'pass')
+        else:
+            raise Unsupported(kind)
+
+    def expression(self, expr, known):
+        kind = expr[0]
+        if kind in ('number', 'string'):
+            value = expr[1]
+            if type(value) in (int, str, bool) or (type(value) is float and math.isfinite(value)):
+                return repr(value)
+            return self.constant(value)
+        elif kind == 'identifier':
+            return self.load(expr[1], known)
+        elif kind == 'operation':
+            _, left, operator, right = expr
+            if operator not in OPERATORS:
+                raise Unsupported(operator)
+            return f'({self.expression(left, known)} {operator} {self.expression(right, known)})'
+        elif kind == 'numeric':
+            _, operator, left, right, _, _ = expr
+            return f'({self.expression(left, known)} {operator} {self.expression(right, known)})'
+        elif kind == 'negate':
+            return f'(-{self.expression(expr[1], known)})'
+        elif kind == 'call':
+            _, func_name, args, cache = expr
+            args = ', '.join(self.expression(arg, known) for arg in args)
+            return f'call({func_name!r}, [{args}], {self.constant(cache)})'
+        elif kind == 'list':
+            return '[' + ', '.join(self.expression(element, known) for element in expr[1]) + ']'
+        elif kind == 'dictionary':
+            items = ', '.join(f'{self.expression(k, known)}: {self.expression(v, known)}' for k, v in expr[1].items())
+            return '{' + items + '}'
+        raise Unsupported(kind)
+
+
+def builtin_calls(interpreter, body):
+    # The names `body` calls, provided they all resolve to builtins and it
+    # imports nothing; otherwise None.
+    names = set()
+    for node in _walk(body):
+        if node[0] == 'import':
+            return None
+        if node[0] == 'call':
+            name = node[1]
+            if name in interpreter.functions or (name not in interpreter.builtins and name not in stdlib.FUNCTIONS):
+                return None
+            names.add(name)
+    return frozenset(names)
+
+
+def compile_function(interpreter, func_name, function):
+    # Returns (native, assumptions), where native is a Python function taking
+    # (interpreter, globals), or None when the body uses something the
+    # translator does not handle.
+    params, body = function
+    assumptions = builtin_calls(interpreter, body)
+    translator = Translator(func_name, params, leaf=assumptions is not None)
+    try:
+        source = translator.translate(body)
+    except Unsupported:
+        return None
+    namespace = {'_Break': BreakException, '_Continue': ContinueException, '_MISSING': _MISSING, **translator.constants}
+    exec(compile(source, f'<microtone jit {func_name}>', 'exec'), namespace)
+    native = namespace[translator.name]
+    native.source = source
+    return native, assumptions or frozenset()
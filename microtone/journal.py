@@ -0,0 +1,334 @@
+import bisect
+import marshal
+import operator
+import pickle
+import queue
+import struct
+import threading
+
+from .checkpoint import MicrotonECheckpoint
+
+MAGIC = b'MTJ1'
+# Instructions between full snapshots of the variables. Events recorded since
+# the last snapshot are encoded and handed to the writer at the same time.
+CHECKPOINT_INTERVAL = 4096
+# Marshal format 4 can be read by every later Python.
+MARSHAL_VERSION = 4
+
+# File records start with a one-byte tag:
+#   K  a block of events: (count, name, value) tuples
+#   C  a snapshot of every variable at one position
+#   E  the end of a recording and its last position
+# Positions are the journal's running instruction count. They keep counting
+# across runs, so several runs can share one journal.
+BLOCK = ord('K')
+CHECKPOINT = ord('C')
+END = ord('E')
+
+MARSHAL = 0
+PICKLE = 1
+
+# Calls and control decisions are events on names that cannot clash with
+# MicrotonE identifiers. BIND carries (params, args) and UNBIND (params,
+# saved), where `saved` holds the values the parameters shadowed. Decisions
+# have one name per outcome: which way an if went, whether a while went round
+# again, and whether a try block fell through to its except block.
+BIND = '#bind'
+UNBIND = '#unbind'
+DECISIONS = {kind: (f'#{kind}', f'#!{kind}') for kind in ('if', 'while', 'except')}
+OUTCOMES = {name: (kind, outcome) for kind, names in DECISIONS.items() for name, outcome in zip(names, (True, False))}
+
+SCALARS = frozenset((int, float, str, bool, type(None)))
+
+_record = struct.Struct('<BQBI')
+_end = struct.Struct('<BQ')
+
+
+class Unrecorded:
+    # Stands in for a value that could not be pickled, such as a lambda.
+    def __init__(self, text):
+        self.text = text
+
+    def __repr__(self):
+        return self.text
+
+
+class Unbound:
+    # Written to a parameter's history when a call returns and the name goes
+    # back to being undefined.
+    pass
+
+
+def plain(value):
+    # Whether marshal can round-trip `value`. It would write any other object
+    # with the buffer protocol, such as a NumPy array, as bytes.
+    kind = type(value)
+    if kind in SCALARS:
+        return True
+    if kind is list or kind is tuple:
+        return all(map(plain, value))
+    if kind is dict:
+        return all(map(plain, value)) and all(map(plain, value.values()))
+    return False
+
+
+def dump(value, marshallable=None):
+    # Marshal is several times faster than pickle for the ints, floats and
+    # strings most values are; anything else falls back to pickle. Returns
+    # (codec, payload), or None if neither works.
+    if marshallable is None:
+        marshallable = plain(value)
+    if marshallable:
+        return MARSHAL, marshal.dumps(value, MARSHAL_VERSION)
+    try:
+        return PICKLE, pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        return None
+
+
+def load(codec, payload):
+    return marshal.loads(payload) if codec == MARSHAL else pickle.loads(payload)
+
+
+def _recordable(value):
+    return value if dump(value) is not None else Unrecorded(repr(value))
+
+
+class JournalWriter:
+    # Hands encoded chunks to a background thread, so the interpreter never
+    # waits on the file.
+    def __init__(self, path, max_pending=64):
+        self.file = open(path, 'wb')
+        self.pending = queue.Queue(max_pending)
+        self.error = None
+        self.thread = threading.Thread(target=self.drain, name='microtone-journal', daemon=True)
+        self.thread.start()
+        self.write(MAGIC)
+
+    def write(self, chunk):
+        self.pending.put(chunk)
+
+    def drain(self):
+        while True:
+            chunk = self.pending.get()
+            if chunk is None:
+                return
+            if self.error is None:
+                try:
+                    self.file.write(chunk)
+                except OSError as e:
+                    self.error = e
+
+    def close(self):
+        self.pending.put(None)
+        self.thread.join()
+        self.file.close()
+        if self.error is not None:
+            raise self.error
+
+
+class Journal:
+    # Records one interpreter's variable writes and control decisions. Made
+    # by Interpreter.record(); closing it stops the recording.
+    #
+    # Recording an event appends a (count, name, value) tuple to a list, and
+    # events are encoded together with a single marshal call at the next
+    # checkpoint. Scalars, and lists and dictionaries of them, cannot change
+    # once written, so they are safe to hold until then. Other values, such
+    # as quantum registers, which hadamard() and friends update in place,
+    # are encoded as soon as they are written, so the journal keeps the
+    # value they had at the time.
+    def __init__(self, interpreter, path, interval=CHECKPOINT_INTERVAL):
+        self.interpreter = interpreter
+        self.writer = JournalWriter(path)
+        self.interval = interval
+        self.events = []
+        self.base = 0
+        self.position = 0
+        self.next_checkpoint = 0
+
+    def append(self, event):
+        # Called by the interpreter for every event.
+        self.events.append(event)
+        value = event[2]
+        if type(value) not in SCALARS and not plain(value):
+            self.flush()
+
+    def write(self, count, name, value):
+        self.append((count, name, value))
+
+    def bind(self, count, params, args):
+        self.append((count, BIND, (params, args)))
+
+    def unbind(self, count, params, saved):
+        self.append((count, UNBIND, (params, saved)))
+
+    def decision(self, count, kind, outcome):
+        taken, not_taken = DECISIONS[kind]
+        self.append((count, taken if outcome else not_taken, None))
+
+    def record(self, tag, position, value, marshallable=None):
+        encoded = dump(value, marshallable)
+        if encoded is None:
+            if tag == BLOCK:
+                value = [(count, name, _recordable(item)) for count, name, item in value]
+            else:
+                value = {name: _recordable(item) for name, item in value.items()}
+            encoded = dump(value)
+        codec, payload = encoded
+        self.writer.write(_record.pack(tag, position, codec, len(payload)) + payload)
+
+    def flush(self):
+        # Counts in a block are relative to the position in its header, the
+        # journal's base when the events were recorded.
+        if self.events:
+            events = self.events[:]
+            self.events.clear()
+            # Most blocks hold only scalars, which one C-level pass confirms.
+            values = list(map(operator.itemgetter(2), events))
+            marshallable = set(map(type, values)) <= SCALARS or all(plain(value) for value in values)
+            self.record(BLOCK, self.base, events, marshallable)
+            self.position = max(self.position, self.base + events[-1][0])
+
+    def checkpoint(self, count, variables):
+        # Called from the interpreter's limit checks. Flushes the events so
+        # far, snapshots the variables when a snapshot is due and returns the
+        # instruction count after which the next one is.
+        self.flush()
+        position = self.position = max(self.position, self.base + count)
+        if position >= self.next_checkpoint:
+            self.record(CHECKPOINT, position, dict(variables))
+            self.next_checkpoint = position + self.interval
+        return self.next_checkpoint - self.base - 1
+
+    def restart(self, variables):
+        # A new run starts its instruction count from zero; keep positions
+        # increasing and snapshot the starting state.
+        self.flush()
+        self.base = self.position
+        self.next_checkpoint = self.position
+        return self.checkpoint(0, variables)
+
+    def close(self):
+        if self.interpreter.journal is self:
+            self.interpreter.journal = None
+        self.flush()
+        self.position = max(self.position, self.base + self.interpreter.instruction_count)
+        self.writer.write(_end.pack(END, self.position))
+        self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def apply(variables, name, value):
+    if name[0] != '#':
+        variables[name] = value
+    elif name == BIND:
+        variables.update(zip(*value))
+    elif name == UNBIND:
+        params, saved = value
+        for param in params:
+            if param in saved:
+                variables[param] = saved[param]
+            else:
+                variables.pop(param, None)
+
+
+class Replayer:
+    # Reads a journal back. seek(position) restores the checkpoint nearest
+    # before `position` and replays the events after it, so any point in the
+    # run can be reached without executing the program again.
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.data = memoryview(f.read())
+        if self.data[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a MicrotonE journal")
+        self.checkpoints = MicrotonECheckpoint()
+        self.positions = []
+        self.blocks = []
+        self.end = 0
+        self.index()
+
+    def index(self):
+        # One pass over the record headers to find the blocks and checkpoints;
+        # nothing is decoded.
+        data = self.data
+        offset = len(MAGIC)
+        while offset < len(data):
+            tag = data[offset]
+            if tag == BLOCK or tag == CHECKPOINT:
+                _, position, _, length = _record.unpack_from(data, offset)
+                if tag == BLOCK:
+                    self.blocks.append(offset)
+                else:
+                    self.checkpoints.save_checkpoint((position, offset, len(self.blocks)))
+                    self.positions.append(position)
+                offset += _record.size + length
+            elif tag == END:
+                self.end = max(self.end, _end.unpack_from(data, offset)[1])
+                offset += _end.size
+            else:
+                raise ValueError(f"Corrupt journal: unknown record tag {tag} at byte {offset}")
+
+    def read(self, offset):
+        _, position, codec, length = _record.unpack_from(self.data, offset)
+        start = offset + _record.size
+        return position, load(codec, self.data[start:start + length])
+
+    def events(self, first_block=0):
+        # Yields every (position, name, value) event, starting from the block
+        # numbered `first_block`.
+        for offset in self.blocks[first_block:]:
+            base, events = self.read(offset)
+            for count, name, value in events:
+                yield base + count, name, value
+
+    def seek(self, position):
+        # The variables as they stood just before instruction `position` ran.
+        number = bisect.bisect_right(self.positions, position) - 1
+        if number < 0:
+            return {}
+        _, offset, first_block = self.checkpoints.load_checkpoint(number)
+        _, variables = self.read(offset)
+        for at, name, value in self.events(first_block):
+            if at >= position:
+                break
+            apply(variables, name, value)
+        return variables
+
+    def writes(self, start=0, stop=None):
+        # Every variable write, as (position, name, value) triples.
+        # Parameters bound or restored by a call each count as a write; a
+        # parameter that shadowed nothing is written as Unbound on return.
+        for position, name, value in self.events():
+            if stop is not None and position >= stop:
+                return
+            if position < start:
+                continue
+            if name[0] != '#':
+                yield position, name, value
+            elif name == BIND:
+                for param, arg in zip(*value):
+                    yield position, param, arg
+            elif name == UNBIND:
+                params, saved = value
+                for param in params:
+                    yield position, param, saved.get(param, Unbound)
+
+    def history(self, name, start=0, stop=None):
+        # Every value written to `name`, as (position, value) pairs.
+        for position, written, value in self.writes(start, stop):
+            if written == name:
+                yield position, value
+
+    def decisions(self, start=0, stop=None):
+        # The control decisions taken, as (position, kind, outcome) triples.
+        for position, name, _ in self.events():
+            if stop is not None and position >= stop:
+                return
+            if name in OUTCOMES and position >= start:
+                yield (position,) + OUTCOMES[name]
@@ -0,0 +1,51 @@
+import re
+
+TOKENS = [
+    ('KEYWORD', r'\b(start|define function|rest|pause|Done|constant|return|end|for each|parallel for each|if|else|while|print)\b'),
+    ('IDENTIFIER', r'[a-zA-Z_][a-zA-Z0-9_]*'),
+    ('NUMBER', r'\d+\.\d+|\d+'),
+    ('STRING', r'"[^"]*"'),
+    ('COMMENT', r'start[^\n]*'),
+    ('OPERATOR', r'==|!=|>=|<=|[+\-*/<>=]'),
+    ('PUNCTUATION', r'[()\[\]{},:]'),
+    ('WHITESPACE', r'\s+'),
+]
+
+# One alternation of every token pattern, with a final catch-all for
+# characters no token matches. Only the word tokens can start with the same
+# character, so they keep their relative order (keywords before identifiers
+# before comments); the rest go first because punctuation and numbers are
+# what most of an expression is made of.
+_ORDER = ('WHITESPACE', 'NUMBER', 'PUNCTUATION', 'OPERATOR', 'STRING', 'KEYWORD', 'IDENTIFIER', 'COMMENT')
+_pattern = re.compile(
+    '|'.join(f'(?P<{token_type}>{dict(TOKENS)[token_type]})' for token_type in _ORDER) + '|(?P<MISMATCH>.)',
+    re.DOTALL,
+)
+
+
+class MicrotonELexer:
+    def __init__(self):
+        self.tokens = TOKENS
+
+    def tokenize(self, code):
+        # A single left-to-right pass that never copies the rest of `code`.
+        tokens = []
+        for m in _pattern.finditer(code):
+            token_type = m.lastgroup
+            if token_type == 'WHITESPACE':
+                continue
+            if token_type == 'MISMATCH':
+                raise ValueError('Unexpected character: %s at column %d' % (m.group(), m.start() + 1))
+            tokens.append((token_type, m.group()))
+        return tokens
+
+    def column(self, code, index):
+        # The 1-based column where the token at `index` in tokenize(code)
+        # starts, or just past the end of `code`. Only error messages need
+        # it, so positions are found again rather than kept for every token.
+        for m in _pattern.finditer(code):
+            if m.lastgroup != 'WHITESPACE':
+                if index == 0:
+                    return m.start() + 1
+                index -= 1
+        return len(code) + 1
@@ -0,0 +1,67 @@
+import sys
+import time
+
+# How many instructions run between wall-clock checks when a deadline is set.
+DEADLINE_CHECK_INTERVAL = 1024
+
+
+# Limit errors derive from BaseException rather than Exception so that a
+# MicrotonE `try ... except` block, which catches Exception, cannot swallow
+# them and keep a runaway script alive.
+class LimitExceeded(BaseException):
+    pass
+
+
+class InstructionLimitExceeded(LimitExceeded):
+    pass
+
+
+class CallDepthExceeded(LimitExceeded):
+    pass
+
+
+class CollectionSizeExceeded(LimitExceeded):
+    pass
+
+
+class DeadlineExceeded(LimitExceeded):
+    pass
+
+
+class CPUTimeExceeded(LimitExceeded):
+    pass
+
+
+class Limits:
+    def __init__(self, max_instructions=None, max_call_depth=None, max_collection_size=None, timeout=None):
+        self.max_instructions = max_instructions
+        self.max_call_depth = max_call_depth
+        self.max_collection_size = max_collection_size
+        self.timeout = timeout
+
+    def first_checkpoint(self):
+        # The interpreter only calls check() once its instruction counter
+        # passes the checkpoint, so an unlimited run never leaves the fast path.
+        checkpoint = sys.maxsize
+        if self.max_instructions is not None:
+            checkpoint = self.max_instructions
+        if self.timeout is not None:
+            checkpoint = min(checkpoint, DEADLINE_CHECK_INTERVAL)
+        return checkpoint
+
+    def deadline(self):
+        if self.timeout is None:
+            return None
+        return time.monotonic() + self.timeout
+
+    def check(self, instruction_count, deadline):
+        if self.max_instructions is not None and instruction_count > self.max_instructions:
+            raise InstructionLimitExceeded(f"Instruction limit of {self.max_instructions} exceeded")
+        if deadline is not None and time.monotonic() > deadline:
+            raise DeadlineExceeded(f"Deadline of {self.timeout}s exceeded")
+        checkpoint = sys.maxsize
+        if self.max_instructions is not None:
+            checkpoint = self.max_instructions
+        if deadline is not None:
+            checkpoint = min(checkpoint, instruction_count + DEADLINE_CHECK_INTERVAL)
+        return checkpoint
@@ -0,0 +1,219 @@
+import json
+import os
+import sys
+import time
+
+# Counters add up across runs; gauges keep the highest value seen.
+COUNTERS = {
+    'tokens': 'Tokens produced by the lexer',
+    'nodes': 'Syntax tree nodes produced by the parser',
+    'instructions': 'Statements executed',
+    'function_calls': 'Calls to MicrotonE and builtin functions',
+    'cache_hits': 'Calls whose target came from a call-site cache',
+    'cache_misses': 'Calls whose target had to be looked up',
+}
+GAUGES = {
+    'peak_call_depth': 'Deepest nesting of MicrotonE function calls',
+    'peak_memory_bytes': 'Peak resident memory of the process',
+}
+PHASES = ('tokenize', 'parse', 'optimize', 'execute')
+SCOPE = {'name': 'microtone'}
+
+
+def count_nodes(value):
+    # Nodes are tuples tagged with their kind in the interpreter's tree, and
+    # dictionaries with a 'type' in MicrotonEParser's. Lists and other
+    # dictionaries hold statements, elements and items.
+    kind = type(value)
+    if kind is tuple:
+        return 1 + sum(count_nodes(part) for part in value[1:])
+    if kind is list:
+        return sum(count_nodes(part) for part in value)
+    if kind is dict:
+        return ('type' in value) + sum(count_nodes(k) + count_nodes(v) for k, v in value.items())
+    return 0
+
+
+def peak_memory():
+    # Peak resident set size in bytes, where the platform reports it.
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _id(size):
+    return os.urandom(size).hex()
+
+
+class Metrics:
+    # Collects spans, counters and gauges from the interpreters and
+    # executors it is attached to, and writes them out as Prometheus text
+    # or OpenTelemetry JSON traces and metrics. Spans are recorded as (name, start, end) wall
+    # clock nanoseconds; phase timings are also kept as running totals, so
+    # phases that are interleaved, such as tokenizing during parsing, can
+    # be reported without a span of their own.
+    def __init__(self, service='microtone', labels=None):
+        self.service = service
+        self.labels = dict(labels or {})
+        self.trace_id = _id(16)
+        self.root_id = _id(8)
+        self.started = time.time_ns()
+        self.spans = []
+        self.phase_seconds = dict.fromkeys(PHASES, 0.0)
+        self.phase_counts = dict.fromkeys(PHASES, 0)
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.gauges = dict.fromkeys(GAUGES, 0)
+
+    def now(self):
+        return time.perf_counter_ns()
+
+    def span(self, name, start):
+        # Records the span of phase `name` from `start`, a value from now(),
+        # to now, and returns now for the next phase to start from.
+        end = time.perf_counter_ns()
+        offset = time.time_ns() - end
+        self.spans.append((name, start + offset, end + offset))
+        self.add_time(name, (end - start) / 1e9)
+        return end
+
+    def add_time(self, name, seconds):
+        self.phase_seconds[name] = self.phase_seconds.get(name, 0.0) + seconds
+        self.phase_counts[name] = self.phase_counts.get(name, 0) + 1
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def gauge(self, name, value):
+        if value is not None and value > self.gauges.get(name, 0):
+            self.gauges[name] = value
+
+    def record_run(self, interpreter):
+        # Called by Interpreter.run() once a run has finished.
+        self.count('instructions', interpreter.instruction_count)
+        self.count('function_calls', interpreter.function_calls)
+        self.count('cache_hits', interpreter.function_calls - interpreter.cache_misses)
+        self.count('cache_misses', interpreter.cache_misses)
+        self.gauge('peak_call_depth', interpreter.peak_call_depth)
+        self.gauge('peak_memory_bytes', peak_memory())
+
+    def prometheus(self):
+        # The Prometheus text exposition format.
+        labels = ','.join(f'{key}="{_escape(value)}"' for key, value in sorted(self.labels.items()))
+        lines = [
+            '# HELP microtone_phase_seconds Time spent in each phase of the pipeline',
+            '# TYPE microtone_phase_seconds summary',
+        ]
+        for phase, seconds in self.phase_seconds.items():
+            series = f'phase="{phase}"' + (f',{labels}' if labels else '')
+            lines.append(f'microtone_phase_seconds_sum{{{series}}} {seconds!r}')
+            lines.append(f'microtone_phase_seconds_count{{{series}}} {self.phase_counts[phase]}')
+        suffix = f'{{{labels}}}' if labels else ''
+        for name, value in self.counters.items():
+            lines.append(f'# HELP microtone_{name}_total {COUNTERS.get(name, name)}')
+            lines.append(f'# TYPE microtone_{name}_total counter')
+            lines.append(f'microtone_{name}_total{suffix} {value}')
+        for name, value in self.gauges.items():
+            lines.append(f'# HELP microtone_{name} {GAUGES.get(name, name)}')
+            lines.append(f'# TYPE microtone_{name} gauge')
+            lines.append(f'microtone_{name}{suffix} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def resource(self):
+        return {'attributes': _attributes({'service.name': self.service, **self.labels})}
+
+    def otel_traces(self):
+        # An OTLP/JSON trace export request: the spans under a root span
+        # covering the whole collection.
+        end = max([self.started] + [span_end for _, _, span_end in self.spans])
+        spans = [{
+            'traceId': self.trace_id,
+            'spanId': self.root_id,
+            'name': self.service,
+            'kind': 1,
+            'startTimeUnixNano': str(self.started),
+            'endTimeUnixNano': str(end),
+        }]
+        for name, start, span_end in self.spans:
+            spans.append({
+                'traceId': self.trace_id,
+                'spanId': _id(8),
+                'parentSpanId': self.root_id,
+                'name': name,
+                'kind': 1,
+                'startTimeUnixNano': str(start),
+                'endTimeUnixNano': str(span_end),
+            })
+        return {'resourceSpans': [{'resource': self.resource(), 'scopeSpans': [{'scope': SCOPE, 'spans': spans}]}]}
+
+    def otel_metrics(self):
+        # An OTLP/JSON metrics export request: the counters and gauges, and
+        # the phase timings as a sum per phase.
+        now = str(time.time_ns())
+        metrics = []
+        for name, value in self.counters.items():
+            metrics.append({
+                'name': f'microtone.{name}',
+                'description': COUNTERS.get(name, name),
+                'sum': {
+                    'dataPoints': [{'asInt': str(value), 'startTimeUnixNano': str(self.started), 'timeUnixNano': now}],
+                    'aggregationTemporality': 2,
+                    'isMonotonic': True,
+                },
+            })
+        for name, value in self.gauges.items():
+            metrics.append({
+                'name': f'microtone.{name}',
+                'description': GAUGES.get(name, name),
+                'gauge': {'dataPoints': [{'asInt': str(value), 'timeUnixNano': now}]},
+            })
+        metrics.append({
+            'name': 'microtone.phase.duration',
+            'description': 'Time spent in each phase of the pipeline',
+            'unit': 's',
+            'sum': {
+                'dataPoints': [
+                    {
+                        'asDouble': seconds,
+                        'attributes': _attributes({'phase': phase}),
+                        'startTimeUnixNano': str(self.started),
+                        'timeUnixNano': now,
+                    }
+                    for phase, seconds in self.phase_seconds.items()
+                ],
+                'aggregationTemporality': 2,
+                'isMonotonic': True,
+            },
+        })
+        return {'resourceMetrics': [{'resource': self.resource(), 'scopeMetrics': [{'scope': SCOPE, 'metrics': metrics}]}]}
+
+    def write(self, path, format=None):
+        # Writes the metrics as Prometheus text, or as OTLP/JSON when
+        # `format` is 'otel' or the path ends in .json.
+        if format is None:
+            format = 'otel' if path.endswith('.json') else 'prometheus'
+        if format == 'prometheus':
+            text = self.prometheus()
+        elif format == 'otel':
+            text = json.dumps(self.otel_metrics(), indent=2) + '\n'
+        else:
+            raise ValueError(f"Unknown metrics format: {format}")
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def write_traces(self, path):
+        # Writes the spans as OTLP/JSON. Traces and metrics are separate
+        # export requests in OTLP, so they go to separate files.
+        with open(path, 'w') as f:
+            f.write(json.dumps(self.otel_traces(), indent=2) + '\n')
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _attributes(values):
+    return [{'key': key, 'value': {'stringValue': str(value)}} for key, value in values.items()]
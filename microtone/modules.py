@@ -0,0 +1,162 @@
+import os
+import pickle
+import threading
+
+EXTENSIONS = ('.mtonlib', '.mton')
+CACHE_DIR = '__mtoncache__'
+BUNDLE_SUFFIX = '.mtonc'
+BUNDLE_VERSION = 2
+
+# Loaded modules are shared by every interpreter in the process, keyed by the
+# resolved source path.
+_modules = {}
+_compiling = set()
+_lock = threading.RLock()
+
+
+def search_path(extra=None):
+    path = list(extra or [])
+    path.extend(directory for directory in os.environ.get('MICROTONE_PATH', '').split(os.pathsep) if directory)
+    path.append(os.getcwd())
+    return path
+
+
+def find_module(name, path):
+    relative = name.replace('.', os.sep)
+    for directory in path:
+        for extension in EXTENSIONS:
+            candidate = os.path.join(directory, relative + extension)
+            if os.path.isfile(candidate):
+                return os.path.abspath(candidate)
+    raise ImportError(f"Module {name} not found on the search path")
+
+
+def bundle_path(source):
+    directory, filename = os.path.split(source)
+    return os.path.join(directory, CACHE_DIR, filename + BUNDLE_SUFFIX)
+
+
+class Module:
+    # A bundle file holds two pickles: a small index of the names a module
+    # exports, then the compiled functions and constants. Importing a module
+    # reads only the index; the body is read when one of its names is used.
+    def __init__(self, name, path, index, bundle=None, offset=0, body=None):
+        self.name = name
+        self.path = path
+        self.functions_index = index['functions']
+        self.constants_index = index['constants']
+        self.hashwords = index['hashwords']
+        self.imports = index['imports']
+        self.exports = frozenset(self.functions_index) | frozenset(self.constants_index)
+        self.bundle = bundle
+        self.offset = offset
+        self.body = body
+
+    def load(self):
+        if self.body is None:
+            with _lock:
+                if self.body is None:
+                    with open(self.bundle, 'rb') as f:
+                        f.seek(self.offset)
+                        self.body = pickle.load(f)
+        return self.body
+
+    @property
+    def functions(self):
+        return self.load()['functions']
+
+    @property
+    def constants(self):
+        return self.load()['constants']
+
+    def __repr__(self):
+        return f'<MicrotonE module {self.name} from {self.path}>'
+
+
+def compile_module(name, source, path=None):
+    from .grammar import Interpreter
+
+    with open(source) as f:
+        code = f.read()
+    interpreter = Interpreter(search_path=path)
+    statements = interpreter.parse_program(code)
+    constants = {}
+    hashwords = {}
+    imports = []
+    hashword = None
+    for statement in statements:
+        kind = statement[0]
+        if kind == 'function':
+            if hashword is not None:
+                hashwords[hashword] = statement[1]
+                hashword = None
+        elif kind == 'hashword':
+            hashword = statement[1]
+        elif kind in ('assignment', 'constant'):
+            interpreter.execute([statement])
+            constants[statement[1]] = interpreter.global_variables[statement[1]]
+        elif kind == 'import':
+            interpreter.execute([statement])
+            imports.append(statement[1])
+        elif kind != 'comment':
+            raise SyntaxError(f"Module {name} may only contain imports, functions, constants and hashwords, found {kind}")
+    index = {
+        'functions': sorted(interpreter.functions),
+        'constants': sorted(constants),
+        'hashwords': hashwords,
+        'imports': imports,
+    }
+    return index, {'functions': interpreter.functions, 'constants': constants}
+
+
+def _read_bundle(name, source, bundle, stat):
+    with open(bundle, 'rb') as f:
+        header = pickle.load(f)
+        if header != (BUNDLE_VERSION, stat.st_mtime_ns, stat.st_size):
+            return None
+        index = pickle.load(f)
+        return Module(name, source, index, bundle, f.tell())
+
+
+def _write_bundle(bundle, stat, index, body):
+    os.makedirs(os.path.dirname(bundle), exist_ok=True)
+    temporary = f'{bundle}.{os.getpid()}.tmp'
+    with open(temporary, 'wb') as f:
+        pickle.dump((BUNDLE_VERSION, stat.st_mtime_ns, stat.st_size), f, pickle.HIGHEST_PROTOCOL)
+        pickle.dump(index, f, pickle.HIGHEST_PROTOCOL)
+        pickle.dump(body, f, pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary, bundle)
+
+
+def load_module(name, path=None):
+    source = find_module(name, search_path(path))
+    with _lock:
+        module = _modules.get(source)
+        if module is not None:
+            return module
+        if source in _compiling:
+            raise ImportError(f"Circular import of module {name}")
+        stat = os.stat(source)
+        bundle = bundle_path(source)
+        try:
+            module = _read_bundle(name, source, bundle, stat)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            module = None
+        if module is None:
+            _compiling.add(source)
+            try:
+                index, body = compile_module(name, source, path)
+            finally:
+                _compiling.discard(source)
+            module = Module(name, source, index, body=body)
+            try:
+                _write_bundle(bundle, stat, index, body)
+            except (OSError, pickle.PicklingError):
+                pass  # Read-only location or unpicklable constant: keep it in memory only.
+        _modules[source] = module
+        return module
+
+
+def clear_cache():
+    with _lock:
+        _modules.clear()
@@ -0,0 +1,136 @@
+import collections
+import sys
+import time
+
+FORMATS = ('text', 'jsonl', 'csv', 'binary')
+
+
+class PrintSink:
+    # The historical behaviour: one print() call, and one trip through
+    # sys.stdout, per MicrotonE print statement.
+    def write(self, *values):
+        print(*values)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class OutputSink:
+    def __init__(self, target=None, format='text', buffer_size=1 << 16, flush_interval=None):
+        if format not in FORMATS:
+            raise ValueError(f"Unknown output format: {format}")
+        self.format = format
+        self.binary = format == 'binary'
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.chunks = []
+        self.buffered = 0
+        self.records = 0
+        self.last_flush = time.monotonic()
+        self.owns_stream = isinstance(target, str)
+        if self.owns_stream:
+            target = open(target, 'wb' if self.binary else 'w', newline='' if format == 'csv' else None)
+        # None means "whatever sys.stdout is at flush time", so redirection
+        # with contextlib.redirect_stdout keeps working.
+        self.stream = target
+        self.encode = getattr(self, f'encode_{format}')
+        if format == 'jsonl':
+            import json
+            self.json = json
+        elif format == 'csv':
+            import csv
+            import io
+            self.csv_buffer = io.StringIO()
+            self.csv_writer = csv.writer(self.csv_buffer)
+        elif format == 'binary':
+            import pickle
+            import struct
+            self.pickle = pickle
+            self.header = struct.Struct('<I')
+
+    def encode_text(self, values):
+        if len(values) == 1:
+            return f'{values[0]}\n'
+        return ' '.join(map(str, values)) + '\n'
+
+    def encode_jsonl(self, values):
+        record = values[0] if len(values) == 1 else list(values)
+        return self.json.dumps(record, default=repr) + '\n'
+
+    def encode_csv(self, values):
+        row = values[0] if len(values) == 1 and isinstance(values[0], (list, tuple)) else values
+        self.csv_buffer.seek(0)
+        self.csv_buffer.truncate()
+        self.csv_writer.writerow(row)
+        return self.csv_buffer.getvalue()
+
+    def encode_binary(self, values):
+        # Length-prefixed pickles; read them back with read_binary_records().
+        record = values[0] if len(values) == 1 else list(values)
+        payload = self.pickle.dumps(record, self.pickle.HIGHEST_PROTOCOL)
+        return self.header.pack(len(payload)) + payload
+
+    def write(self, *values):
+        chunk = self.encode(values)
+        self.chunks.append(chunk)
+        self.buffered += len(chunk)
+        self.records += 1
+        if self.buffered >= self.buffer_size:
+            self.flush()
+        elif self.flush_interval is not None and time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        if self.chunks:
+            stream = self.stream
+            if stream is None:
+                stream = sys.stdout.buffer if self.binary else sys.stdout
+            stream.write((b'' if self.binary else '').join(self.chunks))
+            stream.flush()
+            self.chunks.clear()
+            self.buffered = 0
+        self.last_flush = time.monotonic()
+
+    def close(self):
+        self.flush()
+        if self.owns_stream:
+            self.stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class RingBufferSink:
+    def __init__(self, capacity=10000):
+        self.records = collections.deque(maxlen=capacity)
+
+    def write(self, *values):
+        self.records.append(values[0] if len(values) == 1 else values)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+    def getvalue(self):
+        return ''.join(f'{record}\n' for record in self.records)
+
+
+def read_binary_records(stream):
+    import pickle
+    import struct
+
+    header = struct.Struct('<I')
+    while True:
+        prefix = stream.read(header.size)
+        if len(prefix) < header.size:
+            return
+        (length,) = header.unpack(prefix)
+        yield pickle.loads(stream.read(length))
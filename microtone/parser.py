@@ -20,7 +20,7 @@ class MicrotonEParser:
             elif token[1] == 'print':
                 return self.parse_print_statement()
             # Add other statement types here
-        raise ValueError('Unexpected token: %s' % token)
+        raise ValueError('Unexpected token: %s' % (token,))
 
     def parse_function_definition(self):
         self.position += 2  # Skip 'define function'
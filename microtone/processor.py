@@ -1,6 +1,10 @@
+from .executor import MicrotonEExecutor
+from .interpreter import MicrotonEInterpreter
+
+
 class MicrotonEProcessor:
-    def __init__(self):
-        self.executor = MicrotonEExecutor(MicrotonEInterpreter())
+    def __init__(self, metrics=None):
+        self.executor = MicrotonEExecutor(MicrotonEInterpreter(), metrics)
 
     def process(self, code):
         self.executor.execute_code(code)
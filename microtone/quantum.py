@@ -0,0 +1,378 @@
+import math
+import os
+import tempfile
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy
+
+GATES = {
+    'h': numpy.array([[1, 1], [1, -1]], dtype=complex) / math.sqrt(2),
+    'x': numpy.array([[0, 1], [1, 0]], dtype=complex),
+    'y': numpy.array([[0, -1j], [1j, 0]], dtype=complex),
+    'z': numpy.array([[1, 0], [0, -1]], dtype=complex),
+    's': numpy.array([[1, 0], [0, 1j]], dtype=complex),
+    't': numpy.array([[1, 0], [0, numpy.exp(1j * math.pi / 4)]], dtype=complex),
+}
+IDENTITY = numpy.eye(2, dtype=complex)
+
+# Registers up to this many qubits are held densely in memory by default;
+# wider ones start sparse and move to memory-mapped chunks as they fill in.
+DENSE_QUBITS = 24
+# Dense registers at least this wide are split into per-thread chunks.
+PARALLEL_QUBITS = 18
+CHUNK_QUBITS = 20
+SPARSE_LIMIT = 1 << 16
+EPSILON = 1e-12
+
+
+def _split(block, bits):
+    # Reshape a flat block of 2**k amplitudes so that each bit in `bits` has
+    # an axis of its own. The result is a view, so writes land in `block`.
+    upper = block.size.bit_length() - 1
+    shape = []
+    axes = {}
+    for bit in sorted(bits, reverse=True):
+        shape.append(1 << (upper - bit - 1))
+        axes[bit] = len(shape)
+        shape.append(2)
+        upper = bit
+    shape.append(1 << upper)
+    return block.reshape(shape), axes
+
+
+def _select(block, controls, target=None):
+    bits = list(controls) if target is None else [target, *controls]
+    view, axes = _split(block, bits)
+    index = [slice(None)] * view.ndim
+    for control in controls:
+        index[axes[control]] = 1
+    if target is None:
+        return view[tuple(index)]
+    index[axes[target]] = 0
+    low = view[tuple(index)]
+    index[axes[target]] = 1
+    return low, view[tuple(index)]
+
+
+def _apply_matrix(gate, low, high):
+    # In-place 2x2 update of paired amplitudes, with diagonal and
+    # anti-diagonal gates handled without a full matrix-vector product.
+    u00, u01, u10, u11 = gate[0, 0], gate[0, 1], gate[1, 0], gate[1, 1]
+    if u01 == 0 and u10 == 0:
+        if u00 != 1:
+            low *= u00
+        if u11 != 1:
+            high *= u11
+    elif u00 == 0 and u11 == 0:
+        saved = low.copy()
+        numpy.multiply(high, u01, out=low)
+        numpy.multiply(saved, u10, out=high)
+    else:
+        saved = low.copy()
+        low *= u00
+        low += u01 * high
+        high *= u11
+        high += u10 * saved
+
+
+def apply_to_array(state, gate, target, controls=()):
+    low, high = _select(state, controls, target)
+    _apply_matrix(numpy.asarray(gate, dtype=complex), low, high)
+    return state
+
+
+def _release(resources):
+    # Shuts down a ChunkedState's threads and unmaps its file. A closed dense
+    # state still works, on one thread; a closed chunked one is gone.
+    executor = resources['executor']
+    if executor is not None:
+        resources['executor'] = None
+        executor.shutdown()
+    if isinstance(resources['blocks'], numpy.memmap):
+        resources['blocks'] = None
+        if resources['path'] is not None:
+            os.unlink(resources['path'])
+            resources['path'] = None
+
+
+class ChunkedState:
+    def __init__(self, count, chunk_qubits, storage=None, workers=None):
+        self.count = count
+        self.chunk_qubits = min(chunk_qubits, count)
+        self.chunk_count = 1 << (count - self.chunk_qubits)
+        shape = (self.chunk_count, 1 << self.chunk_qubits)
+        self.backend = 'dense' if storage is None else 'chunked'
+        self.path = None
+        if storage is None:
+            self.blocks = numpy.zeros(shape, dtype=complex)
+        else:
+            handle, path = tempfile.mkstemp(suffix='.qstate', dir=storage)
+            os.close(handle)
+            self.blocks = numpy.memmap(path, dtype=complex, mode='w+', shape=shape)
+            if os.name == 'posix':
+                # The mapping keeps the pages alive, so the name can go at once
+                # and nothing is left on disk even if the process is killed.
+                os.unlink(path)
+            else:
+                self.path = path
+        self.blocks[0, 0] = 1
+        self.executor = None
+        if workers and workers > 1 and self.chunk_count > 1:
+            self.executor = ThreadPoolExecutor(workers)
+        # Also runs when the state is collected without being closed. It is
+        # given the attribute dict rather than the state, so as not to keep
+        # the state alive.
+        self.finalizer = weakref.finalize(self, _release, self.__dict__)
+
+    def map(self, function, tasks):
+        if self.executor is None or len(tasks) < 2:
+            for task in tasks:
+                function(task)
+        else:
+            list(self.executor.map(function, tasks))
+
+    def apply(self, gate, target, controls=()):
+        local_controls = [c for c in controls if c < self.chunk_qubits]
+        mask = 0
+        for control in controls:
+            if control >= self.chunk_qubits:
+                mask |= 1 << (control - self.chunk_qubits)
+        if target < self.chunk_qubits:
+            tasks = [(i, None) for i in range(self.chunk_count) if i & mask == mask]
+        else:
+            # The target selects between chunks, so chunks are updated in pairs.
+            bit = 1 << (target - self.chunk_qubits)
+            tasks = [(i, i | bit) for i in range(self.chunk_count) if not i & bit and i & mask == mask]
+
+        def run(task):
+            i, j = task
+            if j is None:
+                low, high = _select(self.blocks[i], local_controls, target)
+            else:
+                low = _select(self.blocks[i], local_controls)
+                high = _select(self.blocks[j], local_controls)
+            _apply_matrix(gate, low, high)
+
+        self.map(run, tasks)
+
+    def chunk_weights(self):
+        return numpy.array([numpy.vdot(block, block).real for block in self.blocks])
+
+    def probabilities(self):
+        return (numpy.abs(self.blocks) ** 2).reshape(-1)
+
+    def amplitude(self, index):
+        return complex(self.blocks[index >> self.chunk_qubits, index & ((1 << self.chunk_qubits) - 1)])
+
+    def to_array(self):
+        return numpy.array(self.blocks).reshape(-1)
+
+    def measure(self, rng):
+        weights = self.chunk_weights()
+        chunk = rng.choice(self.chunk_count, p=weights / weights.sum())
+        probabilities = numpy.abs(self.blocks[chunk]) ** 2
+        index = rng.choice(probabilities.size, p=probabilities / probabilities.sum())
+        return int(chunk << self.chunk_qubits | index)
+
+    def measure_qubit(self, target, rng):
+        p_one = 0.0
+        halves = []
+        for i, block in enumerate(self.blocks):
+            if target < self.chunk_qubits:
+                low, high = _select(block, (), target)
+            elif i >> (target - self.chunk_qubits) & 1:
+                low, high = None, block
+            else:
+                low, high = block, None
+            halves.append((low, high))
+            if high is not None:
+                p_one += numpy.vdot(high, high).real
+        outcome = int(rng.random() < p_one)
+        scale = 1 / math.sqrt(p_one if outcome else 1 - p_one)
+        for low, high in halves:
+            keep, drop = (high, low) if outcome else (low, high)
+            if drop is not None:
+                drop[...] = 0
+            if keep is not None:
+                keep *= scale
+        return outcome
+
+    def load(self, amplitudes):
+        flat = self.blocks.reshape(-1)
+        flat[0] = 0
+        for index, amplitude in amplitudes.items():
+            flat[index] = amplitude
+
+    def close(self):
+        self.finalizer()
+
+
+class SparseState:
+    backend = 'sparse'
+
+    def __init__(self, count):
+        self.count = count
+        self.amplitudes = {0: 1 + 0j}
+
+    def apply(self, gate, target, controls=()):
+        (u00, u01), (u10, u11) = gate.tolist()
+        mask = 0
+        for control in controls:
+            mask |= 1 << control
+        bit = 1 << target
+        result = {}
+        for index, amplitude in self.amplitudes.items():
+            if index & mask != mask:
+                result[index] = result.get(index, 0) + amplitude
+                continue
+            low, high = index & ~bit, index | bit
+            if index & bit:
+                to_low, to_high = u01 * amplitude, u11 * amplitude
+            else:
+                to_low, to_high = u00 * amplitude, u10 * amplitude
+            if to_low:
+                result[low] = result.get(low, 0) + to_low
+            if to_high:
+                result[high] = result.get(high, 0) + to_high
+        self.amplitudes = {index: amplitude for index, amplitude in result.items() if abs(amplitude) > EPSILON}
+
+    def probabilities(self):
+        probabilities = numpy.zeros(1 << self.count)
+        for index, amplitude in self.amplitudes.items():
+            probabilities[index] = abs(amplitude) ** 2
+        return probabilities
+
+    def amplitude(self, index):
+        return self.amplitudes.get(index, 0j)
+
+    def to_array(self):
+        state = numpy.zeros(1 << self.count, dtype=complex)
+        for index, amplitude in self.amplitudes.items():
+            state[index] = amplitude
+        return state
+
+    def measure(self, rng):
+        indices = list(self.amplitudes)
+        weights = numpy.array([abs(self.amplitudes[i]) ** 2 for i in indices])
+        return int(indices[rng.choice(len(indices), p=weights / weights.sum())])
+
+    def measure_qubit(self, target, rng):
+        bit = 1 << target
+        p_one = sum(abs(a) ** 2 for i, a in self.amplitudes.items() if i & bit)
+        outcome = int(rng.random() < p_one)
+        scale = 1 / math.sqrt(p_one if outcome else 1 - p_one)
+        self.amplitudes = {i: a * scale for i, a in self.amplitudes.items() if bool(i & bit) == bool(outcome)}
+        return outcome
+
+    def close(self):
+        pass
+
+
+class QuantumRegister:
+    def __init__(self, count, backend='auto', chunk_qubits=CHUNK_QUBITS, workers=None, storage=None, seed=None, sparse_limit=SPARSE_LIMIT):
+        self.count = count
+        self.chunk_qubits = chunk_qubits
+        self.workers = workers if workers is not None else os.cpu_count() or 1
+        self.storage = storage
+        self.sparse_limit = sparse_limit
+        self.rng = numpy.random.default_rng(seed)
+        # Uncontrolled single-qubit gates are multiplied together per target
+        # and applied in one pass when the qubit is next needed.
+        self.pending = {}
+        if backend == 'auto':
+            backend = 'dense' if count <= DENSE_QUBITS else 'sparse'
+        if backend == 'dense':
+            chunk = count - (self.workers.bit_length() - 1) if count >= PARALLEL_QUBITS else count
+            self.state = ChunkedState(count, chunk, workers=self.workers)
+        elif backend == 'chunked':
+            self.state = ChunkedState(count, chunk_qubits, storage or tempfile.gettempdir(), self.workers)
+        elif backend == 'sparse':
+            self.state = SparseState(count)
+        else:
+            raise ValueError(f"Unknown quantum backend: {backend}")
+
+    @property
+    def backend(self):
+        return self.state.backend
+
+    @property
+    def size(self):
+        # Amplitudes in the state vector, as for a NumPy array.
+        return 1 << self.count
+
+    def gate(self, gate, target, *controls):
+        if isinstance(gate, str):
+            gate = GATES[gate]
+        gate = numpy.asarray(gate, dtype=complex)
+        for qubit in (target, *controls):
+            if not 0 <= qubit < self.count:
+                raise ValueError(f"Qubit {qubit} out of range for a {self.count}-qubit register")
+        if not controls:
+            self.pending[target] = gate @ self.pending.get(target, IDENTITY)
+            return self
+        self.flush(target, *controls)
+        self.apply(gate, target, controls)
+        return self
+
+    def apply(self, gate, target, controls=()):
+        self.state.apply(gate, target, controls)
+        if self.backend == 'sparse' and len(self.state.amplitudes) > self.sparse_limit:
+            chunked = ChunkedState(self.count, self.chunk_qubits, self.storage or tempfile.gettempdir(), self.workers)
+            chunked.load(self.state.amplitudes)
+            self.state = chunked
+
+    def flush(self, *qubits):
+        for qubit in qubits or list(self.pending):
+            gate = self.pending.pop(qubit, None)
+            if gate is not None:
+                self.apply(gate, qubit)
+        return self
+
+    def h(self, target):
+        return self.gate('h', target)
+
+    def x(self, target):
+        return self.gate('x', target)
+
+    def y(self, target):
+        return self.gate('y', target)
+
+    def z(self, target):
+        return self.gate('z', target)
+
+    def phase(self, target, theta):
+        return self.gate(numpy.array([[1, 0], [0, numpy.exp(1j * theta)]]), target)
+
+    def cnot(self, control, target):
+        return self.gate('x', target, control)
+
+    def cz(self, control, target):
+        return self.gate('z', target, control)
+
+    def probabilities(self):
+        return self.flush().state.probabilities()
+
+    def amplitude(self, index):
+        return self.flush().state.amplitude(index)
+
+    def to_array(self):
+        return self.flush().state.to_array()
+
+    def measure(self):
+        return self.flush().state.measure(self.rng)
+
+    def measure_qubit(self, target):
+        return self.flush().state.measure_qubit(target, self.rng)
+
+    def close(self):
+        self.state.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __repr__(self):
+        return f'QuantumRegister({self.count} qubits, {self.backend})'
@@ -0,0 +1,99 @@
+def called_names(statements):
+    # Every function name called anywhere in `statements`, including inside
+    # nested blocks but not inside function definitions.
+    names = set()
+    for statement in statements:
+        kind = statement[0]
+        if kind in ('assignment', 'constant'):
+            _expression_calls(statement[2], names)
+        elif kind in ('print', 'return'):
+            _expression_calls(statement[1], names)
+        elif kind == 'if':
+            _expression_calls(statement[1], names)
+            names |= called_names(statement[2])
+            names |= called_names(statement[3])
+        elif kind == 'loop':
+            names |= called_names(statement[4])
+        elif kind == 'while':
+            _expression_calls(statement[1], names)
+            names |= called_names(statement[2])
+        elif kind == 'try':
+            names |= called_names(statement[1])
+            names |= called_names(statement[2])
+        elif kind == 'call':
+            _expression_calls(statement, names)
+    return names
+
+
+def _expression_calls(expr, names):
+    kind = expr[0]
+    if kind == 'call':
+        names.add(expr[1])
+        for arg in expr[2]:
+            _expression_calls(arg, names)
+    elif kind == 'operation':
+        _expression_calls(expr[1], names)
+        _expression_calls(expr[3], names)
+    elif kind == 'numeric':
+        _expression_calls(expr[2], names)
+        _expression_calls(expr[3], names)
+    elif kind == 'negate':
+        _expression_calls(expr[1], names)
+    elif kind == 'list':
+        for element in expr[1]:
+            _expression_calls(element, names)
+    elif kind == 'dictionary':
+        for k, v in expr[1].items():
+            _expression_calls(k, names)
+            _expression_calls(v, names)
+
+
+def _imports(statements):
+    for statement in statements:
+        if statement[0] == 'import':
+            return True
+        for part in statement[1:]:
+            if isinstance(part, list) and part and isinstance(part[0], tuple) and _imports(part):
+                return True
+    return False
+
+
+def reachable(roots, edges):
+    # The names reachable from `roots`, where edges[name] is the set of names
+    # `name` refers to. Names without an entry are leaves.
+    seen = set()
+    pending = list(roots)
+    while pending:
+        name = pending.pop()
+        if name not in seen:
+            seen.add(name)
+            pending.extend(edges.get(name, ()))
+    return seen
+
+
+def live_functions(statements, functions):
+    # The names of the functions a run of `statements` can call, directly or
+    # through other functions, or None if it cannot be known. Calls always
+    # name their target, so the call graph is exact; only an import, whose
+    # functions may call back into the program by name, makes every
+    # function potentially live.
+    if _imports(statements) or any(_imports(body) for _, body in functions.values()):
+        return None
+    edges = {name: called_names(body) for name, (_, body) in functions.items()}
+    return reachable(called_names(statements), edges) & set(functions)
+
+
+def eliminate_dead_functions(statements, functions):
+    # Returns (statements, functions, eliminated): the program without the
+    # functions it defines that no run of it can call, and the sorted names
+    # of those dropped. Functions defined elsewhere, such as by an earlier
+    # run of the same interpreter, are kept.
+    live = live_functions(statements, functions)
+    if live is None:
+        return statements, functions, []
+    dead = {statement[1] for statement in statements if statement[0] == 'function'} - live
+    if not dead:
+        return statements, functions, []
+    statements = [statement for statement in statements if statement[0] != 'function' or statement[1] not in dead]
+    functions = {name: function for name, function in functions.items() if name not in dead}
+    return statements, functions, sorted(dead)
@@ -0,0 +1,374 @@
+"""Local multi-tenant execution service backed by a pool of warm workers.
+
+    python -m microtone.server --http 127.0.0.1:8765 --workers 8 --cpu-time 2 --memory 512
+    python -m microtone.server --unix /tmp/microtone.sock
+
+HTTP: POST /run with the program as the body (or JSON {"code": ..., "cpu_time": ...}),
+GET /stats for throughput and latency percentiles. Unix socket: one JSON request per
+line, one JSON response per line.
+"""
+import collections
+import contextlib
+import hashlib
+import io
+import json
+import math
+import multiprocessing
+import os
+import queue
+import resource
+import signal
+import socketserver
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .limits import CPUTimeExceeded, LimitExceeded, Limits
+from .output import OutputSink
+
+WARMUP_CODE = """
+define function warmup(a, b) rest
+    return a * b + 1 rest
+end rest
+for each i in 1 to 50 rest
+    x = warmup(i, 2) rest
+end rest
+v = dot(arange(8), ones(8)) rest
+f = fft(arange(8)) rest
+"""
+
+
+def _on_cpu_time_exceeded(signum, frame):
+    raise CPUTimeExceeded()
+
+
+class CompileCache:
+    def __init__(self, size=256):
+        self.size = size
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, code):
+        from .grammar import Interpreter
+
+        key = hashlib.sha1(code.encode()).hexdigest()
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry
+        self.misses += 1
+        interpreter = Interpreter()
+        interpreter.eliminate_dead_functions = True
+        statements = interpreter.parse_program(code)
+        entry = (statements, interpreter.program_functions())
+        self.entries[key] = entry
+        if len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+        return entry
+
+
+def _run_request(request, cache):
+    from .grammar import Interpreter
+
+    output = io.StringIO()
+    response = {'ok': True}
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    try:
+        statements, functions = cache.get(request['code'])
+        interpreter = Interpreter(request.get('limits'), OutputSink(output))
+        interpreter.functions = dict(functions)
+        cpu_time = request.get('cpu_time')
+        if cpu_time:
+            signal.setitimer(signal.ITIMER_PROF, cpu_time)
+        try:
+            result = interpreter.execute(statements)
+        finally:
+            signal.setitimer(signal.ITIMER_PROF, 0)
+            interpreter.output.flush()
+        response['result'] = result
+    except CPUTimeExceeded:
+        response.update(ok=False, error=f"CPU time limit of {request.get('cpu_time')}s exceeded")
+    except LimitExceeded as e:
+        response.update(ok=False, error=f'{type(e).__name__}: {e}')
+    except MemoryError:
+        response.update(ok=False, error='Memory limit exceeded', recycle=True)
+    except Exception as e:
+        response.update(ok=False, error=f'{type(e).__name__}: {e}')
+    response['output'] = output.getvalue()
+    response['elapsed'] = time.perf_counter() - start
+    response['cpu_time'] = time.process_time() - cpu_start
+    response['cache'] = {'hits': cache.hits, 'misses': cache.misses}
+    return response
+
+
+def _worker_main(conn, memory):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGPROF, _on_cpu_time_exceeded)
+    if memory:
+        resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+
+    # Run a small program that calls into the standard library once, so
+    # the engine, NumPy and SciPy are imported before the first real request.
+    cache = CompileCache()
+    _run_request({'code': WARMUP_CODE}, cache)
+    conn.send({'ready': True})
+
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            break
+        if request is None:
+            break
+        response = _run_request(request, cache)
+        try:
+            conn.send(response)
+        except Exception:
+            response['result'] = repr(response.get('result'))
+            conn.send(response)
+        if response.get('recycle'):
+            break
+
+
+class _Worker:
+    def __init__(self, context, memory):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, memory), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.conn.recv()
+
+    def stop(self):
+        with contextlib.suppress(OSError):
+            self.conn.send(None)
+        self.process.join(1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+def _percentile(ordered, fraction):
+    if not ordered:
+        return 0.0
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class ServerStats:
+    def __init__(self, window=10000):
+        self.lock = threading.Lock()
+        self.latencies = collections.deque(maxlen=window)
+        self.completed = 0
+        self.failed = 0
+        self.started = time.monotonic()
+
+    def record(self, latency, ok):
+        with self.lock:
+            self.latencies.append(latency)
+            self.completed += 1
+            if not ok:
+                self.failed += 1
+
+    def snapshot(self):
+        with self.lock:
+            ordered = sorted(self.latencies)
+            completed, failed = self.completed, self.failed
+        uptime = time.monotonic() - self.started
+        return {
+            'completed': completed,
+            'failed': failed,
+            'uptime': uptime,
+            'scripts_per_second': completed / uptime if uptime else 0.0,
+            'p50_latency': _percentile(ordered, 0.50),
+            'p99_latency': _percentile(ordered, 0.99),
+        }
+
+
+class WorkerPool:
+    def __init__(self, workers=None, cpu_time=None, memory=None, timeout=None, limits=None):
+        self.size = workers or os.cpu_count() or 1
+        self.cpu_time = cpu_time
+        self.limits = limits
+        self.memory = memory
+        self.timeout = timeout
+        self.stats = ServerStats()
+        self.context = multiprocessing.get_context('fork' if 'fork' in multiprocessing.get_all_start_methods() else None)
+        self.idle = queue.Queue()
+        for _ in range(self.size):
+            self.idle.put(_Worker(self.context, self.memory))
+
+    def run(self, code, cpu_time=None):
+        start = time.perf_counter()
+        worker = self.idle.get()
+        healthy = True
+        try:
+            worker.conn.send({'code': code, 'cpu_time': cpu_time or self.cpu_time, 'limits': self.limits})
+            if worker.conn.poll(self.timeout):
+                response = worker.conn.recv()
+                healthy = not response.get('recycle')
+            else:
+                healthy = False
+                response = {'ok': False, 'error': f'Wall-clock limit of {self.timeout}s exceeded'}
+        except (EOFError, OSError):
+            healthy = False
+            response = {'ok': False, 'error': 'Worker exited unexpectedly'}
+        finally:
+            if not healthy:
+                worker.process.kill()
+                worker.stop()
+                worker = _Worker(self.context, self.memory)
+            self.idle.put(worker)
+        response['latency'] = time.perf_counter() - start
+        self.stats.record(response['latency'], response['ok'])
+        return response
+
+    def close(self):
+        for _ in range(self.size):
+            self.idle.get().stop()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _check_request(request):
+    # Returns the code and CPU-time limit of a decoded request, or raises
+    # ValueError saying what is wrong with it.
+    if not isinstance(request, dict):
+        raise ValueError('request must be a JSON object')
+    code = request.get('code')
+    if not isinstance(code, str):
+        raise ValueError('request needs a "code" string')
+    cpu_time = request.get('cpu_time')
+    if cpu_time is not None and (isinstance(cpu_time, bool) or not isinstance(cpu_time, (int, float)) or cpu_time < 0):
+        raise ValueError('"cpu_time" must be a non-negative number')
+    return code, cpu_time
+
+
+def _encode(response):
+    return json.dumps(response, default=repr).encode()
+
+
+class _HTTPHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        if self.path != '/run':
+            self.send_error(404)
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            if length < 0:
+                raise ValueError('negative Content-Length')
+            body = self.rfile.read(length).decode()
+            if self.headers.get('Content-Type', '').startswith('application/json'):
+                request = json.loads(body)
+            else:
+                request = {'code': body}
+            code, cpu_time = _check_request(request)
+        except ValueError as e:
+            self.send_error(400, f'Bad request: {e}')
+            return
+        self._reply(self.server.pool.run(code, cpu_time))
+
+    def do_GET(self):
+        if self.path != '/stats':
+            self.send_error(404)
+            return
+        self._reply(self.server.pool.stats.snapshot())
+
+    def _reply(self, payload):
+        data = _encode(payload)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _UnixHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                if isinstance(request, dict) and request.get('stats'):
+                    response = self.server.pool.stats.snapshot()
+                else:
+                    response = self.server.pool.run(*_check_request(request))
+            except ValueError as e:
+                response = {'ok': False, 'error': f'Bad request: {e}'}
+            self.wfile.write(_encode(response) + b'\n')
+            self.wfile.flush()
+
+
+class HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, pool):
+        super().__init__(address, _HTTPHandler)
+        self.pool = pool
+
+
+class UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, pool):
+        if os.path.exists(path):
+            os.unlink(path)
+        super().__init__(path, _UnixHandler)
+        self.pool = pool
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='microtone.server', description='Serve MicrotonE programs from a warm worker pool.')
+    parser.add_argument('--http', metavar='HOST:PORT', help='listen for HTTP requests on this address')
+    parser.add_argument('--unix', metavar='PATH', help='listen for JSON-lines requests on this Unix socket')
+    parser.add_argument('--workers', type=int, help='worker processes (default: one per core)')
+    parser.add_argument('--cpu-time', type=float, help='per-request CPU-time limit in seconds')
+    parser.add_argument('--memory', type=int, help='per-worker memory limit in MB')
+    parser.add_argument('--timeout', type=float, help='per-request wall-clock limit in seconds')
+    parser.add_argument('--max-instructions', type=int, help='per-request instruction limit')
+    parser.add_argument('--max-call-depth', type=int, help='per-request function call depth limit')
+    parser.add_argument('--max-collection-size', type=int, help='largest list, dictionary or string a script may build')
+    args = parser.parse_args(argv)
+    if not args.http and not args.unix:
+        parser.error('one of --http or --unix is required')
+
+    memory = args.memory * 1024 * 1024 if args.memory else None
+    limits = Limits(args.max_instructions, args.max_call_depth, args.max_collection_size)
+    with WorkerPool(args.workers, args.cpu_time, memory, args.timeout, limits) as pool:
+        servers = []
+        if args.http:
+            host, _, port = args.http.rpartition(':')
+            servers.append(HTTPServer((host or '127.0.0.1', int(port)), pool))
+        if args.unix:
+            servers.append(UnixServer(args.unix, pool))
+        threads = [threading.Thread(target=server.serve_forever, daemon=True) for server in servers]
+        for thread in threads:
+            thread.start()
+        print(f'MicrotonE server ready with {pool.size} workers', file=sys.stderr)
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for server in servers:
+                server.shutdown()
+                server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,414 @@
+import math
+import operator
+import weakref
+
+# MicrotonE name -> NumPy attribute. These are bound directly, so a call from
+# a script goes straight into the vectorized kernel with no wrapper between.
+# Arrays are passed through untouched, so slices and reshapes stay views.
+NUMPY_FUNCTIONS = {
+    'array': 'asarray',
+    'zeros': 'zeros',
+    'ones': 'ones',
+    'arange': 'arange',
+    'linspace': 'linspace',
+    'identity': 'identity',
+    'reshape': 'reshape',
+    'transpose': 'transpose',
+    'concatenate': 'concatenate',
+    'dot': 'dot',
+    'matmul': 'matmul',
+    'outer': 'outer',
+    'cross': 'cross',
+    'kron': 'kron',
+    'sqrt': 'sqrt',
+    'exp': 'exp',
+    'log': 'log',
+    'sin': 'sin',
+    'cos': 'cos',
+    'tan': 'tan',
+    'abs': 'abs',
+    'power': 'power',
+    'sum': 'sum',
+    'cumsum': 'cumsum',
+    'min': 'min',
+    'max': 'max',
+    'mean': 'mean',
+    'median': 'median',
+    'std': 'std',
+    'var': 'var',
+    'percentile': 'percentile',
+    'histogram': 'histogram',
+    'correlation': 'corrcoef',
+    'covariance': 'cov',
+    'norm': 'linalg.norm',
+}
+
+# Resolved against SciPy when it is installed and NumPy otherwise; both
+# packages expose these under the same paths.
+SCIPY_FUNCTIONS = {
+    'inverse': 'linalg.inv',
+    'solve': 'linalg.solve',
+    'det': 'linalg.det',
+    'eigenvalues': 'linalg.eigvals',
+    'fft': 'fft.fft',
+    'ifft': 'fft.ifft',
+    'rfft': 'fft.rfft',
+    'irfft': 'fft.irfft',
+    'fftfreq': 'fft.fftfreq',
+}
+
+METHODS = (
+    'factorial',
+    'vector',
+    'view',
+    'length',
+    'element',
+    'seed',
+    'random',
+    'normal',
+    'uniform',
+    'randint',
+    'choice',
+    'shuffle',
+    'qubits',
+    'quantum_register',
+    'superposition',
+    'entanglement',
+    'apply_gate',
+    'hadamard',
+    'pauli_x',
+    'pauli_y',
+    'pauli_z',
+    'phase',
+    'cnot',
+    'probabilities',
+    'measure',
+    'measure_qubit',
+)
+
+FUNCTIONS = frozenset(NUMPY_FUNCTIONS) | frozenset(SCIPY_FUNCTIONS) | frozenset(METHODS)
+
+
+def _index(value):
+    try:
+        return operator.index(value)
+    except TypeError:
+        return None
+
+
+def _count(value):
+    # Elements in a shape given as an integer or a sequence of them, or None
+    # if it is neither and the call will fail on its own.
+    if isinstance(value, (list, tuple)):
+        dims = [_index(n) for n in value]
+        return None if None in dims else math.prod(max(n, 0) for n in dims)
+    n = _index(value)
+    return None if n is None else max(n, 0)
+
+
+def _size(value):
+    size = getattr(value, 'size', None)
+    if type(size) is int:
+        return size
+    return len(value) if isinstance(value, (list, tuple)) else None
+
+
+def _states(count):
+    # Amplitudes in a register of `count` qubits, without building 2**count
+    # for absurd counts.
+    count = _index(count)
+    if count is None or count < 0:
+        return None
+    return 1 << count if count < 64 else math.inf
+
+
+def _arange(start, stop=None, step=1, *_):
+    if stop is None:
+        start, stop = 0, start
+    try:
+        return max(math.ceil((stop - start) / step), 0)
+    except (TypeError, ValueError, ZeroDivisionError, OverflowError):
+        return None
+
+
+def _product(a, b, *_):
+    a, b = _size(a), _size(b)
+    return a * b if a is not None and b is not None else None
+
+
+def _shape(value):
+    # The shape of an array, or of nested lists as NumPy would see them.
+    shape = getattr(value, 'shape', None)
+    if isinstance(shape, tuple):
+        return shape
+    shape = []
+    while isinstance(value, (list, tuple)):
+        shape.append(len(value))
+        if not value:
+            break
+        value = value[0]
+    return tuple(shape)
+
+
+def _broadcast(a, b):
+    # NumPy's broadcast of two shapes; mismatches are left for NumPy to
+    # report.
+    a, b = (1,) * (len(b) - len(a)) + a, (1,) * (len(a) - len(b)) + b
+    return tuple(max(m, n) for m, n in zip(a, b))
+
+
+def _elementwise(a, b, *_):
+    return math.prod(_broadcast(_shape(a), _shape(b)))
+
+
+def _dot(a, b, *_):
+    a, b = _shape(a), _shape(b)
+    if not a or not b:
+        return math.prod(a or b)
+    if len(b) == 1:
+        return math.prod(a[:-1])
+    return math.prod(a[:-1]) * math.prod(b[:-2]) * b[-1]
+
+
+def _matmul(a, b, *_):
+    a, b = _shape(a), _shape(b)
+    rows = a[-2:-1] if len(a) > 1 else ()
+    columns = b[-1:] if len(b) > 1 else ()
+    return math.prod(_broadcast(a[:-2], b[:-2]) + rows + columns)
+
+
+def _concatenate(arrays, *_):
+    sizes = [_size(array) for array in arrays] if isinstance(arrays, (list, tuple)) else [None]
+    return None if None in sizes else sum(sizes)
+
+
+def _covariance(m, y=None, rowvar=True, *_):
+    # One row and column of the result per variable.
+    variables = 0
+    for value in (m, y):
+        if value is not None:
+            shape = _shape(value)
+            variables += (shape[0] if rowvar else shape[1]) if len(shape) > 1 else 1
+    return variables ** 2
+
+
+def _histogram(values, bins=10, *_):
+    # The counts and the bin edges.
+    count = _count(bins) if _index(bins) is not None else _size(bins)
+    return None if count is None else 2 * count + 1
+
+
+def _transform(a, n=None, *_):
+    # The FFTs pad or crop their input to n points.
+    return _size(a) if n is None else _count(n)
+
+
+def _shuffled(values, *_):
+    # An integer is shuffled as arange(values).
+    return _count(values) if _index(values) is not None else _size(values)
+
+
+def _sampled(position):
+    def count(*args):
+        return _count(args[position]) if len(args) > position and args[position] is not None else 1
+    return count
+
+
+# Builtins whose result size follows from their arguments:
+# name -> function of the call's arguments giving the number of elements, or
+# None if it cannot tell. The interpreter checks it against the collection
+# size limit before making the call, since checking the result is too late
+# for memory.
+ALLOCATIONS = {
+    'zeros': lambda shape, *_: _count(shape),
+    'ones': lambda shape, *_: _count(shape),
+    'arange': _arange,
+    'linspace': lambda start, stop, num=50, *_: _count(num),
+    'identity': lambda n, *_: _count(n) ** 2 if _count(n) is not None else None,
+    'outer': _product,
+    'kron': _product,
+    'dot': _dot,
+    'matmul': _matmul,
+    'power': _elementwise,
+    'concatenate': _concatenate,
+    'correlation': _covariance,
+    'covariance': _covariance,
+    'histogram': _histogram,
+    'fft': _transform,
+    'ifft': _transform,
+    'rfft': _transform,
+    'irfft': _transform,
+    'fftfreq': lambda n, *_: _count(n),
+    'shuffle': _shuffled,
+    'random': _sampled(0),
+    'normal': _sampled(2),
+    'uniform': _sampled(2),
+    'randint': _sampled(2),
+    'choice': _sampled(1),
+    'qubits': lambda count, *_: _states(count),
+    'superposition': lambda count, *_: _states(count),
+    'entanglement': lambda count, *_: _states(count),
+    'quantum_register': lambda count, *_: _states(count),
+}
+
+
+def allocation_size(func_name, args):
+    count = ALLOCATIONS.get(func_name)
+    if count is None:
+        return None
+    try:
+        return count(*args)
+    except (TypeError, ValueError, IndexError):
+        # Arguments the builtin itself will reject.
+        return None
+
+
+def collection_size(value):
+    # Elements held by a builtin's result: list, dict and str lengths, and
+    # the size of NumPy arrays and quantum registers.
+    if type(value) in (list, dict, str):
+        return len(value)
+    size = getattr(value, 'size', None)
+    return size if type(size) is int else None
+
+
+def _resolve(module, path):
+    for part in path.split('.'):
+        module = getattr(module, part)
+    return module
+
+
+class MicrotonELibrary:
+    def __init__(self, seed=None):
+        import numpy
+        try:
+            import scipy.fft
+            import scipy.linalg
+            accelerated = scipy
+        except ImportError:
+            accelerated = numpy
+
+        from . import quantum
+
+        self.np = numpy
+        self.quantum = quantum
+        self.rng = numpy.random.default_rng(seed)
+        self.registers = weakref.WeakSet()
+        self.library = {name: _resolve(numpy, path) for name, path in NUMPY_FUNCTIONS.items()}
+        self.library.update({name: _resolve(accelerated, path) for name, path in SCIPY_FUNCTIONS.items()})
+        self.library.update({name: getattr(self, name) for name in METHODS})
+
+    def factorial(self, n):
+        return math.factorial(n)
+
+    def vector(self, *values):
+        return self.np.array(values)
+
+    def view(self, values, start, stop=None, step=1):
+        return self.np.asarray(values)[start:stop:step]
+
+    def length(self, values):
+        return len(values)
+
+    def element(self, values, *index):
+        return values[index if len(index) > 1 else index[0]]
+
+    # Random sampling. Each library instance, and so each interpreter, owns
+    # its own generator so seeded runs are reproducible.
+
+    def seed(self, value):
+        self.rng = self.np.random.default_rng(value)
+
+    def random(self, size=None):
+        return self.rng.random(size)
+
+    def normal(self, mean=0.0, std=1.0, size=None):
+        return self.rng.normal(mean, std, size)
+
+    def uniform(self, low=0.0, high=1.0, size=None):
+        return self.rng.uniform(low, high, size)
+
+    def randint(self, low, high, size=None):
+        return self.rng.integers(low, high, size)
+
+    def choice(self, values, size=None):
+        return self.rng.choice(values, size)
+
+    def shuffle(self, values):
+        return self.rng.permutation(values)
+
+    # State-vector quantum primitives. Qubit k is bit k of the basis-state
+    # index. They accept either a plain amplitude array, which is copied and
+    # returned updated, or a QuantumRegister, which is updated in place.
+
+    def qubits(self, count):
+        state = self.np.zeros(1 << count, dtype=complex)
+        state[0] = 1
+        return state
+
+    def superposition(self, count):
+        size = 1 << count
+        return self.np.full(size, 1 / math.sqrt(size), dtype=complex)
+
+    def entanglement(self, count):
+        state = self.np.zeros(1 << count, dtype=complex)
+        state[0] = state[-1] = 1 / math.sqrt(2)
+        return state
+
+    def quantum_register(self, count, backend='auto'):
+        register = self.quantum.QuantumRegister(count, backend, seed=self.rng.integers(1 << 63))
+        self.registers.add(register)
+        return register
+
+    def close_registers(self):
+        for register in list(self.registers):
+            register.close()
+        self.registers.clear()
+
+    def apply_gate(self, state, gate, target, *controls):
+        if isinstance(state, self.quantum.QuantumRegister):
+            return state.gate(gate, target, *controls)
+        if isinstance(gate, str):
+            gate = self.quantum.GATES[gate]
+        state = self.np.array(state, dtype=complex)
+        return self.quantum.apply_to_array(state, gate, target, controls)
+
+    def hadamard(self, state, target):
+        return self.apply_gate(state, 'h', target)
+
+    def pauli_x(self, state, target):
+        return self.apply_gate(state, 'x', target)
+
+    def pauli_y(self, state, target):
+        return self.apply_gate(state, 'y', target)
+
+    def pauli_z(self, state, target):
+        return self.apply_gate(state, 'z', target)
+
+    def phase(self, state, target, theta):
+        return self.apply_gate(state, self.np.array([[1, 0], [0, self.np.exp(1j * theta)]]), target)
+
+    def cnot(self, state, control, target):
+        return self.apply_gate(state, 'x', target, control)
+
+    def probabilities(self, state):
+        if isinstance(state, self.quantum.QuantumRegister):
+            return state.probabilities()
+        return self.np.abs(self.np.asarray(state)) ** 2
+
+    def measure(self, state):
+        if isinstance(state, self.quantum.QuantumRegister):
+            return state.measure()
+        probabilities = self.probabilities(state)
+        return int(self.rng.choice(probabilities.size, p=probabilities / probabilities.sum()))
+
+    def measure_qubit(self, state, target):
+        if isinstance(state, self.quantum.QuantumRegister):
+            return [state.measure_qubit(target), state]
+        state = self.np.asarray(state, dtype=complex)
+        probabilities = self.probabilities(state)
+        ones = (self.np.arange(state.size) >> target) & 1 == 1
+        p_one = probabilities[ones].sum()
+        outcome = int(self.rng.random() < p_one)
+        collapsed = self.np.where(ones == bool(outcome), state, 0)
+        return [outcome, collapsed / math.sqrt(p_one if outcome else 1 - p_one)]
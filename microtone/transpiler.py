@@ -0,0 +1,41 @@
+class MicrotonETranspiler:
+    def __init__(self, eliminate_dead_functions=False):
+        self.byte_code = []
+        self.eliminate_dead_functions = eliminate_dead_functions
+        self.eliminated = []
+
+    def transpile(self, ast):
+        if self.eliminate_dead_functions:
+            ast = self.eliminate(ast)
+        for statement in ast:
+            self.byte_code.append(self.convert_to_byte_code(statement))
+        return self.byte_code
+
+    def eliminate(self, ast):
+        # Drops definitions nothing outside them refers to. The only
+        # references this AST has are names printed, which print the
+        # function itself.
+        from .reachability import reachable
+
+        definitions = {statement['name']: statement for statement in ast if statement['type'] == 'function_definition'}
+        edges = {name: self.references(statement['body']) for name, statement in definitions.items()}
+        roots = self.references(statement for statement in ast if statement['type'] != 'function_definition')
+        live = reachable(roots, edges)
+        self.eliminated = sorted(set(definitions) - live)
+        return [statement for statement in ast if statement['type'] != 'function_definition' or statement['name'] in live]
+
+    def references(self, statements):
+        names = set()
+        for statement in statements:
+            if statement['type'] == 'print':
+                names.add(statement['expression'])
+            elif statement['type'] == 'function_definition':
+                names |= self.references(statement['body'])
+        return names
+
+    def convert_to_byte_code(self, statement):
+        if statement['type'] == 'function_definition':
+            return f'DEF {statement["name"]} {len(statement["parameters"])}'
+        if statement['type'] == 'print':
+            return f'PRINT {statement["expression"]}'
+        return 'NOP'
@@ -0,0 +1,19 @@
+from setuptools import setup, find_packages
+
+setup(
+    name='MicrotonE',
+    version='1.0.0',
+    packages=find_packages(include=['microtone', 'microtone.*']),
+    python_requires='>=3.8',
+    extras_require={
+        'numeric': [
+            'numpy',
+            'scipy',
+        ],
+    },
+    entry_points={
+        'console_scripts': [
+            'microtone=microtone.cli:main',
+        ],
+    },
+)
@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+from microtone.grammar import Interpreter
+
+FIRST = '''define function f(n) rest
+    return n + 1 rest
+end rest
+define function g(n) rest
+    return f(n) * 10 rest
+end rest
+for each i in 1 to 5 rest
+    x = g(i) rest
+end rest
+'''
+SECOND = '''define function f(n) rest
+    return n + 2 rest
+end rest
+for each i in 1 to 5 rest
+    y = g(i) rest
+end rest
+'''
+
+
+@pytest.mark.parametrize('jit_threshold', [None, 1])
+def test_redefined_function_runs_its_new_body(jit_threshold):
+    interpreter = Interpreter(jit_threshold=jit_threshold)
+    interpreter.run(FIRST)
+    assert interpreter.global_variables['x'] == 60
+    if jit_threshold is not None:
+        assert {'f', 'g'} <= set(interpreter.compiled)
+    # g's call site for f still holds the old target; redefining f must
+    # invalidate it.
+    interpreter.run(SECOND)
+    assert interpreter.global_variables['y'] == 70
+    assert interpreter.cache_misses > 0
+
+
+@pytest.mark.parametrize('jit_threshold', [None, 1])
+def test_function_shadowing_a_builtin_is_called(jit_threshold):
+    interpreter = Interpreter(jit_threshold=jit_threshold)
+    interpreter.run('define function g(n) rest\n    return abs(n) rest\nend rest\nfor each i in 1 to 3 rest\n    x = g(0 - i) rest\nend rest\n')
+    assert interpreter.global_variables['x'] == 3
+    interpreter.run('define function abs(n) rest\n    return n rest\nend rest\nx = g(0 - 4) rest\n')
+    assert interpreter.global_variables['x'] == -4
+    # A leaf compiled against the builtin must have been dropped.
+    assert 'abs' not in interpreter.compiled.get('g', (None, None, ()))[2]
+
+
+def test_redefined_function_runs_its_new_body_async():
+    interpreter = Interpreter(jit_threshold=None)
+    asyncio.run(interpreter.run_async(FIRST))
+    asyncio.run(interpreter.run_async(SECOND))
+    assert interpreter.global_variables['y'] == 70
@@ -0,0 +1,101 @@
+import math
+
+import pytest
+
+from microtone.frozen import FrozenInterpreter, FrozenProgram, freeze_program
+from microtone.grammar import FOLD_LIMIT, Interpreter
+from microtone.limits import Limits
+
+
+def parse(text, limits=None):
+    return Interpreter(limits).parse_expression(text)
+
+
+def test_small_string_operations_fold():
+    assert parse('"ab" * 3') == ('string', 'ababab')
+    assert parse('"ab" + "cd"') == ('string', 'abcd')
+
+
+@pytest.mark.parametrize('text', [
+    f'"a" * {FOLD_LIMIT + 1}',
+    '"abcd" * 100000000',
+    '"ab" * -1',
+    '"ab" * 1.5',
+])
+def test_large_or_invalid_string_operations_stay_unfolded(text):
+    assert parse(text)[0] == 'operation'
+
+
+def test_folding_respects_the_collection_limit():
+    assert parse('"ab" * 10', Limits(max_collection_size=10))[0] == 'operation'
+    assert parse('"ab" * 5', Limits(max_collection_size=10)) == ('string', 'ababababab')
+
+
+def test_unfolded_dead_branch_costs_nothing():
+    interpreter = Interpreter(Limits(max_collection_size=10))
+    interpreter.run('if 0 rest\n    x = "abcd" * 100000000 rest\nend rest\ny = "ab" * 3 rest\n')
+    assert 'x' not in interpreter.global_variables
+    assert interpreter.global_variables['y'] == 'ababab'
+
+
+def test_literals_are_interned():
+    interpreter = Interpreter()
+    assert interpreter.parse_expression('2 * 3') is interpreter.parse_expression('6')
+    assert interpreter.parse_expression('"a" + "b"') is interpreter.parse_expression('"ab"')
+    # 1, 1.0 and True are equal but must stay apart.
+    assert interpreter.literal(1) is not interpreter.literal(1.0)
+    assert interpreter.literal(1) is not interpreter.literal(True)
+
+
+@pytest.mark.parametrize('code', [
+    'constant K = 1 rest\nK = 2 rest\n',
+    'constant K = 1 rest\nconstant K = 2 rest\n',
+    'constant L = [1, 2] rest\nL = 5 rest\n',
+    'x = 3 rest\nconstant S = x * 2 rest\nS = 5 rest\n',
+    'constant K = 1 rest\nfor each K in 1 to 3 rest\nend rest\n',
+    'constant K = 1 rest\ndefine function f(K) rest\n    return K rest\nend rest\n',
+])
+def test_constants_cannot_be_rebound(code):
+    with pytest.raises(SyntaxError, match='Cannot rebind constant'):
+        Interpreter().run(code)
+
+
+def test_constants_load_their_folded_node():
+    interpreter = Interpreter()
+    interpreter.run('constant N = 4 * 5 rest\nx = N + 1 rest\n')
+    assert interpreter.parse_expression('N') is interpreter.literal(20)
+    assert interpreter.parse_expression('N + 1') is interpreter.literal(21)
+    assert interpreter.global_variables['x'] == 21
+
+
+def test_non_literal_constants_are_read_at_run_time():
+    interpreter = Interpreter()
+    interpreter.run('constant L = [1, 2] rest\nx = 3 rest\nconstant S = x * 2 rest\ny = S + 1 rest\n')
+    assert interpreter.parse_expression('L') == ('identifier', 'L')
+    assert interpreter.global_variables['L'] == [1, 2]
+    assert interpreter.global_variables['y'] == 7
+
+
+def sign(value):
+    return math.copysign(1, value)
+
+
+def test_negative_zero_is_its_own_constant():
+    interpreter = Interpreter()
+    zero, negative = interpreter.parse_expression('0.0'), interpreter.parse_expression('-0.0')
+    assert zero is not negative
+    assert sign(zero[1]) == 1 and sign(negative[1]) == -1
+    assert interpreter.parse_expression('0.0 * -1') is negative
+    interpreter.run('constant K = -0.0 rest\na = 0.0 rest\nb = K rest\nc = -0.0 rest\n')
+    assert [sign(interpreter.global_variables[name]) for name in 'abc'] == [1, -1, -1]
+
+
+def test_frozen_keeps_zero_and_negative_zero_apart():
+    buffer = freeze_program('a = 0.0 rest\nb = -0.0 rest\nc = [0.0, -0.0] rest\n')
+    program = FrozenProgram(buffer)
+    assert sorted(sign(program.constant(i)) for i in range(program.constant_count) if program.constant(i) == 0) == [-1, 1]
+    interpreter = FrozenInterpreter(program)
+    interpreter.run()
+    variables = interpreter.global_variables
+    assert [sign(variables['a']), sign(variables['b'])] == [1, -1]
+    assert [sign(value) for value in variables['c']] == [1, -1]
@@ -0,0 +1,91 @@
+import math
+
+import pytest
+
+from microtone.frozen import FrozenInterpreter, freeze_program
+from microtone.grammar import Interpreter
+
+
+def parse(text):
+    return Interpreter().parse_expression(text)
+
+
+A = ('identifier', 'a')
+B = ('identifier', 'b')
+C = ('identifier', 'c')
+
+
+@pytest.mark.parametrize('text, tree', [
+    ('a + b * c', ('operation', A, '+', ('operation', B, '*', C))),
+    ('a * b + c', ('operation', ('operation', A, '*', B), '+', C)),
+    ('(a + b) * c', ('operation', ('operation', A, '+', B), '*', C)),
+    ('a + b < c * a', ('operation', ('operation', A, '+', B), '<', ('operation', C, '*', A))),
+])
+def test_precedence(text, tree):
+    assert parse(text) == tree
+
+
+@pytest.mark.parametrize('text, tree', [
+    ('a - b - c', ('operation', ('operation', A, '-', B), '-', C)),
+    ('a / b / c', ('operation', ('operation', A, '/', B), '/', C)),
+    ('a - b + c', ('operation', ('operation', A, '-', B), '+', C)),
+])
+def test_left_associativity(text, tree):
+    assert parse(text) == tree
+
+
+@pytest.mark.parametrize('text, tree', [
+    ('-a', ('negate', A)),
+    ('-a * b', ('operation', ('negate', A), '*', B)),
+    ('a - -b', ('operation', A, '-', ('negate', B))),
+    ('- -a', ('negate', ('negate', A))),
+    ('-(a + b)', ('negate', ('operation', A, '+', B))),
+])
+def test_unary_minus(text, tree):
+    assert parse(text) == tree
+
+
+def test_unary_minus_on_literals_folds():
+    assert parse('-2') == ('number', -2)
+    assert parse('-2 * 3') == ('number', -6)
+    assert math.copysign(1, parse('-0.0')[1]) == -1
+
+
+NEGATIONS = 'x = 0.0 rest\ny = -x rest\nz = 1 - -x * 2 rest\n'
+
+
+@pytest.mark.parametrize('engine', ['tree', 'jit', 'frozen'])
+def test_negating_zero_gives_negative_zero(engine):
+    if engine == 'frozen':
+        interpreter = FrozenInterpreter(freeze_program(NEGATIONS))
+        interpreter.run()
+    elif engine == 'jit':
+        interpreter = Interpreter(jit_threshold=1)
+        interpreter.run('define function neg(v) rest\n    return -v rest\nend rest\n' + NEGATIONS + 'w = neg(x) rest\nw = neg(x) rest\n')
+        assert 'neg' in interpreter.compiled
+        assert math.copysign(1, interpreter.global_variables['w']) == -1
+    else:
+        interpreter = Interpreter(jit_threshold=None)
+        interpreter.run(NEGATIONS)
+    assert math.copysign(1, interpreter.global_variables['y']) == -1
+    assert interpreter.global_variables['z'] == 1.0
+
+
+def test_negating_a_string_is_an_error():
+    with pytest.raises(TypeError):
+        Interpreter().run('s = "ab" rest\nt = -s rest\n')
+
+
+@pytest.mark.parametrize('text, column', [
+    ('1 +', 4),
+    ('(a + b', 7),
+    ('a b', 3),
+    ('a = b', 3),
+    ('f(a b)', 5),
+    ('{1 2}', 4),
+    (')', 1),
+    ('a $ b', 3),
+])
+def test_error_position(text, column):
+    with pytest.raises(SyntaxError, match=f'column {column}\\)'):
+        parse(text)
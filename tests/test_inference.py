@@ -0,0 +1,44 @@
+import io
+
+import pytest
+
+from microtone.grammar import Interpreter
+from microtone.limits import CollectionSizeExceeded, Limits
+from microtone.output import OutputSink
+
+
+def interpreter(**options):
+    interpreter = Interpreter(limits=Limits(**options), output=OutputSink(io.StringIO()), jit_threshold=None)
+    return interpreter
+
+
+def test_later_program_is_inferred_afresh():
+    # Run 1 proves n numeric; run 2 passes a string, which must go back
+    # through the size-checked path.
+    limited = interpreter(max_collection_size=5)
+    limited.run('define function dbl(n) rest\n    return n + n rest\nend rest\nx = 0 rest\nfor each i in 1 to 3 rest\n    x = dbl(i) rest\nend rest\n')
+    assert limited.global_variables['x'] == 6
+    with pytest.raises(CollectionSizeExceeded):
+        limited.run('y = dbl("abcdef") rest\n')
+
+
+def test_annotations_stay_out_of_the_function_table():
+    limited = interpreter()
+    limited.run('define function dbl(n) rest\n    return n + n rest\nend rest\nfor each i in 1 to 3 rest\n    x = dbl(i) rest\nend rest\n')
+    params, body = limited.functions['dbl']
+    assert body[0][1][0] == 'operation'
+    assert limited.program_functions()['dbl'][1][0][1][0] == 'numeric'
+    limited.run('y = dbl("ab") rest\n')
+    assert limited.global_variables['y'] == 'abab'
+    assert 'dbl' not in limited.annotations
+
+
+def test_annotated_bodies_are_proven_again():
+    # Functions handed over with their annotations, as the batch runner
+    # does, are not trusted by the next program parsed.
+    source = interpreter()
+    source.parse_program('define function dbl(n) rest\n    return n + n rest\nend rest\nfor each i in 1 to 3 rest\n    x = dbl(i) rest\nend rest\n')
+    limited = interpreter(max_collection_size=5)
+    limited.functions = source.program_functions()
+    with pytest.raises(CollectionSizeExceeded):
+        limited.run('y = dbl("abcdef") rest\n')
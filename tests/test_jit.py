@@ -0,0 +1,76 @@
+import pytest
+
+from microtone import fuzz, jit
+from microtone.grammar import Interpreter
+
+# A leaf calls only builtins and runs on Python locals; a non-leaf calls a
+# MicrotonE function and works on the interpreter's globals. Both must leave
+# the same variables behind as the tree-walker.
+PROGRAMS = {
+    'leaf writes a global': '''define function leaf(n) rest
+    total = n * 2 rest
+    return abs(total) rest
+end rest
+total = 0 rest
+for each i in 1 to 4 rest
+    x = leaf(i) rest
+end rest
+''',
+    'parameter shadows a global': '''define function leaf(n) rest
+    n = n + 1 rest
+    return n rest
+end rest
+n = 100 rest
+x = leaf(1) rest
+y = leaf(x) rest
+''',
+    'callee reads the caller': '''define function inner(k) rest
+    return k + depth rest
+end rest
+define function outer(depth) rest
+    return inner(depth * 10) rest
+end rest
+for each i in 1 to 3 rest
+    x = outer(i) rest
+end rest
+''',
+    'error inside a leaf': '''define function leaf(n) rest
+    seen = n rest
+    return 1 / n rest
+end rest
+try rest
+    x = leaf(2) rest
+    y = leaf(0) rest
+except rest
+    failed = 1 rest
+end rest
+''',
+}
+
+
+def run(program, jit_threshold):
+    interpreter = Interpreter(jit_threshold=jit_threshold)
+    interpreter.run(program)
+    return interpreter
+
+
+@pytest.mark.parametrize('name', sorted(PROGRAMS))
+def test_compiled_functions_match_the_tree_walker(name):
+    compiled = run(PROGRAMS[name], 1)
+    assert compiled.compiled
+    assert compiled.global_variables == run(PROGRAMS[name], None).global_variables
+
+
+def test_leaf_and_non_leaf_are_told_apart():
+    interpreter = run(PROGRAMS['callee reads the caller'], None)
+    assert jit.builtin_calls(interpreter, interpreter.functions['inner'][1]) == frozenset()
+    assert jit.builtin_calls(interpreter, interpreter.functions['outer'][1]) is None
+    interpreter = run(PROGRAMS['leaf writes a global'], None)
+    assert jit.builtin_calls(interpreter, interpreter.functions['leaf'][1]) == {'abs'}
+
+
+def test_fuzzed_programs_agree_on_every_engine():
+    report = fuzz.fuzz(programs=60, seed=1234)
+    assert report['mismatches'] == []
+    for name in ('inferred', 'jit', 'default', 'async', 'frozen', 'journal'):
+        assert report['engines'][name]['programs'] > 0
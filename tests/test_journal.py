@@ -0,0 +1,20 @@
+import os
+
+import pytest
+
+from microtone.grammar import Interpreter
+from microtone.journal import Replayer
+
+pytest.importorskip('numpy')
+
+
+def test_replay_keeps_values_mutated_in_place(tmp_path):
+    # hadamard() updates the register in place, after q was written.
+    path = os.path.join(tmp_path, 'run.mtj')
+    interpreter = Interpreter(jit_threshold=None)
+    with interpreter.record(path):
+        interpreter.run('q = quantum_register(2) rest\np0 = probabilities(q) rest\nr = hadamard(q, 0) rest\n')
+    replayer = Replayer(path)
+    assert list(replayer.seek(2)['q'].probabilities()) == [1, 0, 0, 0]
+    assert [list(q.probabilities()) for _, q in replayer.history('q')] == [[1, 0, 0, 0]]
+    assert list(replayer.seek(replayer.end + 1)['r'].probabilities()) == pytest.approx([0.5, 0.5, 0, 0])
@@ -0,0 +1,61 @@
+import asyncio
+import io
+import tracemalloc
+
+import pytest
+
+from microtone.frozen import FrozenInterpreter, freeze_program
+from microtone.grammar import Interpreter
+from microtone.limits import CollectionSizeExceeded, Limits
+from microtone.output import OutputSink
+
+LIMITS = Limits(max_collection_size=1000)
+OVERSIZED = [
+    'n = 50000000 rest\nx = "a" * n rest\n',
+    'n = 5000000 rest\nx = [1] * n rest\n',
+    'n = 5000000 rest\nx = n * [1] rest\n',
+    'x = "a" * 600 rest\ny = x + x rest\n',
+    'x = [1, 2] rest\nfor each i in 1 to 10 rest\n    x = x + x rest\nend rest\n',
+]
+
+
+def run_tree(code):
+    Interpreter(LIMITS, OutputSink(io.StringIO()), jit_threshold=None).run(code)
+
+
+def run_async(code):
+    asyncio.run(Interpreter(LIMITS, OutputSink(io.StringIO()), jit_threshold=None).run_async(code))
+
+
+def run_frozen(code):
+    FrozenInterpreter(freeze_program(code), LIMITS, OutputSink(io.StringIO())).run()
+
+
+@pytest.mark.parametrize('run', [run_tree, run_async, run_frozen])
+@pytest.mark.parametrize('code', OVERSIZED)
+def test_oversized_collections_are_refused_before_they_are_built(run, code):
+    tracemalloc.start()
+    try:
+        with pytest.raises(CollectionSizeExceeded):
+            run(code)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert peak < 4 * 2 ** 20
+
+
+@pytest.mark.parametrize('run', [run_tree, run_async, run_frozen])
+def test_collections_within_the_limit_are_built(run):
+    run('n = 10 rest\nx = "ab" * n rest\ny = [1] * n rest\nz = x + x rest\nw = "a" * -3 rest\n')
+
+
+def test_limit_applies_inside_a_try_block():
+    with pytest.raises(CollectionSizeExceeded):
+        run_tree('try rest\n    x = "a" * 5000 rest\nexcept rest\n    x = 0 rest\nend rest\n')
+
+
+def test_unlimited_operations_are_unchanged():
+    interpreter = Interpreter(output=OutputSink(io.StringIO()))
+    interpreter.run('n = 3 rest\nx = "ab" * n rest\ny = [0] + [1] rest\n')
+    assert interpreter.global_variables['x'] == 'ababab'
+    assert interpreter.global_variables['y'] == [0, 1]
@@ -0,0 +1,121 @@
+import json
+import os
+import re
+
+import pytest
+
+from microtone.cli import main
+from microtone.grammar import Interpreter
+from microtone.metrics import Metrics
+
+PROGRAM = '''define function square(n) rest
+    return n * n rest
+end rest
+for each i in 1 to 20 rest
+    x = square(i) rest
+end rest
+'''
+
+
+@pytest.fixture
+def metrics():
+    interpreter = Interpreter(jit_threshold=None)
+    interpreter.metrics = Metrics(labels={'script': 'a "quoted"\nname\\'})
+    interpreter.run(PROGRAM)
+    return interpreter.metrics
+
+
+def check_resource(resource):
+    attributes = {attribute['key']: attribute['value'] for attribute in resource['attributes']}
+    assert attributes['service.name'] == {'stringValue': 'microtone'}
+
+
+def check_nanos(value):
+    # OTLP/JSON encodes 64-bit integers as decimal strings.
+    assert isinstance(value, str) and value.isdigit()
+
+
+def test_otel_traces_is_a_trace_export_request(metrics):
+    document = metrics.otel_traces()
+    assert list(document) == ['resourceSpans']
+    [resource_spans] = document['resourceSpans']
+    check_resource(resource_spans['resource'])
+    [scope_spans] = resource_spans['scopeSpans']
+    assert scope_spans['scope']['name'] == 'microtone'
+    root, *children = scope_spans['spans']
+    assert 'parentSpanId' not in root
+    assert {span['name'] for span in children} == {'parse', 'optimize', 'execute'}
+    for span in scope_spans['spans']:
+        assert re.fullmatch('[0-9a-f]{32}', span['traceId'])
+        assert re.fullmatch('[0-9a-f]{16}', span['spanId'])
+        assert span['kind'] == 1
+        check_nanos(span['startTimeUnixNano'])
+        check_nanos(span['endTimeUnixNano'])
+        assert int(span['startTimeUnixNano']) <= int(span['endTimeUnixNano'])
+    for span in children:
+        assert span['traceId'] == root['traceId']
+        assert span['parentSpanId'] == root['spanId']
+        assert int(root['startTimeUnixNano']) <= int(span['startTimeUnixNano'])
+        assert int(span['endTimeUnixNano']) <= int(root['endTimeUnixNano'])
+
+
+def test_otel_metrics_is_a_metrics_export_request(metrics):
+    document = metrics.otel_metrics()
+    assert list(document) == ['resourceMetrics']
+    [resource_metrics] = document['resourceMetrics']
+    check_resource(resource_metrics['resource'])
+    [scope_metrics] = resource_metrics['scopeMetrics']
+    found = {metric['name']: metric for metric in scope_metrics['metrics']}
+    for metric in found.values():
+        [data] = [key for key in ('sum', 'gauge') if key in metric]
+        for point in metric[data]['dataPoints']:
+            check_nanos(point['timeUnixNano'])
+            assert ('asInt' in point) != ('asDouble' in point)
+        if data == 'sum':
+            assert metric['sum']['aggregationTemporality'] == 2
+            assert metric['sum']['isMonotonic'] is True
+    [point] = found['microtone.function_calls']['sum']['dataPoints']
+    assert point['asInt'] == '20'
+    assert 'gauge' in found['microtone.peak_call_depth']
+    phases = {point['attributes'][0]['value']['stringValue'] for point in found['microtone.phase.duration']['sum']['dataPoints']}
+    assert phases == {'tokenize', 'parse', 'optimize', 'execute'}
+
+
+SAMPLE = re.compile(r'([a-zA-Z_:][a-zA-Z0-9_:]*)(\{(?:[a-zA-Z_]\w*="(?:[^"\\\n]|\\[\\"n])*",?)*\})? (\S+)')
+
+
+def test_prometheus_text_exposition(metrics):
+    text = metrics.prometheus()
+    assert text.endswith('\n')
+    types = {}
+    for line in text.splitlines():
+        if line.startswith('# HELP '):
+            assert len(line.split(' ', 3)) == 4
+        elif line.startswith('# TYPE '):
+            _, _, name, kind = line.split(' ')
+            assert kind in ('counter', 'gauge', 'summary')
+            types[name] = kind
+        else:
+            match = SAMPLE.fullmatch(line)
+            assert match, line
+            name, labels, value = match.groups()
+            float(value)
+            family = name if name in types else re.sub('_(sum|count)$', '', name)
+            assert family in types, name
+            assert 'script="a \\"quoted\\"\\nname\\\\"' in labels
+    assert types['microtone_function_calls_total'] == 'counter'
+    assert types['microtone_peak_call_depth'] == 'gauge'
+    assert 'microtone_function_calls_total{script="a \\"quoted\\"\\nname\\\\"} 20' in text.splitlines()
+
+
+def test_cli_writes_traces_and_metrics_to_separate_files(tmp_path):
+    source = os.path.join(tmp_path, 'program.mton')
+    with open(source, 'w') as f:
+        f.write(PROGRAM)
+    traces = os.path.join(tmp_path, 'traces.json')
+    metrics = os.path.join(tmp_path, 'metrics.json')
+    assert main([source, '--metrics', metrics, '--traces', traces]) == 0
+    with open(traces) as f:
+        assert list(json.load(f)) == ['resourceSpans']
+    with open(metrics) as f:
+        assert list(json.load(f)) == ['resourceMetrics']
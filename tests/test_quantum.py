@@ -0,0 +1,66 @@
+import gc
+import os
+import tempfile
+
+import pytest
+
+from microtone.grammar import Interpreter
+
+pytest.importorskip('numpy')
+
+from microtone.quantum import QuantumRegister  # noqa: E402
+
+
+def chunked(storage):
+    return QuantumRegister(4, 'chunked', chunk_qubits=2, workers=2, storage=storage)
+
+
+@pytest.mark.skipif(os.name != 'posix', reason='the file is only unlinked early on POSIX')
+def test_chunked_state_leaves_no_file(tmp_path):
+    register = chunked(tmp_path)
+    register.h(3).cnot(3, 0)
+    assert os.listdir(tmp_path) == []
+    assert register.probabilities()[[0, 9]] == pytest.approx([0.5, 0.5])
+
+
+def test_close_releases_threads_and_mapping(tmp_path):
+    register = chunked(tmp_path)
+    executor = register.state.executor
+    register.close()
+    assert executor._shutdown
+    assert register.state.blocks is None
+    assert os.listdir(tmp_path) == []
+    register.close()
+
+
+def test_collected_register_is_released(tmp_path):
+    register = chunked(tmp_path)
+    executor = register.state.executor
+    finalizer = register.state.finalizer
+    del register
+    gc.collect()
+    assert not finalizer.alive
+    assert executor._shutdown
+    assert os.listdir(tmp_path) == []
+
+
+def test_closed_dense_register_still_works():
+    register = QuantumRegister(2, 'dense')
+    register.close()
+    assert register.h(0).probabilities() == pytest.approx([0.5, 0.5, 0, 0])
+
+
+@pytest.mark.parametrize('run', ['run', 'run_frozen'])
+def test_run_closes_its_registers(run, monkeypatch, tmp_path):
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmp_path))
+    code = 'q = quantum_register(3, "chunked") rest\nr = hadamard(q, 0) rest\nm = measure(q) rest\n'
+    if run == 'run':
+        interpreter = Interpreter(jit_threshold=None)
+        interpreter.run(code)
+    else:
+        from microtone.frozen import FrozenInterpreter, freeze_program
+        interpreter = FrozenInterpreter(freeze_program(code))
+        interpreter.run()
+    assert interpreter.global_variables['m'] in (0, 1)
+    assert interpreter.global_variables['q'].state.blocks is None
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+from microtone.grammar import Interpreter
+
+HELPERS = '''define function unused(n) rest
+    return n rest
+end rest
+define function leaf(n) rest
+    return n + 1 rest
+end rest
+define function middle(n) rest
+    return leaf(n) * 2 rest
+end rest
+define function recursive(n) rest
+    if n < 1 rest
+        return 0 rest
+    end rest
+    return recursive(n - 1) + 1 rest
+end rest
+'''
+
+
+def eliminating(search_path=None):
+    interpreter = Interpreter(search_path=search_path)
+    interpreter.eliminate_dead_functions = True
+    return interpreter
+
+
+@pytest.mark.parametrize('use', [
+    'x = middle(1) rest',
+    'x = -middle(1) rest',
+    'x = [0, middle(1)] rest',
+    'x = {"k": middle(1)} rest',
+    'x = abs(middle(1)) rest',
+    'if 1 rest\n    x = middle(1) rest\nend rest',
+    'if 0 rest\n    y = 1 rest\nelse rest\n    x = middle(1) rest\nend rest',
+    'for each i in 1 to 2 rest\n    x = middle(1) rest\nend rest',
+    'x = 0 rest\nwhile x < middle(1) rest\n    x = x + 1 rest\nend rest',
+    'try rest\n    x = middle(1) rest\nexcept rest\n    y = 1 rest\nend rest',
+])
+def test_reachable_functions_are_kept(use):
+    interpreter = eliminating()
+    interpreter.run(HELPERS + use + '\n')
+    assert interpreter.eliminated_functions == ['recursive', 'unused']
+    assert {'middle', 'leaf'} <= set(interpreter.functions)
+    assert interpreter.global_variables['x'] in (4, -4, [0, 4], {'k': 4})
+
+
+def test_recursion_keeps_the_function():
+    interpreter = eliminating()
+    interpreter.run(HELPERS + 'x = recursive(3) rest\n')
+    assert interpreter.eliminated_functions == ['leaf', 'middle', 'unused']
+    assert interpreter.global_variables['x'] == 3
+
+
+def test_functions_from_an_earlier_program_are_kept():
+    interpreter = Interpreter()
+    interpreter.run(HELPERS)
+    interpreter.eliminate_dead_functions = True
+    interpreter.run('define function dead(n) rest\n    return n rest\nend rest\nx = middle(1) rest\ny = unused(2) rest\n')
+    assert interpreter.eliminated_functions == ['dead']
+    assert interpreter.global_variables['x'] == 4
+    assert interpreter.global_variables['y'] == 2
+
+
+def test_importing_programs_keep_every_function(tmp_path):
+    # The module calls back into the program by name.
+    with open(os.path.join(tmp_path, 'callback.mton'), 'w') as f:
+        f.write('define function run_callback(n) rest\n    return unused(n) rest\nend rest\n')
+    interpreter = eliminating([str(tmp_path)])
+    interpreter.run(HELPERS + 'import callback rest\nx = run_callback(5) rest\n')
+    assert interpreter.eliminated_functions == []
+    assert interpreter.global_variables['x'] == 5
@@ -0,0 +1,84 @@
+import http.client
+import json
+import os
+import socket
+import sys
+import threading
+
+import pytest
+
+from microtone import server
+
+pytest.importorskip('numpy')
+
+
+def test_warmup_loads_the_standard_library():
+    response = server._run_request({'code': server.WARMUP_CODE}, server.CompileCache())
+    assert response['ok'], response.get('error')
+    assert 'numpy' in sys.modules
+
+
+@pytest.fixture(scope='module')
+def pool():
+    with server.WorkerPool(workers=1, timeout=10) as pool:
+        yield pool
+
+
+@pytest.fixture
+def http_server(pool):
+    httpd = server.HTTPServer(('127.0.0.1', 0), pool)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd.server_address
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def post(address, body, headers):
+    connection = http.client.HTTPConnection(*address, timeout=10)
+    connection.putrequest('POST', '/run')
+    for name, value in headers.items():
+        connection.putheader(name, value)
+    connection.endheaders()
+    connection.send(body)
+    response = connection.getresponse()
+    return response.status, response.read()
+
+
+def test_http_runs_code(http_server):
+    status, body = post(http_server, b'print 6 * 7 rest\n', {'Content-Length': '17'})
+    assert status == 200
+    assert json.loads(body)['output'] == '42\n'
+
+
+@pytest.mark.parametrize('body, headers', [
+    (b'{"code": ', {'Content-Type': 'application/json', 'Content-Length': '9'}),
+    (b'{"cpu_time": 1}', {'Content-Type': 'application/json', 'Content-Length': '15'}),
+    (b'[1, 2]', {'Content-Type': 'application/json', 'Content-Length': '6'}),
+    (b'{"code": "x = 1 rest", "cpu_time": "1"}', {'Content-Type': 'application/json', 'Content-Length': '39'}),
+    (b'x = 1 rest', {'Content-Length': 'ten'}),
+    (b'x = 1 rest', {'Content-Length': '-1'}),
+    (b'\xff\xfe', {'Content-Length': '2'}),
+])
+def test_http_rejects_bad_requests(http_server, body, headers):
+    status, _ = post(http_server, body, headers)
+    assert status == 400
+
+
+@pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason='needs Unix sockets')
+def test_json_lines_reports_bad_requests(pool, tmp_path):
+    path = os.path.join(tmp_path, 'microtone.sock')
+    unix = server.UnixServer(path, pool)
+    threading.Thread(target=unix.serve_forever, daemon=True).start()
+    try:
+        with socket.socket(socket.AF_UNIX) as client:
+            client.connect(path)
+            client.sendall(b'not json\n{"stats": false}\n"code"\n{"code": "print 1 rest\\n"}\n')
+            reader = client.makefile('rb')
+            responses = [json.loads(reader.readline()) for _ in range(4)]
+    finally:
+        unix.shutdown()
+        unix.server_close()
+    assert [response['ok'] for response in responses] == [False, False, False, True]
+    assert all(response['error'].startswith('Bad request') for response in responses[:3])
+    assert responses[3]['output'] == '1\n'
@@ -0,0 +1,72 @@
+import io
+import tracemalloc
+
+import pytest
+
+from microtone.grammar import Interpreter
+from microtone.limits import CollectionSizeExceeded, Limits
+from microtone.output import OutputSink
+
+pytest.importorskip('numpy')
+
+# One call per builtin whose result size follows from its arguments, each
+# far over a limit of 1000 items.
+OVERSIZED = {
+    'zeros': 'zeros(20000000)',
+    'ones': 'ones([5000, 5000])',
+    'arange': 'arange(20000000)',
+    'linspace': 'linspace(0, 1, 20000000)',
+    'identity': 'identity(5000)',
+    'outer': 'outer(arange(900), arange(900))',
+    'kron': 'kron(arange(900), arange(900))',
+    'dot': 'dot(ones([900, 1]), ones([1, 900]))',
+    'matmul': 'matmul(ones([900, 1]), ones([1, 900]))',
+    'power': 'power(ones([900, 1]), ones([1, 900]))',
+    'concatenate': 'concatenate([arange(900), arange(900)])',
+    'correlation': 'correlation(ones([40, 2]))',
+    'covariance': 'covariance(ones([40, 2]))',
+    'histogram': 'histogram([1, 2, 3], 20000000)',
+    'fft': 'fft([1, 2, 3], 20000000)',
+    'ifft': 'ifft([1, 2, 3], 20000000)',
+    'rfft': 'rfft([1, 2, 3], 20000000)',
+    'irfft': 'irfft([1, 2, 3], 20000000)',
+    'fftfreq': 'fftfreq(20000000)',
+    'shuffle': 'shuffle(20000000)',
+    'random': 'random(20000000)',
+    'normal': 'normal(0, 1, 20000000)',
+    'uniform': 'uniform(0, 1, 20000000)',
+    'randint': 'randint(0, 10, 20000000)',
+    'choice': 'choice([1, 2, 3], 20000000)',
+    'qubits': 'qubits(30)',
+    'superposition': 'superposition(30)',
+    'entanglement': 'entanglement(30)',
+    'quantum_register': 'quantum_register(30)',
+}
+
+
+def limited():
+    return Interpreter(Limits(max_collection_size=1000), OutputSink(io.StringIO()), jit_threshold=None)
+
+
+@pytest.mark.parametrize('name', sorted(OVERSIZED))
+def test_allocating_builtins_are_checked_before_they_allocate(name):
+    interpreter = limited()
+    # Load the library outside the measurement.
+    interpreter.run('x = zeros(1) rest\n')
+    tracemalloc.start()
+    try:
+        with pytest.raises(CollectionSizeExceeded, match=name):
+            interpreter.run(f'x = {OVERSIZED[name]} rest\n')
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert peak < 8 * 2 ** 20
+
+
+@pytest.mark.parametrize('code', [
+    'zeros(10)', 'arange(0, 10, 0.5)', 'outer(arange(5), arange(5))', 'matmul(ones([3, 4]), ones([4, 5]))',
+    'fft([1, 2, 3], 8)', 'histogram([1, 2, 3], 4)', 'shuffle(10)', 'qubits(5)', 'covariance(ones([3, 10]))',
+])
+def test_small_allocations_run(code):
+    limited().run(f'x = {code} rest\n')
+